@@ -7,6 +7,7 @@ from typing import Generator, Optional
 from pydantic import ValidationError
 from dissect.sql.sqlite3 import SQLite3
 from dissect.sql.exceptions import Error as SQLError
+from dissect.target.helpers.fsutil import TargetPath
 
 from core.forensic_artifact import Source, ArtifactRecord, ForensicArtifact
 from settings.tables import Tables
@@ -32,6 +33,7 @@ class ChromiumHistoryRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.APP_CHROMIUM_HISTORY.value
+        sort_key: str = "ts"
 
 
 class ChromiumDownloadRecord(ArtifactRecord):
@@ -54,6 +56,7 @@ class ChromiumDownloadRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.APP_CHROMIUM_DOWNLOADS.value
+        sort_key: str = "ts_start"
 
 
 class ChromiumKeywordSearchTermsRecord(ArtifactRecord):
@@ -72,6 +75,7 @@ class ChromiumKeywordSearchTermsRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.APP_CHROMIUM_KEYWORDSEARCHTERMS.value
+        sort_key: str = "ts"
 
 
 class ChromiumAutofillRecord(ArtifactRecord):
@@ -87,6 +91,7 @@ class ChromiumAutofillRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.APP_CHROMIUM_AUTOFILL.value
+        sort_key: str = "ts_created"
 
 
 class ChromiumLoginDataRecord(ArtifactRecord):
@@ -107,6 +112,7 @@ class ChromiumLoginDataRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.APP_CHROMIUM_LOGINDATA.value
+        sort_key: str = "ts_created"
 
 
 class ChromiumBookmarksRecord(ArtifactRecord):
@@ -125,6 +131,7 @@ class ChromiumBookmarksRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.APP_CHROMIUM_BOOKMARKS.value
+        sort_key: str = "ts_added"
 
 
 class ChromiumBrowser(ForensicArtifact):
@@ -140,306 +147,311 @@ class ChromiumBrowser(ForensicArtifact):
 
     def history(self) -> Generator[dict, None, None]:
         for db_file in self.check_empty_entry(self.iter_entry(node_name="History")):
-            try:
-                db = SQLite3(db_file.open("rb"))
-                try:
-                    urls = {row.id: row for row in db.table("urls").rows()}
-                    visits = {}
-
-                    for row in db.table("visits").rows():
-                        visits[row.id] = row
-                        url_record = urls[row.url]
-
-                        if not (ts := self.ts.webkittimestamp(row.visit_time)):
-                            ts = self.ts.base_datetime_browser
-
-                        if row.from_visit and row.from_visit in visits:
-                            from_visit = visits[row.from_visit]
-                            from_url = urls[from_visit.url]
-                        else:
-                            from_visit, from_url = None, None
-
-                        if (url := url_record.url).startswith("http"):
-                            parsed_data = {
-                                "ts": ts,
-                                "record_id": row.id,
-                                "url": url,
-                                "title": url_record.title,
-                                "visit_type": None,
-                                "visit_count": url_record.visit_count,
-                                "hidden": url_record.hidden,
-                                "from_visit": row.from_visit or None,
-                                "from_url": from_url.url if from_url else None,
-                                "source": str(db_file),
-                                "browser_type": self.browser_type,
-                                "evidence_id": self.evidence_id,
-                            }
-
-                            try:
-                                yield ChromiumHistoryRecord(**parsed_data)
-                            except ValidationError as e:
-                                self.log_error(e)
-                                continue
-                except SQLError as e:
-                    logger.error(
-                        f"Error processing history file: {db_file} / exc_info={e}"
-                    )
-                    continue
-                except:
-                    logger.error(f"Error processing history file: {db_file}")
-                    continue
-            except:
-                logger.exception(f"Unable to open history file: {db_file}")
-                continue
+            yield from self.read_cached(db_file, self.read_history)
 
-    def downloads(self) -> Generator[dict, None, None]:
-        for db_file in self.check_empty_entry(self.iter_entry(node_name="History")):
+    def read_history(self, db_file: TargetPath) -> Generator[dict, None, None]:
+        try:
+            db = SQLite3(db_file.open("rb"))
             try:
-                db = SQLite3(db_file.open("rb"))
-                try:
-                    download_chains = defaultdict(list)
-                    for row in db.table("downloads_url_chains"):
-                        download_chains[row.id].append(row)
-
-                    for chain in download_chains.values():
-                        chain.sort(key=lambda row: row.chain_index)
-
-                    for row in db.table("downloads").rows():
-                        ts_start = self.ts.webkittimestamp(row.start_time)
-                        ts_end = (
-                            self.ts.webkittimestamp(row.end_time)
-                            if row.end_time
-                            else None
-                        )
-                        download_path = row.target_path
+                urls = {row.id: row for row in db.table("urls").rows()}
+                visits = {}
 
-                        if not ts_start:
-                            ts_start = self.ts.base_datetime_browser
+                for row in db.table("visits").rows():
+                    visits[row.id] = row
+                    url_record = urls[row.url]
 
-                        if download_chain := download_chains.get(row.id):
-                            download_chain_url = download_chain[-1].url
-                        else:
-                            download_chain_url = None
+                    if not (ts := self.ts.webkittimestamp(row.visit_time)):
+                        ts = self.ts.base_datetime_browser
 
-                        if (state := row.get("state")) == 0:
-                            state = "Incomplete"
-                        else:
-                            state = "Complete"
+                    if row.from_visit and row.from_visit in visits:
+                        from_visit = visits[row.from_visit]
+                        from_url = urls[from_visit.url]
+                    else:
+                        from_visit, from_url = None, None
 
+                    if (url := url_record.url).startswith("http"):
                         parsed_data = {
-                            "ts_start": ts_start,
-                            "ts_end": ts_end,
-                            "file_name": self.fe.extract_filename(download_path),
-                            "file_extension": self.fe.extract_file_extention(
-                                download_path
-                            ),
-                            "received_bytes": row.get("total_bytes"),
-                            "download_path": download_path,
-                            "download_url": row.get("tab_url"),
-                            "download_chain_url": download_chain_url,
-                            "reference_url": row.referrer,
-                            "record_id": row.get("id"),
-                            "mime_type": row.get("mime_type"),
-                            "state": state,
-                            "browser_type": self.browser_type,
+                            "ts": ts,
+                            "record_id": row.id,
+                            "url": url,
+                            "title": url_record.title,
+                            "visit_type": None,
+                            "visit_count": url_record.visit_count,
+                            "hidden": url_record.hidden,
+                            "from_visit": row.from_visit or None,
+                            "from_url": from_url.url if from_url else None,
                             "source": str(db_file),
+                            "browser_type": self.browser_type,
                             "evidence_id": self.evidence_id,
                         }
 
                         try:
-                            yield ChromiumDownloadRecord(**parsed_data)
+                            yield self.build_record(ChromiumHistoryRecord, parsed_data)
                         except ValidationError as e:
                             self.log_error(e)
                             continue
-                except SQLError as e:
-                    logger.error(
-                        f"Error processing history file: {db_file} / exc_info={e}"
-                    )
-                    continue
-                except:
-                    logger.error(f"Error processing history file: {db_file}")
-                    continue
+            except SQLError as e:
+                logger.error(f"Error processing history file: {db_file} / exc_info={e}")
+                return
             except:
-                logger.exception(f"Unable to open history file: {db_file}")
-                continue
+                logger.error(f"Error processing history file: {db_file}")
+                return
+        except:
+            logger.exception(f"Unable to open history file: {db_file}")
+            return
 
-    def keyword_search_terms(self) -> Generator[dict, None, None]:
+    def downloads(self) -> Generator[dict, None, None]:
         for db_file in self.check_empty_entry(self.iter_entry(node_name="History")):
-            try:
-                db = SQLite3(db_file.open("rb"))
-                try:
-                    urls = {row.id: row for row in db.table("urls").rows()}
-
-                    for row in db.table("keyword_search_terms").rows():
-                        keyword_search_terms = {}
-                        url_row = urls.get(row.url_id)
-                        keyword_search_terms.update(row._values)
-                        keyword_search_terms.update(url_row._values)
-
-                        last_visit_time = self.ts.webkittimestamp(
-                            keyword_search_terms.get("last_visit_time")
-                        )
-                        term = keyword_search_terms.get("term")
-                        title = keyword_search_terms.get("title")
-                        url = keyword_search_terms.get("url")
-                        id = keyword_search_terms.get("id")
-                        visit_count = keyword_search_terms.get("visit_count")
-                        hidden = keyword_search_terms.get("hidden")
-
-                        if not last_visit_time:
-                            last_visit_time = self.ts.base_datetime_browser
-
-                        engines = {
-                            "Google": "://www.google.com",
-                            "Amazon": "://www.amazon.com",
-                            "Yahoo": "://search.yahoo.com",
-                            "Bing": "://www.bing.com",
-                            "Naver": "://search.naver.com",
-                            "Naver Map": "//map.naver.com",
-                            "Daum": "://search.daum.net",
-                            "Youtube": "://www.youtube.com",
-                            "Github": "://github.com",
-                        }
+            yield from self.read_cached(db_file, self.read_downloads)
 
-                        search_engine = "Unknown"
-                        for engine_name, site_url in engines.items():
-                            if site_url in url:
-                                search_engine = engine_name
+    def read_downloads(self, db_file: TargetPath) -> Generator[dict, None, None]:
+        try:
+            db = SQLite3(db_file.open("rb"))
+            try:
+                download_chains = defaultdict(list)
+                for row in db.table("downloads_url_chains"):
+                    download_chains[row.id].append(row)
 
-                        parsed_data = {
-                            "ts": last_visit_time,
-                            "term": term,
-                            "title": title,
-                            "search_engine": search_engine,
-                            "url": url,
-                            "record_id": id,
-                            "visit_count": visit_count,
-                            "hidden": hidden,
-                            "browser_type": self.browser_type,
-                            "source": str(db_file),
-                            "evidence_id": self.evidence_id,
-                        }
+                for chain in download_chains.values():
+                    chain.sort(key=lambda row: row.chain_index)
 
-                        try:
-                            yield ChromiumKeywordSearchTermsRecord(**parsed_data)
-                        except ValidationError as e:
-                            self.log_error(e)
-                            continue
-                except SQLError as e:
-                    logger.error(
-                        f"Error processing history file: {db_file} / exc_info={e}"
+                for row in db.table("downloads").rows():
+                    ts_start = self.ts.webkittimestamp(row.start_time)
+                    ts_end = (
+                        self.ts.webkittimestamp(row.end_time) if row.end_time else None
                     )
-                    continue
-                except:
-                    logger.error(f"Error processing history file: {db_file}")
-                    continue
+                    download_path = row.target_path
+
+                    if not ts_start:
+                        ts_start = self.ts.base_datetime_browser
+
+                    if download_chain := download_chains.get(row.id):
+                        download_chain_url = download_chain[-1].url
+                    else:
+                        download_chain_url = None
+
+                    if (state := row.get("state")) == 0:
+                        state = "Incomplete"
+                    else:
+                        state = "Complete"
+
+                    parsed_data = {
+                        "ts_start": ts_start,
+                        "ts_end": ts_end,
+                        "file_name": self.fe.extract_filename(download_path),
+                        "file_extension": self.fe.extract_file_extention(download_path),
+                        "received_bytes": row.get("total_bytes"),
+                        "download_path": download_path,
+                        "download_url": row.get("tab_url"),
+                        "download_chain_url": download_chain_url,
+                        "reference_url": row.referrer,
+                        "record_id": row.get("id"),
+                        "mime_type": row.get("mime_type"),
+                        "state": state,
+                        "browser_type": self.browser_type,
+                        "source": str(db_file),
+                        "evidence_id": self.evidence_id,
+                    }
+
+                    try:
+                        yield self.build_record(ChromiumDownloadRecord, parsed_data)
+                    except ValidationError as e:
+                        self.log_error(e)
+                        continue
+            except SQLError as e:
+                logger.error(f"Error processing history file: {db_file} / exc_info={e}")
+                return
             except:
-                logger.exception(f"Unable to open history file: {db_file}")
-                continue
+                logger.error(f"Error processing history file: {db_file}")
+                return
+        except:
+            logger.exception(f"Unable to open history file: {db_file}")
+            return
 
-    def autofill(self) -> Generator[dict, None, None]:
-        for db_file in self.check_empty_entry(self.iter_entry(node_name="Web Data")):
+    def keyword_search_terms(self) -> Generator[dict, None, None]:
+        for db_file in self.check_empty_entry(self.iter_entry(node_name="History")):
+            yield from self.read_cached(db_file, self.read_keyword_search_terms)
+
+    def read_keyword_search_terms(
+        self, db_file: TargetPath
+    ) -> Generator[dict, None, None]:
+        try:
+            db = SQLite3(db_file.open("rb"))
             try:
-                db = SQLite3(db_file.open("rb"))
-                try:
-                    for row in db.table("autofill").rows():
-                        autofill = {}
-                        autofill.update(row._values)
+                urls = {row.id: row for row in db.table("urls").rows()}
 
-                        name = autofill.get("name")
-                        value = autofill.get("value")
-                        date_created = self.ts.from_unix(autofill.get("date_created"))
-                        date_last_used = autofill.get("date_last_used")
-                        count = autofill.get("count")
+                for row in db.table("keyword_search_terms").rows():
+                    keyword_search_terms = {}
+                    url_row = urls.get(row.url_id)
+                    keyword_search_terms.update(row._values)
+                    keyword_search_terms.update(url_row._values)
 
-                        if not date_created:
-                            date_created = self.ts.base_datetime_browser
+                    last_visit_time = self.ts.webkittimestamp(
+                        keyword_search_terms.get("last_visit_time")
+                    )
+                    term = keyword_search_terms.get("term")
+                    title = keyword_search_terms.get("title")
+                    url = keyword_search_terms.get("url")
+                    id = keyword_search_terms.get("id")
+                    visit_count = keyword_search_terms.get("visit_count")
+                    hidden = keyword_search_terms.get("hidden")
+
+                    if not last_visit_time:
+                        last_visit_time = self.ts.base_datetime_browser
+
+                    engines = {
+                        "Google": "://www.google.com",
+                        "Amazon": "://www.amazon.com",
+                        "Yahoo": "://search.yahoo.com",
+                        "Bing": "://www.bing.com",
+                        "Naver": "://search.naver.com",
+                        "Naver Map": "//map.naver.com",
+                        "Daum": "://search.daum.net",
+                        "Youtube": "://www.youtube.com",
+                        "Github": "://github.com",
+                    }
+
+                    search_engine = "Unknown"
+                    for engine_name, site_url in engines.items():
+                        if site_url in url:
+                            search_engine = engine_name
+
+                    parsed_data = {
+                        "ts": last_visit_time,
+                        "term": term,
+                        "title": title,
+                        "search_engine": search_engine,
+                        "url": url,
+                        "record_id": id,
+                        "visit_count": visit_count,
+                        "hidden": hidden,
+                        "browser_type": self.browser_type,
+                        "source": str(db_file),
+                        "evidence_id": self.evidence_id,
+                    }
+
+                    try:
+                        yield self.build_record(
+                            ChromiumKeywordSearchTermsRecord, parsed_data
+                        )
+                    except ValidationError as e:
+                        self.log_error(e)
+                        continue
+            except SQLError as e:
+                logger.error(f"Error processing history file: {db_file} / exc_info={e}")
+                return
+            except:
+                logger.error(f"Error processing history file: {db_file}")
+                return
+        except:
+            logger.exception(f"Unable to open history file: {db_file}")
+            return
 
-                        parsed_data = {
-                            "ts_created": date_created,
-                            "value": value,
-                            "count": count,
-                            "name": name,
-                            "ts_last_used": self.ts.from_unix(date_last_used),
-                            "browser_type": self.browser_type,
-                            "source": str(db_file),
-                            "evidence_id": self.evidence_id,
-                        }
+    def autofill(self) -> Generator[dict, None, None]:
+        for db_file in self.check_empty_entry(self.iter_entry(node_name="Web Data")):
+            yield from self.read_cached(db_file, self.read_autofill)
 
-                        try:
-                            yield ChromiumAutofillRecord(**parsed_data)
-                        except ValidationError as e:
-                            self.log_error(e)
-                            continue
-                except SQLError as e:
-                    logger.error(
-                        f"Error processing history file: {db_file} / exc_info={e}"
-                    )
-                    continue
-                except:
-                    logger.error(f"Error processing history file: {db_file}")
-                    continue
+    def read_autofill(self, db_file: TargetPath) -> Generator[dict, None, None]:
+        try:
+            db = SQLite3(db_file.open("rb"))
+            try:
+                for row in db.table("autofill").rows():
+                    autofill = {}
+                    autofill.update(row._values)
+
+                    name = autofill.get("name")
+                    value = autofill.get("value")
+                    date_created = self.ts.from_unix(autofill.get("date_created"))
+                    date_last_used = autofill.get("date_last_used")
+                    count = autofill.get("count")
+
+                    if not date_created:
+                        date_created = self.ts.base_datetime_browser
+
+                    parsed_data = {
+                        "ts_created": date_created,
+                        "value": value,
+                        "count": count,
+                        "name": name,
+                        "ts_last_used": self.ts.from_unix(date_last_used),
+                        "browser_type": self.browser_type,
+                        "source": str(db_file),
+                        "evidence_id": self.evidence_id,
+                    }
+
+                    try:
+                        yield self.build_record(ChromiumAutofillRecord, parsed_data)
+                    except ValidationError as e:
+                        self.log_error(e)
+                        continue
+            except SQLError as e:
+                logger.error(f"Error processing history file: {db_file} / exc_info={e}")
+                return
             except:
-                logger.exception(f"Unable to open history file: {db_file}")
-                continue
+                logger.error(f"Error processing history file: {db_file}")
+                return
+        except:
+            logger.exception(f"Unable to open history file: {db_file}")
+            return
 
     def login_data(self) -> Generator[dict, None, None]:
         for db_file in self.check_empty_entry(self.iter_entry(node_name="Login Data")):
-            try:
-                db = SQLite3(db_file.open("rb"))
-                try:
-                    for row in db.table("logins").rows():
-                        logins = {}
-                        logins.update(row._values)
-
-                        origin_url = logins.get("origin_url")
-                        action_url = logins.get("action_url")
-                        username_element = logins.get("username_element")
-                        username_value = logins.get("username_value")
-                        password_element = logins.get("password_element")
-                        password_value = logins.get("password_value")
-                        signon_realm = logins.get("signon_realm")
-                        date_created = self.ts.from_unix(logins.get("date_created"))
-                        date_last_used = logins.get("date_last_used")
-                        date_password_modified = logins.get("date_password_modified")
-
-                        if not date_created:
-                            date_created = self.ts.base_datetime_browser
+            yield from self.read_cached(db_file, self.read_login_data)
 
-                        parsed_data = {
-                            "ts_created": date_created,
-                            "username_element": username_element,
-                            "username_value": username_value,
-                            "password_element": password_element,
-                            "password_value": password_value,
-                            "origin_url": origin_url,
-                            "action_url": action_url,
-                            "signon_realm": signon_realm,
-                            "ts_last_used": self.ts.from_unix(date_last_used),
-                            "ts_password_modified": self.ts.from_unix(
-                                date_password_modified
-                            ),
-                            "browser_type": self.browser_type,
-                            "source": str(db_file),
-                            "evidence_id": self.evidence_id,
-                        }
-
-                        try:
-                            yield ChromiumLoginDataRecord(**parsed_data)
-                        except ValidationError as e:
-                            self.log_error(e)
-                            continue
-                except SQLError as e:
-                    logger.error(
-                        f"Error processing history file: {db_file} / exc_info={e}"
-                    )
-                    continue
-                except:
-                    logger.error(f"Error processing history file: {db_file}")
-                    continue
+    def read_login_data(self, db_file: TargetPath) -> Generator[dict, None, None]:
+        try:
+            db = SQLite3(db_file.open("rb"))
+            try:
+                for row in db.table("logins").rows():
+                    logins = {}
+                    logins.update(row._values)
+
+                    origin_url = logins.get("origin_url")
+                    action_url = logins.get("action_url")
+                    username_element = logins.get("username_element")
+                    username_value = logins.get("username_value")
+                    password_element = logins.get("password_element")
+                    password_value = logins.get("password_value")
+                    signon_realm = logins.get("signon_realm")
+                    date_created = self.ts.from_unix(logins.get("date_created"))
+                    date_last_used = logins.get("date_last_used")
+                    date_password_modified = logins.get("date_password_modified")
+
+                    if not date_created:
+                        date_created = self.ts.base_datetime_browser
+
+                    parsed_data = {
+                        "ts_created": date_created,
+                        "username_element": username_element,
+                        "username_value": username_value,
+                        "password_element": password_element,
+                        "password_value": password_value,
+                        "origin_url": origin_url,
+                        "action_url": action_url,
+                        "signon_realm": signon_realm,
+                        "ts_last_used": self.ts.from_unix(date_last_used),
+                        "ts_password_modified": self.ts.from_unix(
+                            date_password_modified
+                        ),
+                        "browser_type": self.browser_type,
+                        "source": str(db_file),
+                        "evidence_id": self.evidence_id,
+                    }
+
+                    try:
+                        yield self.build_record(ChromiumLoginDataRecord, parsed_data)
+                    except ValidationError as e:
+                        self.log_error(e)
+                        continue
+            except SQLError as e:
+                logger.error(f"Error processing history file: {db_file} / exc_info={e}")
+                return
             except:
-                logger.exception(f"Unable to open history file: {db_file}")
-                continue
+                logger.error(f"Error processing history file: {db_file}")
+                return
+        except:
+            logger.exception(f"Unable to open history file: {db_file}")
+            return
 
     def bookmarks(self) -> Generator[dict, None, None]:
         for db_file in self.check_empty_entry(self.iter_entry(node_name="Bookmarks")):
@@ -475,7 +487,9 @@ class ChromiumBrowser(ForensicArtifact):
                             }
 
                             try:
-                                yield ChromiumBookmarksRecord(**parsed_data)
+                                yield self.build_record(
+                                    ChromiumBookmarksRecord, parsed_data
+                                )
                             except ValidationError as e:
                                 self.log_error(e)
                                 continue
@@ -30,6 +30,7 @@ class IExplorerHistoryRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.APP_IEXPLORE_HISTORY.value
+        sort_key: str = "ts"
 
 
 @dataclass(kw_only=True)
@@ -83,19 +84,9 @@ class InternetExplorer(ForensicArtifact):
 
     def parse(self, descending: bool = False) -> None:
         try:
-            history = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.history())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
+            self.collect(self.history(), key="ts", descending=descending)
         except Exception as e:
             self.log_error(e)
-            history = []
-        finally:
-            self.records.append(history)
 
         # sorted_downloads = sorted(
         #     [record._packdict() for record in self.downloads()],
@@ -144,7 +135,7 @@ class InternetExplorer(ForensicArtifact):
                         }
 
                     try:
-                        yield IExplorerHistoryRecord(**parsed_data)
+                        yield self.build_record(IExplorerHistoryRecord, parsed_data)
                     except ValidationError as e:
                         logger.error(e)
                         return
@@ -0,0 +1,185 @@
+import logging
+import struct
+from array import array
+from operator import itemgetter
+from typing import Generator, Optional, Union
+
+from dissect.ntfs.attr import FileName
+from dissect.ntfs.c_ntfs import (
+    DEFAULT_RECORD_SIZE,
+    FILE_FILE_NAME_INDEX_PRESENT,
+    FILE_NAME_DOS,
+    FILE_NUMBER_MFT,
+    FILE_NUMBER_ROOT,
+)
+from dissect.ntfs.mft import Mft, MftRecord
+from dissect.ntfs.util import get_full_path, segment_reference
+
+from settings.config import MFT_READ_SIZE
+
+logger = logging.getLogger(__name__)
+
+# SequenceNumber, Flags and BaseFileRecordSegment of a FILE_RECORD_SEGMENT_HEADER,
+# none of them covered by the update sequence array
+RECORD_HEADER = struct.Struct("<16xH4xH8xQ")
+RECORD_SIGNATURE = b"FILE"
+
+
+class DirectoryPaths:
+    """Full paths of the directories of an NTFS volume, indexed by segment number.
+
+    One pass over the $MFT stream finds the directory records from the flags of
+    their headers, only those records are parsed. Their paths are resolved once,
+    parents first, into a list indexed by segment number next to an array of
+    their sequence numbers.
+
+    A $FILE_NAME path is then the path of its parent directory and its name,
+    rendered like `FileName.full_path` without walking the parent chain. Parents
+    that aren't resolved directories (orphans of deleted or unreadable records,
+    recursions) are left to `get_full_path`, which renders their markers.
+    """
+
+    def __init__(self, mft: Mft):
+        self.mft = mft
+        self.paths: list[Optional[str]] = []
+        self.sequences = array("H")
+        self.directories = 0
+        # paths rendered by walking the parent chain
+        self.walks = 0
+        self.build()
+
+    def build(self) -> None:
+        # the $MFT record is as large as any other record
+        mft_record = self.mft.get(FILE_NUMBER_MFT)
+        record_size = mft_record.header.BytesAllocated or DEFAULT_RECORD_SIZE
+        count = mft_record.size() // record_size
+        self.paths = [None] * count
+        self.sequences = array("H", bytes(2 * count))
+
+        # segment -> (name, parent reference) of the directories not resolved yet
+        parents = {}
+        for segment in self.directory_segments(record_size, count):
+            try:
+                record = self.mft.get(segment)
+                if not (name := record.filename):
+                    continue
+                parents[segment] = (
+                    name,
+                    record.attributes.FILE_NAME.attr.ParentDirectory,
+                )
+            except Exception:
+                continue
+            self.sequences[segment] = record.header.SequenceNumber
+
+        self.directories = len(parents)
+        for segment in list(parents):
+            if segment in parents:
+                self.resolve(segment, parents)
+
+    def directory_segments(
+        self, record_size: int, count: int
+    ) -> Generator[int, None, None]:
+        """Yield the segment numbers of the base records of directories, read from
+        the headers of the records of the $MFT stream."""
+        fh = self.mft.fh
+        read_size = max(MFT_READ_SIZE // record_size, 1) * record_size
+        segment = 0
+        while segment < count:
+            # the records yielded are read from the same stream in between
+            fh.seek(segment * record_size)
+            buf = fh.read(min(read_size, (count - segment) * record_size))
+            if not buf:
+                break
+
+            for offset in range(0, len(buf) - record_size + 1, record_size):
+                if buf[offset : offset + 4] == RECORD_SIGNATURE:
+                    _, flags, base = RECORD_HEADER.unpack_from(buf, offset)
+                    if flags & FILE_FILE_NAME_INDEX_PRESENT and not base:
+                        yield segment
+                segment += 1
+
+    def resolve(self, segment: int, parents: dict) -> None:
+        """Resolve the path of a directory and of its unresolved ancestors."""
+        chain = [segment]
+        seen = {segment}
+        while True:
+            parent = segment_reference(parents[segment][1])
+            if (
+                parent == FILE_NUMBER_ROOT
+                or parent not in parents
+                or self.paths[parent] is not None
+            ):
+                break
+            if parent in seen:
+                # a recursion: its directories are left to get_full_path
+                index = chain.index(parent)
+                for directory in chain[index:]:
+                    del parents[directory]
+                chain = chain[:index]
+                break
+            chain.append(parent)
+            seen.add(parent)
+            segment = parent
+
+        for directory in reversed(chain):
+            path = self.file_path(*parents.pop(directory))
+            # paths walked into a recursion depend on where the walk starts
+            if not path.startswith("<recursion>"):
+                self.paths[directory] = path
+
+    def file_path(self, name: str, parent) -> str:
+        """Return the full path of a file name in the directory `parent`, a segment
+        reference, like `get_full_path`."""
+        segment = segment_reference(parent)
+        if segment == FILE_NUMBER_ROOT:
+            return name
+
+        if segment < len(self.paths) and (path := self.paths[segment]) is not None:
+            if self.sequences[segment] != parent.SequenceNumber:
+                return (
+                    f"<broken_reference_0x{segment:x}#{parent.SequenceNumber}>\\{name}"
+                )
+            return f"{path}\\{name}"
+
+        self.walks += 1
+        return get_full_path(self.mft, name, parent)
+
+    def full_path(self, attr: FileName) -> str:
+        """Return the full path of a $FILE_NAME attribute, see `FileName.full_path`."""
+        return self.file_path(attr.file_name, attr.attr.ParentDirectory)
+
+    def full_paths(self, record: MftRecord, ignore_dos: bool = False) -> list[str]:
+        """Return the full paths of a record, see `MftRecord.full_paths`."""
+        paths = []
+        for attr in record.attributes.FILE_NAME:
+            if ignore_dos and attr.flags == FILE_NAME_DOS:
+                continue
+            paths.append((attr.flags, self.full_path(attr)))
+        return [path for _, path in sorted(paths, key=itemgetter(0))]
+
+
+class RecordPaths:
+    """Full paths rendered by walking the parent chain of every $FILE_NAME, the
+    fallback of `DirectoryPaths`."""
+
+    directories = 0
+    walks = 0
+
+    def full_path(self, attr: FileName) -> str:
+        return attr.full_path()
+
+    def full_paths(self, record: MftRecord, ignore_dos: bool = False) -> list[str]:
+        return record.full_paths(ignore_dos)
+
+
+def directory_paths(mft: Mft) -> Union[DirectoryPaths, RecordPaths]:
+    """Return the directory paths of an MFT, or `RecordPaths` if they can't be
+    resolved."""
+    try:
+        return DirectoryPaths(mft)
+    except Exception as e:
+        logger.warning(
+            f"Unable to resolve the directory paths of the $MFT, "
+            f"walking parent chains instead: {e}"
+        )
+        return RecordPaths()
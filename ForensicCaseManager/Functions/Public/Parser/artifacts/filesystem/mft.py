@@ -1,17 +1,15 @@
-import json
-from typing import Optional, Generator, Union, Iterator
+import logging
+from typing import Optional, Generator, Union
+from datetime import datetime
 
+from pydantic import ValidationError
 from dissect.target.filesystems.ntfs import NtfsFilesystem
-from dissect.target import Target
-from pathlib import Path
-from dissect.target.helpers.fsutil import TargetPath
 from flow.record.fieldtypes import uri
 
+from dissect.ntfs.attr import FileName, StandardInformation
 from dissect.ntfs.c_ntfs import FILE_RECORD_SEGMENT_IN_USE
 from dissect.ntfs.mft import Mft, MftRecord
 
-from dissect.target.helpers.record import TargetRecordDescriptor
-from dissect.target.plugin import Plugin
 from dissect.target.plugins.filesystem.ntfs.utils import (
     get_drive_letter,
     get_owner_and_group,
@@ -19,54 +17,62 @@ from dissect.target.plugins.filesystem.ntfs.utils import (
     get_volume_identifier,
 )
 
-from core.forensic_artifact import ForensicArtifact
-
-
-FilesystemStdRecord = TargetRecordDescriptor(
-    "filesystem/ntfs/mft/std",
-    [
-        ("datetime", "creation_time"),
-        ("datetime", "last_modification_time"),
-        ("datetime", "last_change_time"),
-        ("datetime", "last_access_time"),
-        ("uint32", "segment"),
-        ("uri", "path"),
-        ("string", "owner"),
-        ("filesize", "filesize"),
-        ("boolean", "resident"),
-        ("boolean", "inuse"),
-        ("string", "volume_uuid"),
-    ],
+from artifacts.filesystem.directory_paths import (
+    DirectoryPaths,
+    RecordPaths,
+    directory_paths,
 )
+from core.forensic_artifact import Source, ArtifactRecord, ArtifactRow, ForensicArtifact
+from settings.tables import Tables
+from settings.artifact_schema import ArtifactSchema
+from settings.config import MFT_INGEST_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# info_type of the rows of fs_mft
+STANDARD_INFORMATION = "STANDARD_INFORMATION"
+FILE_NAME = "FILE_NAME"
+ALTERNATE_DATA_STREAM = "ADS"
+
+
+class MftAttributeRecord(ArtifactRecord):
+    """MFT record: the timestamps of a $STANDARD_INFORMATION or $FILE_NAME
+    attribute of a file, or of one of its alternate data streams."""
+
+    creation_time: Optional[datetime]
+    last_modification_time: Optional[datetime]
+    last_change_time: Optional[datetime]
+    last_access_time: Optional[datetime]
+    info_type: str
+    filename_index: Optional[int]
+    segment: int
+    path: Optional[str]
+    owner: Optional[str]
+    filesize: Optional[int]
+    resident: Optional[bool]
+    inuse: bool
+    volume_uuid: Optional[str]
+
+    class Config:
+        table_name: str = Tables.FS_MFT.value
+        sort_key: str = "creation_time"
 
 
-FilesystemFilenameRecord = TargetRecordDescriptor(
-    "filesystem/ntfs/mft/filename",
-    [
-        ("datetime", "creation_time"),
-        ("datetime", "last_modification_time"),
-        ("datetime", "last_change_time"),
-        ("datetime", "last_access_time"),
-        ("uint32", "filename_index"),
-        ("uint32", "segment"),
-        ("uri", "path"),
-        ("string", "owner"),
-        ("filesize", "filesize"),
-        ("boolean", "resident"),
-        ("boolean", "inuse"),
-        ("boolean", "ads"),
-        ("string", "volume_uuid"),
-    ],
-)
+class MFT(ForensicArtifact):
+    """The MFT records of all NTFS filesystems, in the fs_mft table.
 
+    $STANDARD_INFORMATION, $FILE_NAME and alternate data stream rows are produced
+    segment by segment and exported in large batches, without being sorted in
+    memory (see fs_mft_view). $FILE_NAME paths are rendered from the directory
+    paths of the volume, resolved once before its records are read.
+    """
 
-class MFT(ForensicArtifact):
-    def __init__(self, _path: str, _container: str, artifact_name: str, entry: str):
-        super().__init__(
-            _path=_path, _container=_container, artifact_name=artifact_name, entry=entry
-        )
+    min_batch_size = MFT_INGEST_BATCH_SIZE
+
+    def __init__(self, src: Source, schema: ArtifactSchema):
+        super().__init__(src=src, schema=schema)
 
-    def parse(self):
+    def parse(self, descending: bool = False) -> None:
         """Return the MFT records of all NTFS filesystems.
 
         The Master File Table (MFT) contains primarily metadata about every file and folder on a NFTS filesystem.
@@ -74,68 +80,45 @@ class MFT(ForensicArtifact):
         Sources:
             - https://docs.microsoft.com/en-us/windows/win32/fileio/master-file-table
         """
-        parse_result = []
-        for fs in self._iter_filesystem():
-            if entry := fs.ntfs.mft:
-                for record in self.read_records(entry=entry, fs=fs):
-                    print(
-                        json.dumps(
-                            record._packdict(),
-                            indent=2,
-                            default=str,
-                            ensure_ascii=False,
-                        )
-                    )
-                    # parse_result.append(json.dumps(record._packdict(), indent=2, default=str, ensure_ascii=False))
-        return parse_result
+        self.records.append(self.mft())
+
+    def mft(self) -> Generator[ArtifactRow, None, None]:
+        for fs in self.check_empty_entry(self.iter_filesystem()):
+            try:
+                if entry := fs.ntfs.mft:
+                    yield from self.read_records(entry=entry, fs=fs)
+            except Exception as e:
+                self.log_error(e)
 
     def mft_records(
         self,
         drive_letter: str,
+        paths: Union[DirectoryPaths, RecordPaths],
         record: MftRecord,
         segment: int,
         path: str,
-        owner: str,
-        size: int,
-        resident: bool,
+        owner: Optional[str],
+        size: Optional[int],
+        resident: Optional[bool],
         inuse: bool,
-        volume_uuid: str,
-    ):
+        volume_uuid: Optional[str],
+    ) -> Generator[dict, None, None]:
+        common = {
+            "segment": segment,
+            "owner": owner,
+            "filesize": size,
+            "resident": resident,
+            "inuse": inuse,
+            "volume_uuid": volume_uuid,
+            "evidence_id": self.evidence_id,
+        }
+
         for attr in record.attributes.STANDARD_INFORMATION:
-            yield FilesystemStdRecord(
-                creation_time=attr.creation_time,
-                last_modification_time=attr.last_modification_time,
-                last_change_time=attr.last_change_time,
-                last_access_time=attr.last_access_time,
-                segment=segment,
-                path=uri.from_windows(path),
-                owner=owner,
-                filesize=size,
-                resident=resident,
-                inuse=inuse,
-                volume_uuid=volume_uuid,
-                _target=self.target,
-            )
+            yield mft_data(attr, STANDARD_INFORMATION, None, path, common)
 
         for idx, attr in enumerate(record.attributes.FILE_NAME):
-            filepath = f"{drive_letter}{attr.full_path()}"
-
-            yield FilesystemFilenameRecord(
-                creation_time=attr.creation_time,
-                last_modification_time=attr.last_modification_time,
-                last_change_time=attr.last_change_time,
-                last_access_time=attr.last_access_time,
-                filename_index=idx,
-                segment=segment,
-                path=uri.from_windows(filepath),
-                owner=owner,
-                filesize=size,
-                resident=resident,
-                ads=False,
-                inuse=inuse,
-                volume_uuid=volume_uuid,
-                _target=self.target,
-            )
+            filepath = f"{drive_letter}{paths.full_path(attr)}"
+            yield mft_data(attr, FILE_NAME, idx, filepath, common)
 
         ads_attributes = (
             data_attr for data_attr in record.attributes.DATA if data_attr.name != ""
@@ -143,33 +126,27 @@ class MFT(ForensicArtifact):
         ads_info = record.attributes.FILE_NAME[0]
 
         for data_attr in ads_attributes:
-            resident = data_attr.resident
-            size = get_record_size(record, data_attr.name)
             ads_path = f"{path}:{data_attr.name}"
-
-            yield FilesystemFilenameRecord(
-                creation_time=ads_info.creation_time,
-                last_modification_time=ads_info.last_modification_time,
-                last_change_time=ads_info.last_change_time,
-                last_access_time=ads_info.last_access_time,
-                filename_index=None,
-                segment=segment,
-                path=uri.from_windows(ads_path),
-                owner=owner,
-                filesize=size,
-                resident=resident,
-                inuse=inuse,
-                ads=True,
-                volume_uuid=volume_uuid,
-                _target=self.target,
+            yield mft_data(
+                ads_info,
+                ALTERNATE_DATA_STREAM,
+                None,
+                ads_path,
+                {
+                    **common,
+                    "filesize": get_record_size(record, data_attr.name),
+                    "resident": data_attr.resident,
+                },
             )
 
     def read_records(
-        self, entry: Path, fs: Optional[NtfsFilesystem] = None
-    ) -> Iterator[Iterator]:
-        drive_letter = get_drive_letter(self.source, fs)
+        self, entry: Mft, fs: Optional[NtfsFilesystem] = None
+    ) -> Generator[ArtifactRow, None, None]:
+        drive_letter = get_drive_letter(self.src.source, fs)
         volume_uuid = get_volume_identifier(fs)
+        paths = directory_paths(entry)
 
+        count = 0
         for record in entry.segments():
             try:
                 segment = record.segment
@@ -186,10 +163,11 @@ class MFT(ForensicArtifact):
 
                     size = get_record_size(record)
 
-                for path in record.full_paths():
+                for path in paths.full_paths(record):
                     path = f"{drive_letter}{path}"
-                    yield from self.mft_records(
+                    for parsed_data in self.mft_records(
                         drive_letter=drive_letter,
+                        paths=paths,
                         record=record,
                         segment=segment,
                         path=path,
@@ -198,6 +176,55 @@ class MFT(ForensicArtifact):
                         resident=resident,
                         inuse=inuse,
                         volume_uuid=volume_uuid,
-                    )
-            except:
-                pass
+                    ):
+                        if not self.in_time_window(parsed_data):
+                            continue
+                        try:
+                            yield self.build_record(MftAttributeRecord, parsed_data)
+                            count += 1
+                        except ValidationError as e:
+                            self.log_error(e)
+            except Exception as e:
+                self.log_error(e)
+                continue
+
+        logger.info(
+            f"{self.evidence_id}:{self.name} - {drive_letter}$MFT: {count} records, "
+            f"{paths.directories} directories, {paths.walks} paths walked"
+        )
+
+    def in_time_window(self, parsed_data: dict) -> bool:
+        """Tell whether one of the timestamps of a row is within the time window."""
+        if not self.time_window:
+            return True
+        return any(
+            self.time_window.contains(parsed_data[key]) for key in TIMESTAMP_FIELDS
+        )
+
+
+TIMESTAMP_FIELDS = (
+    "creation_time",
+    "last_modification_time",
+    "last_change_time",
+    "last_access_time",
+)
+
+
+def mft_data(
+    attr: Union[FileName, StandardInformation],
+    info_type: str,
+    filename_index: Optional[int],
+    path: str,
+    common: dict,
+) -> dict:
+    """Return the fields of an MFT row from the timestamps of an attribute."""
+    return {
+        "creation_time": attr.creation_time,
+        "last_modification_time": attr.last_modification_time,
+        "last_change_time": attr.last_change_time,
+        "last_access_time": attr.last_access_time,
+        "info_type": info_type,
+        "filename_index": filename_index,
+        "path": uri.from_windows(path),
+        **common,
+    }
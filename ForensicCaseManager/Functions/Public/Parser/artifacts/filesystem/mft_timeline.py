@@ -15,6 +15,8 @@ from dissect.target.plugins.filesystem.ntfs.utils import (
     get_volume_identifier,
 )
 
+from artifacts.filesystem.directory_paths import directory_paths
+
 
 class InformationType(Enum):
     STANDARD_INFORMATION = auto()
@@ -121,10 +123,11 @@ class MftTimelinePlugin(Plugin):
                 serial=fs.ntfs.serial,
                 volume_uuid=get_volume_identifier(fs),
             )
+            volume_paths = directory_paths(fs.ntfs.mft)
 
             for record in fs.ntfs.mft.segments():
                 segment = record.segment
-                paths = record.full_paths(ignore_dos)
+                paths = volume_paths.full_paths(record, ignore_dos)
 
                 _update_extras(extras, record, fs)
 
@@ -141,7 +144,7 @@ class MftTimelinePlugin(Plugin):
                         )
 
                     for idx, attr in enumerate(record.attributes.FILE_NAME):
-                        filepath = f"{drive_letter}{attr.full_path()}"
+                        filepath = f"{drive_letter}{volume_paths.full_path(attr)}"
 
                         yield from format_info(
                             segment,
@@ -1,20 +1,56 @@
+import io
 import logging
-from typing import Optional, Generator
+import struct
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, ClassVar, Optional, Generator
 from datetime import datetime
 from pathlib import Path
+from functools import lru_cache
+from dataclasses import dataclass
 
 from pydantic import ValidationError
 from dissect.target.filesystems.ntfs import NtfsFilesystem
-from dissect.ntfs.c_ntfs import segment_reference
+from dissect.ntfs.c_ntfs import USN_PAGE_SIZE, c_ntfs, segment_reference
+from dissect.ntfs.exceptions import Error as NtfsError
+from dissect.ntfs.ntfs import NTFS
+from dissect.ntfs.usnjrnl import UsnJrnl as Journal, UsnRecord
+from dissect.util.stream import RunlistStream
 from flow.record.fieldtypes import uri
 from dissect.target.plugins.filesystem.ntfs.utils import get_drive_letter
 
-from core.forensic_artifact import Source, ArtifactRecord, ForensicArtifact
+from core.forensic_artifact import (
+    Source,
+    ArtifactRecord,
+    ArtifactRow,
+    ForensicArtifact,
+    open_target,
+)
+from core.table_schema import render_epoch_us, render_flags
+from core.time_window import TimeWindow
 from settings.tables import Tables
 from settings.artifact_schema import ArtifactSchema
+from settings.config import (
+    USNJRNL_READ_SIZE,
+    USNJRNL_PATH_CACHE_SIZE,
+    USNJRNL_SEGMENT_SIZE,
+    USNJRNL_SEGMENTS_PER_WORKER,
+)
 
 logger = logging.getLogger(__name__)
 
+# RecordLength and MajorVersion of a USN_RECORD_COMMON_HEADER
+USN_RECORD_HEADER = struct.Struct("<IH")
+
+# Lookup tables of the flag names of the compact UsnJrnl table
+USN_REASON_FLAGS = "usn_reason_flags"
+USN_SOURCE_FLAGS = "usn_source_flags"
+FILE_ATTRIBUTE_FLAGS = "file_attribute_flags"
+
+
+def flag_names(flags) -> dict[int, str]:
+    return {int(member.value): name for name, member in flags.__members__.items()}
+
 
 class UsnJrnlRecord(ArtifactRecord):
     """UsnJrnl record."""
@@ -32,11 +68,89 @@ class UsnJrnlRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.FS_USNJRNL.value
+        sort_key: str = "ts"
+
+
+class UsnJrnlPathRecord(ArtifactRecord):
+    """Path of a parent directory of the records of the compact UsnJrnl table."""
+
+    volume: int
+    reference: int
+    path: Optional[str]
+
+    class Config:
+        table_name: str = Tables.FS_USNJRNL_PATHS.value
+        sort_key: str = "reference"
+
+
+COMPACT = Tables.FS_USNJRNL_COMPACT.value
+PATHS = Tables.FS_USNJRNL_PATHS.value
+
+
+class UsnJrnlCompactRecord(ArtifactRecord):
+    """UsnJrnl record with raw integer flags and file references.
+
+    The view renders it like a UsnJrnl record: flag names come from lookup tables
+    and paths from the parent directories in fs_usnjrnl_paths.
+    """
+
+    ts: Optional[datetime]
+    volume: int
+    file_reference: int
+    parent_reference: int
+    name: Optional[str]
+    usn: Optional[int]
+    reason: Optional[int]
+    attr: Optional[int]
+    source: Optional[int]
+    security_id: Optional[int]
+    major: Optional[int]
+    minor: Optional[int]
+
+    class Config:
+        table_name: str = COMPACT
+        sort_key: str = "ts"
+        lookup_tables: dict = {
+            USN_REASON_FLAGS: flag_names(c_ntfs.USN_REASON),
+            USN_SOURCE_FLAGS: flag_names(c_ntfs.USN_SOURCE),
+            FILE_ATTRIBUTE_FLAGS: flag_names(c_ntfs.FILE_ATTRIBUTE),
+        }
+        view_columns: dict = {
+            "evidence_id": f"{COMPACT}.evidence_id",
+            "ts": render_epoch_us(f"{COMPACT}.ts"),
+            "segment": (
+                f"({COMPACT}.file_reference & 0xFFFFFFFFFFFF)"
+                f" || '#' || (({COMPACT}.file_reference >> 48) & 0xFFFF)"
+            ),
+            "path": f"{PATHS}.path || '/' || {COMPACT}.name",
+            "usn": f"{COMPACT}.usn",
+            "reason": render_flags(f"{COMPACT}.reason", USN_REASON_FLAGS),
+            "attr": render_flags(f"{COMPACT}.attr", FILE_ATTRIBUTE_FLAGS),
+            "source": render_flags(f"{COMPACT}.source", USN_SOURCE_FLAGS),
+            "security_id": f"{COMPACT}.security_id",
+            "major": f"{COMPACT}.major",
+            "minor": f"{COMPACT}.minor",
+        }
+        view_joins: list = [
+            f"LEFT JOIN {PATHS} ON {PATHS}.evidence_id = {COMPACT}.evidence_id"
+            f" AND {PATHS}.volume = {COMPACT}.volume"
+            f" AND {PATHS}.reference = {COMPACT}.parent_reference"
+        ]
 
 
 class UsnJrnl(ForensicArtifact):
+    # keep raw integers in fs_usnjrnl_compact, see UsnJrnlCompact
+    compact: ClassVar[bool] = False
+
     def __init__(self, src: Source, schema: ArtifactSchema):
         super().__init__(src=src, schema=schema)
+        # (volume, drive letter, parent path resolver, parent references) of the
+        # journals read in compact mode
+        self.parent_references: list[tuple[int, str, Callable, set[int]]] = []
+
+    @property
+    def model(self) -> type[ArtifactRecord]:
+        return UsnJrnlCompactRecord if self.compact else UsnJrnlRecord
 
     def parse(self, descending: bool = False) -> Path:
         """Return the UsnJrnl entries of all NTFS filesystems.
@@ -50,65 +164,536 @@ class UsnJrnl(ForensicArtifact):
         """
 
         try:
-            usnjrnl = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for fs in self.check_empty_entry(self.iter_filesystem())
-                    if (entry := fs.ntfs.usnjrnl)
-                    for index, record in enumerate(
-                        self.read_records(entry=entry, fs=fs)
-                    )
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
+            self.collect(self.usnjrnl(), key="ts", descending=descending)
         except Exception as e:
             self.log_error(e)
-            usnjrnl = []
-        finally:
-            self.records.append(usnjrnl)
+
+    def usnjrnl(self) -> Generator[UsnJrnlRecord, None, None]:
+        workers = self.src.shared.get("usn_workers", 1)
+        for index, fs in enumerate(self.check_empty_entry(self.iter_filesystem())):
+            if entry := fs.ntfs.usnjrnl:
+                if workers > 1:
+                    yield from self.read_records_parallel(entry, fs, index, workers)
+                else:
+                    yield from self.read_records(entry=entry, fs=fs, index=index)
+
+    def journal_records(
+        self, journal: Journal, scan: "JournalScan"
+    ) -> Generator[UsnRecord, None, None]:
+        """Yield the records of a journal, within the time window if there is one.
+
+        Timestamps increase along the journal: reading starts at the page found by a
+        binary search for `since` and stops at the first record after `until`.
+        """
+        window = self.time_window
+        if not window:
+            yield from scan_journal(journal, 0, scan)
+            return
+
+        for record in scan_journal(journal, window_start(journal, window), scan):
+            if window.filetime_after(record.record.TimeStamp):
+                break
+            if not window.filetime_before(record.record.TimeStamp):
+                yield record
 
     def read_records(
-        self, entry: Path, fs: Optional[NtfsFilesystem] = None
+        self, entry: Path, fs: Optional[NtfsFilesystem] = None, index: int = 0
     ) -> Generator[dict, None, None]:
         drive_letter = get_drive_letter(self.src.source, fs)
 
-        for record in entry.records():
+        scan = JournalScan()
+        parent_path = parent_path_resolver(entry.ntfs)
+        parents = set()
+        for record in self.journal_records(entry, scan):
             try:
-                ts = None
+                if self.compact:
+                    parsed_data = compact_usn_data(record, index, self.evidence_id)
+                    parents.add(parsed_data["parent_reference"])
+                else:
+                    parsed_data = usn_data(
+                        record, drive_letter, parent_path, self.evidence_id
+                    )
+
                 try:
-                    ts = record.timestamp
-                except:
-                    logger.error(
-                        "Error occured during parsing of timestamp in usnjrnl: %x",
-                        record,
-                        record.Timestamp,
+                    yield self.build_record(self.model, parsed_data)
+                except ValidationError as e:
+                    self.log_error(e)
+                    continue
+            except Exception as e:
+                self.log_error(e)
+                continue
+
+        if self.compact:
+            self.parent_references.append((index, drive_letter, parent_path, parents))
+        paths = parent_path.cache_info()
+        self.log_scan(drive_letter, scan, paths.hits, paths.misses)
+
+    def read_records_parallel(
+        self, entry: Journal, fs: NtfsFilesystem, index: int, workers: int
+    ) -> Generator[dict, None, None]:
+        """Decode the live region of a journal in segments, in a process pool.
+
+        The region is split at USNJRNL_SEGMENT_SIZE boundaries of the stream. Records
+        never span pages, so every segment starts at a record or an empty page. Each
+        worker opens the evidence itself and keeps its own parent path cache.
+        Segments are consumed in the order of their offsets, that is in USN order.
+        """
+        drive_letter = get_drive_letter(self.src.source, fs)
+        window = self.time_window
+        ranges = live_ranges(entry, window_start(entry, window) if window else 0)
+
+        scan = JournalScan(skipped=unread_bytes(ranges))
+        hits = misses = 0
+        parents = set()
+        segments = deque(journal_segments(ranges, USNJRNL_SEGMENT_SIZE))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: deque[Future] = deque()
+            while segments or pending:
+                while segments and len(pending) < workers * USNJRNL_SEGMENTS_PER_WORKER:
+                    pending.append(
+                        executor.submit(
+                            decode_segment,
+                            self.src.source_path,
+                            index,
+                            segments.popleft(),
+                            drive_letter,
+                            window,
+                            self.evidence_id,
+                            self.compact,
+                        )
                     )
 
-                path = f"{drive_letter}{record.full_path}"
-                segment = segment_reference(record.record.FileReferenceNumber)
+                try:
+                    decoded = pending.popleft().result()
+                except Exception as e:
+                    self.log_error(e)
+                    continue
+
+                scan.parsed += decoded.parsed
+                hits += decoded.path_hits
+                misses += decoded.path_misses
+                parents |= decoded.parents
+                for parsed_data in decoded.records:
+                    try:
+                        yield self.build_record(self.model, parsed_data)
+                    except ValidationError as e:
+                        self.log_error(e)
 
+                if decoded.past_window:
+                    for future in pending:
+                        future.cancel()
+                    break
+
+        if self.compact:
+            self.parent_references.append(
+                (index, drive_letter, parent_path_resolver(entry.ntfs), parents)
+            )
+        self.log_scan(drive_letter, scan, hits, misses)
+
+    def parent_path_rows(self) -> Generator[ArtifactRow, None, None]:
+        """Yield the paths of the parent directories of the compact records read."""
+        for volume, drive_letter, parent_path, parents in self.parent_references:
+            for reference in parents:
+                segment, sequence = reference & 0xFFFFFFFFFFFF, reference >> 48 & 0xFFFF
                 parsed_data = {
-                    "ts": ts,
-                    "segment": f"{segment}#{record.record.FileReferenceNumber.SequenceNumber}",
-                    "path": uri.from_windows(path),
-                    "usn": record.record.Usn,
-                    "reason": str(record.record.Reason).replace("USN_REASON.", ""),
-                    "attr": str(record.record.FileAttributes).replace(
-                        "FILE_ATTRIBUTE.", ""
+                    "volume": volume,
+                    "reference": reference,
+                    "path": uri.from_windows(
+                        f"{drive_letter}{parent_path(segment, sequence)}"
                     ),
-                    "source": str(record.record.SourceInfo).replace("USN_SOURCE.", ""),
-                    "security_id": record.record.SecurityId,
-                    "major": record.record.MajorVersion,
-                    "minor": record.record.MinorVersion,
                     "evidence_id": self.evidence_id,
                 }
-
                 try:
-                    yield UsnJrnlRecord(**parsed_data)
+                    yield self.build_record(UsnJrnlPathRecord, parsed_data)
                 except ValidationError as e:
                     self.log_error(e)
-                    continue
-            except Exception as e:
-                self.log_error(e)
+            logger.info(
+                f"{self.evidence_id}:{self.name} - {drive_letter}$UsnJrnl:$J: "
+                f"{len(parents)} parent directories"
+            )
+        self.parent_references.clear()
+
+    def log_scan(
+        self, drive_letter: str, scan: "JournalScan", hits: int, misses: int
+    ) -> None:
+        lookups = hits + misses
+        logger.info(
+            f"{self.evidence_id}:{self.name} - {drive_letter}$UsnJrnl:$J: "
+            f"skipped {scan.skipped} bytes, parsed {scan.parsed} bytes, "
+            f"parent paths {hits} hits / {misses} misses "
+            f"({hits / lookups if lookups else 0:.1%} hit rate)"
+        )
+
+
+class UsnJrnlCompact(UsnJrnl):
+    """UsnJrnl entries in the compact fs_usnjrnl_compact table.
+
+    Flags and file references are kept as integers, which bitwise operators can
+    query, and the path of each parent directory is stored once in
+    fs_usnjrnl_paths. The fs_usnjrnl_compact_view view renders the records like
+    fs_usnjrnl. Meant for large journals, so it isn't parsed with its category.
+    """
+
+    optional = True
+    compact = True
+
+    def __init__(self, src: Source, schema: ArtifactSchema):
+        super().__init__(src=src, schema=schema)
+
+    def parse(self, descending: bool = False) -> None:
+        try:
+            self.collect(self.usnjrnl(), key="ts", descending=descending)
+            self.collect(self.parent_path_rows())
+        except Exception as e:
+            self.log_error(e)
+
+
+def usn_timestamp(record: UsnRecord) -> Optional[datetime]:
+    try:
+        return record.timestamp
+    except:
+        logger.error(
+            "Error occured during parsing of timestamp in usnjrnl: %x",
+            record,
+            record.Timestamp,
+        )
+        return None
+
+
+def file_reference(reference) -> int:
+    """Return an MFT segment reference as a signed 64-bit integer (SQLite INTEGER),
+    the sequence number in its 16 high bits."""
+    value = segment_reference(reference) | reference.SequenceNumber << 48
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def compact_usn_data(record: UsnRecord, volume: int, evidence_id: str) -> dict:
+    """Return the fields of a compact UsnJrnl row from a USN record."""
+    return {
+        "ts": usn_timestamp(record),
+        "volume": volume,
+        "file_reference": file_reference(record.record.FileReferenceNumber),
+        "parent_reference": file_reference(record.record.ParentFileReferenceNumber),
+        "name": record.filename,
+        "usn": int(record.record.Usn),
+        "reason": int(record.record.Reason),
+        "attr": int(record.record.FileAttributes),
+        "source": int(record.record.SourceInfo),
+        "security_id": int(record.record.SecurityId),
+        "major": int(record.record.MajorVersion),
+        "minor": int(record.record.MinorVersion),
+        "evidence_id": evidence_id,
+    }
+
+
+def usn_data(
+    record: UsnRecord,
+    drive_letter: str,
+    parent_path: Callable[[int, int], str],
+    evidence_id: str,
+) -> dict:
+    """Return the fields of a UsnJrnl row from a USN record.
+
+    cstruct integers can't be pickled: they are converted to plain ints.
+    """
+    ts = usn_timestamp(record)
+
+    parent = record.record.ParentFileReferenceNumber
+    path = (
+        f"{drive_letter}"
+        f"{parent_path(segment_reference(parent), parent.SequenceNumber)}"
+        f"\\{record.filename}"
+    )
+    segment = segment_reference(record.record.FileReferenceNumber)
+
+    return {
+        "ts": ts,
+        "segment": f"{segment}#{record.record.FileReferenceNumber.SequenceNumber}",
+        "path": uri.from_windows(path),
+        "usn": int(record.record.Usn),
+        "reason": str(record.record.Reason).replace("USN_REASON.", ""),
+        "attr": str(record.record.FileAttributes).replace("FILE_ATTRIBUTE.", ""),
+        "source": str(record.record.SourceInfo).replace("USN_SOURCE.", ""),
+        "security_id": int(record.record.SecurityId),
+        "major": int(record.record.MajorVersion),
+        "minor": int(record.record.MinorVersion),
+        "evidence_id": evidence_id,
+    }
+
+
+@dataclass(kw_only=True)
+class DecodedSegment:
+    """Rows of a segment of a journal, decoded in a worker process."""
+
+    records: list[dict]
+    parsed: int
+    path_hits: int
+    path_misses: int
+    # parent references of the records, in compact mode
+    parents: set[int]
+    # a record after the time window was found, the segments after it are not read
+    past_window: bool
+
+
+@lru_cache(maxsize=16)
+def volume_journal(evidence: str, index: int) -> tuple[Journal, Callable]:
+    """Return the journal of an NTFS filesystem of an evidence and its parent path
+    resolver, once per worker process."""
+    filesystems = [
+        fs for fs in open_target(evidence).filesystems if fs.__fstype__ == "ntfs"
+    ]
+    journal = filesystems[index].ntfs.usnjrnl
+    return journal, parent_path_resolver(journal.ntfs)
+
+
+def decode_segment(
+    evidence: str,
+    index: int,
+    ranges: list[tuple[int, int]],
+    drive_letter: str,
+    window: TimeWindow,
+    evidence_id: str,
+    compact: bool = False,
+) -> DecodedSegment:
+    """Decode the records of ranges of a journal (in a worker process)."""
+    journal, parent_path = volume_journal(evidence, index)
+    before = parent_path.cache_info()
+
+    scan = JournalScan()
+    records = []
+    parents = set()
+    past_window = False
+    for record in scan_ranges(journal, ranges, scan):
+        if window.filetime_after(record.record.TimeStamp):
+            past_window = True
+            break
+        if window.filetime_before(record.record.TimeStamp):
+            continue
+        try:
+            if compact:
+                records.append(compact_usn_data(record, index, evidence_id))
+                parents.add(records[-1]["parent_reference"])
+            else:
+                records.append(usn_data(record, drive_letter, parent_path, evidence_id))
+        except Exception as e:
+            logger.error(f"{evidence_id}:usnjrnl - {e}")
+
+    after = parent_path.cache_info()
+    return DecodedSegment(
+        records=records,
+        parsed=scan.parsed,
+        path_hits=after.hits - before.hits,
+        path_misses=after.misses - before.misses,
+        parents=parents,
+        past_window=past_window,
+    )
+
+
+def parent_path_resolver(ntfs: Optional[NTFS]) -> Callable[[int, int], str]:
+    """Return a function resolving the full path of a parent directory of a volume.
+
+    Paths are resolved through the MFT, as UsnRecord.full_path does, and kept in a
+    bounded LRU cache by (segment, sequence number): records of a journal share a
+    few thousand parent directories. The cache is local to the volume.
+    """
+
+    @lru_cache(maxsize=USNJRNL_PATH_CACHE_SIZE)
+    def parent_path(segment: int, sequence: int) -> str:
+        try:
+            parent = ntfs.mft(segment) if ntfs and ntfs.mft else None
+        except NtfsError:
+            parent = None
+
+        if parent is None:
+            return f"<unavailable_reference_0x{segment:x}#{sequence}>"
+        if parent.header.SequenceNumber == sequence:
+            return f"{parent.full_path()}"
+        return f"<broken_reference_0x{segment:x}#{sequence}>"
+
+    return parent_path
+
+
+@dataclass(kw_only=True)
+class JournalScan:
+    """Bytes of a $J stream jumped over without reading them, and read and parsed."""
+
+    skipped: int = 0
+    parsed: int = 0
+
+
+def allocated_ranges(journal: Journal) -> list[tuple[int, int]]:
+    """Return the (start, end) offsets of the allocated runs of a journal.
+
+    $J is a sparse stream: the records purged from the journal are deallocated and
+    read as zeros. Adjacent allocated runs make a single range.
+    """
+    fh = journal.fh
+    size = fh.seek(0, io.SEEK_END)
+    if not isinstance(fh, RunlistStream):
+        return [(0, size)]
+
+    ranges = []
+    offset = 0
+    for run_offset, run_size in fh.runlist:
+        end = min(offset + run_size * fh.block_size, size)
+        if run_offset is not None and offset < end:
+            if ranges and ranges[-1][1] == offset:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((offset, end))
+        offset += run_size * fh.block_size
+    return ranges
+
+
+def live_ranges(journal: Journal, offset: int) -> list[tuple[int, int]]:
+    """Return the allocated ranges of a journal from `offset`, from page boundaries."""
+    ranges = []
+    position = offset
+    for start, end in allocated_ranges(journal):
+        start = max(start - start % USN_PAGE_SIZE, position)
+        if start < end:
+            ranges.append((start, end))
+            position = end
+    return ranges
+
+
+def unread_bytes(ranges: list[tuple[int, int]]) -> int:
+    """Return the bytes of a journal before and between `ranges`."""
+    unread = 0
+    position = 0
+    for start, end in ranges:
+        unread += start - position
+        position = end
+    return unread
+
+
+def journal_segments(
+    ranges: list[tuple[int, int]], size: int
+) -> list[list[tuple[int, int]]]:
+    """Split ranges of a journal at every `size` bytes of the stream.
+
+    `size` is a multiple of the page size, so segments start at page boundaries.
+    """
+    segments: dict[int, list[tuple[int, int]]] = {}
+    for start, end in ranges:
+        while start < end:
+            segment_end = min(end, (start // size + 1) * size)
+            segments.setdefault(start // size, []).append((start, segment_end))
+            start = segment_end
+    return [segments[segment] for segment in sorted(segments)]
+
+
+def scan_journal(
+    journal: Journal, offset: int, scan: JournalScan
+) -> Generator[UsnRecord, None, None]:
+    """Yield the version 2 records of a journal from `offset`, as UsnJrnl.records().
+
+    Only the allocated runs are read, see `scan_ranges()`. Bytes which are not read
+    are counted in `scan.skipped`.
+    """
+    ranges = live_ranges(journal, offset)
+    scan.skipped += unread_bytes(ranges)
+    yield from scan_ranges(journal, ranges, scan)
+
+
+def scan_ranges(
+    journal: Journal, ranges: list[tuple[int, int]], scan: JournalScan
+) -> Generator[UsnRecord, None, None]:
+    """Yield the version 2 records of ranges of a journal starting at page boundaries.
+
+    Ranges are read USNJRNL_READ_SIZE bytes at a time and their records are parsed
+    from memory. Bytes read are counted in `scan.parsed`.
+    """
+    fh = journal.fh
+    for start, end in ranges:
+        while start < end:
+            fh.seek(start)
+            data = fh.read(min(USNJRNL_READ_SIZE, end - start))
+            if not data:
+                break
+            scan.parsed += len(data)
+            yield from buffer_records(journal, data, start)
+            start += len(data)
+
+
+def buffer_records(
+    journal: Journal, data: bytes, base: int
+) -> Generator[UsnRecord, None, None]:
+    """Yield the version 2 records of pages read from offset `base` of a journal.
+
+    Records never span pages: the rest of a page is skipped once it holds zeros or
+    a record which isn't valid.
+    """
+    fh = io.BytesIO(data)
+    position = 0
+    while position + USN_RECORD_HEADER.size <= len(data):
+        length, major_version = USN_RECORD_HEADER.unpack_from(data, position)
+        page_end = position - position % USN_PAGE_SIZE + USN_PAGE_SIZE
+        if (
+            length < USN_RECORD_HEADER.size
+            or position + length > min(page_end, len(data))
+            or major_version not in (2, 3, 4)
+        ):
+            position = page_end
+            continue
+
+        if major_version == 2:
+            try:
+                record = UsnRecord(journal, fh, position)
+            except EOFError:
+                position = page_end
                 continue
+            record.offset = base + position
+            yield record
+
+        position += -(-length // 8) * 8
+
+
+def window_start(journal: Journal, window: TimeWindow) -> int:
+    """Return the offset to read a journal from for the records of a time window."""
+    if window.since_filetime is not None:
+        return seek_timestamp(journal, window.since_filetime)
+    return journal_start(journal)
+
+
+def journal_start(journal: Journal) -> int:
+    """Return the offset of the first allocated page of a journal, $J is sparse."""
+    offset = 0
+    fh = journal.fh
+    if isinstance(fh, RunlistStream):
+        for run_offset, run_size in fh.runlist:
+            if run_offset is not None:
+                break
+            offset += run_size * fh.block_size
+    return offset
+
+
+def page_timestamp(journal: Journal, offset: int) -> Optional[int]:
+    """Return the FILETIME of the first record of a page, None for an empty page."""
+    fh = journal.fh
+    fh.seek(offset)
+    if fh.read(4) in (b"", b"\x00" * 4):
+        return None
+    try:
+        return UsnRecord(journal, fh, offset).record.TimeStamp
+    except Exception:
+        return None
+
+
+def seek_timestamp(journal: Journal, filetime: int) -> int:
+    """Return the offset of the page to read from for the records at `filetime` on.
+
+    Records never span pages, so every page starts with a record. Binary search for
+    the first page which starts at or after `filetime`, records of the page before
+    it may still be at or after it. Empty pages are taken as after it.
+    """
+    start = journal_start(journal) // USN_PAGE_SIZE
+    low, high = start, -(-journal.fh.seek(0, io.SEEK_END) // USN_PAGE_SIZE)
+    while low < high:
+        middle = (low + high) // 2
+        timestamp = page_timestamp(journal, middle * USN_PAGE_SIZE)
+        if timestamp is not None and timestamp < filetime:
+            low = middle + 1
+        else:
+            high = middle
+    return max(low - 1, start) * USN_PAGE_SIZE
@@ -1,11 +1,46 @@
+import json
 import logging
-from typing import Generator, Optional
+from pathlib import Path
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Generator, Iterable, Optional
 from datetime import datetime
 
 from pydantic import ValidationError
-from dissect.eventlog.evtx import Evtx
-
-from core.forensic_artifact import Source, ArtifactRecord, ForensicArtifact
+from dissect.eventlog.bxml import BxmlSub
+
+from util.timestamp import Timestamp
+from core.forensic_artifact import (
+    Source,
+    ArtifactRecord,
+    ArtifactRow,
+    ForensicArtifact,
+    construct_row,
+)
+from core.evtx_engine import EventLogArtifact, EvtxEngine, get_evtx_engine
+from core.evtx_reader import (
+    EVTX_CHUNK_SIZE,
+    EventFilter,
+    evtx_chunk_headers,
+    read_chunk,
+    read_events,
+)
+from core.evtx_carver import (
+    CARVED_OFFSET,
+    CarveRange,
+    carve_evidence,
+    carve_stream,
+    free_space,
+    plan,
+)
+from settings.config import (
+    CARVE_RANGES_PER_WORKER,
+    EVTX_INGEST_CHUNKS_PER_TASK,
+    EVTX_INGEST_TASKS_PER_WORKER,
+    EVTX_INGEST_BATCH_SIZE,
+    LOGON_SESSIONS_MAX_OPEN,
+)
 from settings.tables import Tables
 from settings.artifact_schema import ArtifactSchema
 
@@ -35,10 +70,12 @@ class LogonEventRecord(ArtifactRecord):
     ip_port: Optional[str]
     channel: str
     provider: str
+    carved_offset: Optional[int]
     evidence_id: str
 
     class Config:
         table_name: str = Tables.EVENT_LOGON.value
+        sort_key: str = "ts"
 
 
 class UsbEventRecord(ArtifactRecord):
@@ -48,7 +85,7 @@ class UsbEventRecord(ArtifactRecord):
     task: str
     event_id: int
     event_record_id: int
-    capacity_gb: float
+    capacity_gb: Optional[float]
     manufacturer: Optional[str]
     model: Optional[str]
     revision: Optional[str]
@@ -57,9 +94,11 @@ class UsbEventRecord(ArtifactRecord):
     parent_id: Optional[str]
     channel: str
     provider: str
+    carved_offset: Optional[int]
 
     class Config:
         table_name: str = Tables.EVENT_USB.value
+        sort_key: str = "ts"
 
 
 class WlanEventRecord(ArtifactRecord):
@@ -83,246 +122,611 @@ class WlanEventRecord(ArtifactRecord):
     connection_id: Optional[str]
     channel: str
     provider: str
+    carved_offset: Optional[int]
 
     class Config:
         table_name: str = Tables.EVENT_WLAN.value
+        sort_key: str = "ts"
+
+
+class LogonSessionRecord(ArtifactRecord):
+    """Logon session record, a logon and its logoff."""
+
+    ts: datetime
+    session_state: str
+    logon_ts: Optional[datetime]
+    logoff_ts: Optional[datetime]
+    duration: Optional[float]
+    target_logon_id: str
+    target_user_sid: Optional[str]
+    target_user_name: Optional[str]
+    target_domain_name: Optional[str]
+    logon_type: Optional[str]
+    workstation_name: Optional[str]
+    ip_address: Optional[str]
+    logon_event_record_id: Optional[int]
+    logoff_event_id: Optional[int]
+    logoff_event_record_id: Optional[int]
+    carved_offset: Optional[int]
 
+    class Config:
+        table_name: str = Tables.LOGON_SESSIONS.value
+        sort_key: str = "ts"
+
+
+class EventAllRecord(ArtifactRecord):
+    """Event record of any channel, the rest of the event as JSON."""
+
+    ts: datetime
+    channel: Optional[str]
+    provider: Optional[str]
+    event_id: Optional[int]
+    event_record_id: Optional[int]
+    event_data: str
+
+    class Config:
+        table_name: str = Tables.EVENT_ALL.value
+        sort_key: str = "ts"
+
+
+LOGON_EVENT_TASKS = {
+    4624: "Account Logon",
+    4625: "Account Logon Failed",
+    4634: "Account Logoff",
+    4647: "Account Logoff",
+    4648: "Account Logon",
+    # 6005: "System Boot",
+    # 6006: "System Shutdown",
+}
+LOGON_TYPE_DESCRIPTION = {
+    2: "2: Interactive",
+    3: "3: Network",
+    4: "4: Batch",
+    5: "5: Service",
+    7: "7: Unlock",
+    8: "8: NetworkClearText",
+    9: "9: NewCredentials",
+    10: "10: RemoteInteractive",
+    11: "11: CachedInteractive",
+}
+LOGON_EXCLUDE_DOMAINS = [
+    "Font Driver Host",
+    "NT AUTHORITY",
+    "NT VIRTUAL MACHINE",
+    "Window Manager",
+    "NT Service",
+]
+LOGON_EVENT_ID = 4624
+LOGOFF_EVENT_IDS = frozenset({4634, 4647})
+# a session is complete once it is destroyed (4634), after an optional 4647
+SESSION_END_EVENT_ID = 4634
+SESSION_CLOSED = "closed"
+SESSION_OPEN = "open"
+SESSION_ORPHAN_LOGOFF = "orphan logoff"
+WLAN_EVENT_TASKS = {
+    8001: "Wifi Connected",
+    8002: "Wifi Connection Failed",
+    8003: "Wifi Disconnected",
+}
+SIZE_GB = 1024 * 1024 * 1024
+# event fields with a column of their own in the event_all table
+EVENT_ALL_COLUMNS = frozenset(
+    {"TimeCreated_SystemTime", "Channel", "Provider_Name", "EventID", "EventRecordID"}
+)
+
+
+class LogonEvent(EventLogArtifact):
+    channel = "Security"
+    event_ids = frozenset(LOGON_EVENT_TASKS)
 
-class LogonEvent(ForensicArtifact):
     def __init__(self, src: Source, schema: ArtifactSchema):
         super().__init__(src=src, schema=schema)
 
-    def parse(self, descending: bool = False):
+    def read_event(self, event: dict) -> Generator[ArtifactRow, None, None]:
+        event_id = event.get("EventID")
+        task = LOGON_EVENT_TASKS[event_id]
+
+        if (
+            target_domain_name := event.get("TargetDomainName")
+        ) in LOGON_EXCLUDE_DOMAINS:
+            return
+
+        logon_type = event.get("LogonType")
+        logon_type = LOGON_TYPE_DESCRIPTION.get(logon_type)
+
+        parsed_data = {
+            "ts": self.ts.to_localtime(event.get("TimeCreated_SystemTime").value),
+            "task": task,
+            "event_id": event_id,
+            "event_record_id": event.get("EventRecordID"),
+            "subject_user_sid": event.get("SubjectUserSid"),
+            "subject_user_name": event.get("SubjectUserName"),
+            "subject_domain_name": event.get("SubjectDomainName"),
+            "subject_logon_id": event.get("SubjectLogonId"),
+            "target_user_sid": event.get("TargetUserSid"),
+            "target_user_name": event.get("TargetUserName"),
+            "target_domain_name": target_domain_name,
+            "target_server_name": event.get("TargetServerName"),
+            "target_info": event.get("TargetInfo"),
+            "target_logon_id": event.get("TargetLogonId"),
+            "logon_type": logon_type,
+            "workstation_name": event.get("WorkstationName"),
+            "ip_address": event.get("IpAddress"),
+            "ip_port": event.get("IpPort"),
+            "channel": event.get("Channel"),
+            "provider": str(event.get("Provider_Name")),
+            "carved_offset": event.get(CARVED_OFFSET),
+            "evidence_id": self.evidence_id,
+        }
+
         try:
-            logon_event = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.logon_event())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
-            self.records.append(logon_event)
-        except Exception as e:
+            yield self.build_record(LogonEventRecord, parsed_data)
+        except ValidationError as e:
             self.log_error(e)
-            logon_event = []
-        finally:
-            return logon_event
-
-    def logon_event(self) -> Generator[dict, None, None]:
-        logon_event_id = {
-            4624: "Account Logon",
-            4625: "Account Logon Failed",
-            4634: "Account Logoff",
-            4647: "Account Logoff",
-            4648: "Account Logon",
-            # 6005: "System Boot",
-            # 6006: "System Shutdown",
-        }
-        logon_type_dsecription = {
-            2: "2: Interactive",
-            3: "3: Network",
-            4: "4: Batch",
-            5: "5: Service",
-            7: "7: Unlock",
-            8: "8: NetworkClearText",
-            9: "9: NewCredentials",
-            10: "10: RemoteInteractive",
-            11: "11: CachedInteractive",
+
+
+class UsbEvent(EventLogArtifact):
+    channel = "Microsoft-Windows-Partition/Diagnostic"
+    event_ids = frozenset({1006})
+
+    def __init__(self, src: Source, schema: ArtifactSchema):
+        super().__init__(src=src, schema=schema)
+
+    def read_event(self, event: dict) -> Generator[ArtifactRow, None, None]:
+        event_id = event.get("EventID")
+        if capacity := event.get("Capacity"):
+            size_gb = capacity / SIZE_GB
+            capacity_gb = round(size_gb, 2)
+            task = "USB Connected"
+        else:
+            capacity_gb = None
+            task = "USB Disconnected"
+
+        parsed_data = {
+            "ts": self.ts.to_localtime(event.get("TimeCreated_SystemTime").value),
+            "task": task,
+            "event_id": event_id,
+            "event_record_id": event.get("EventRecordID"),
+            "capacity_gb": capacity_gb,
+            "manufacturer": event.get("Manufacturer"),
+            "model": event.get("Model"),
+            "revision": event.get("Revision"),
+            "serialnumber": event.get("SerialNumber"),
+            "mbr": event.get("Mbr"),
+            "parent_id": event.get("ParentId"),
+            "channel": event.get("Channel"),
+            "provider": str(event.get("Provider_Name")),
+            "carved_offset": event.get(CARVED_OFFSET),
+            "evidence_id": self.evidence_id,
         }
-        exclude_list = [
-            "Font Driver Host",
-            "NT AUTHORITY",
-            "NT VIRTUAL MACHINE",
-            "Window Manager",
-            "NT Service",
-        ]
-
-        for entry in self.check_empty_entry(self.iter_entry()):
-            try:
-                evtx = Evtx(fh=entry.open("rb"))
-            except:
-                pass
-
-            for event in evtx:
-                event_id = event.get("EventID")
-
-                if task := logon_event_id.get(event_id, None):
-                    if (
-                        target_domain_name := event.get("TargetDomainName")
-                    ) in exclude_list:
-                        continue
-
-                    logon_type = event.get("LogonType")
-                    logon_type = logon_type_dsecription.get(logon_type)
-
-                    parsed_data = {
-                        "ts": self.ts.to_localtime(
-                            event.get("TimeCreated_SystemTime").value
-                        ),
-                        "task": task,
-                        "event_id": event_id,
-                        "event_record_id": event.get("EventRecordID"),
-                        "subject_user_sid": event.get("SubjectUserSid"),
-                        "subject_user_name": event.get("SubjectUserName"),
-                        "subject_domain_name": event.get("SubjectDomainName"),
-                        "subject_logon_id": event.get("SubjectLogonId"),
-                        "target_user_sid": event.get("TargetUserSid"),
-                        "target_user_name": event.get("TargetUserName"),
-                        "target_domain_name": target_domain_name,
-                        "target_server_name": event.get("TargetServerName"),
-                        "target_info": event.get("TargetInfo"),
-                        "target_logon_id": event.get("TargetLogonId"),
-                        "logon_type": logon_type,
-                        "workstation_name": event.get("WorkstationName"),
-                        "ip_address": event.get("IpAddress"),
-                        "ip_port": event.get("IpPort"),
-                        "channel": event.get("Channel"),
-                        "provider": str(event.get("Provider_Name")),
-                        "evidence_id": self.evidence_id,
-                    }
-
-                    try:
-                        yield LogonEventRecord(**parsed_data)
-                    except ValidationError as e:
-                        self.log_error(e)
-                        continue
-                else:
-                    logger.debug(f"Unable to parse event: {event_id}")
-
-
-class UsbEvent(ForensicArtifact):
+
+        try:
+            yield self.build_record(UsbEventRecord, parsed_data)
+        except ValidationError as e:
+            self.log_error(e)
+
+
+class WlanEvent(EventLogArtifact):
+    channel = "Microsoft-Windows-WLAN-AutoConfig/Operational"
+    event_ids = frozenset(WLAN_EVENT_TASKS)
+
     def __init__(self, src: Source, schema: ArtifactSchema):
         super().__init__(src=src, schema=schema)
 
-    def parse(self, descending: bool = False):
+    def read_event(self, event: dict) -> Generator[ArtifactRow, None, None]:
+        event_id = event.get("EventID")
+        task = WLAN_EVENT_TASKS[event_id]
+
+        parsed_data = {
+            "ts": self.ts.to_localtime(event.get("TimeCreated_SystemTime").value),
+            "task": task,
+            "event_id": event_id,
+            "event_record_id": event.get("EventRecordID"),
+            "interface_guid": event.get("InterfaceGuid"),
+            "interface_description": event.get("InterfaceDescription"),
+            "connection_mode": event.get("ConnectionMode"),
+            "profile_name": event.get("ProfileName"),
+            "failure_reason": event.get("FailureReason"),
+            "reason_code": event.get("ReasonCode"),
+            "ssid": event.get("SSID"),
+            "bsstype": event.get("BSSType"),
+            "phytype": event.get("PHYType"),
+            "authentication_algorithm": event.get("AuthenticationAlgorithm"),
+            "cipher_algorithm": event.get("CipherAlgorithm"),
+            "connection_id": event.get("ConnectionId"),
+            "channel": event.get("Channel"),
+            "provider": str(event.get("Provider_Name")),
+            "carved_offset": event.get(CARVED_OFFSET),
+            "evidence_id": self.evidence_id,
+        }
+
         try:
-            usb_event = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.usb_event())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
-            self.records.append(usb_event)
-        except Exception as e:
+            yield self.build_record(WlanEventRecord, parsed_data)
+        except ValidationError as e:
             self.log_error(e)
-            usb_event = []
-        finally:
-            return usb_event
 
-    def usb_event(self) -> Generator[dict, None, None]:
-        SIZE_GB = 1024 * 1024 * 1024
 
-        for entry in self.check_empty_entry(self.iter_entry()):
-            try:
-                evtx = Evtx(fh=entry.open("rb"))
-            except:
-                pass
-
-            for event in evtx:
-                if (event_id := event.get("EventID")) == 1006:
-                    if capacity := event.get("Capacity"):
-                        size_gb = capacity / SIZE_GB
-                        capacity_gb = round(size_gb, 2)
-                        task = "USB Connected"
-                    else:
-                        task = "USB Disconnected"
-
-                    parsed_data = {
-                        "ts": self.ts.to_localtime(
-                            event.get("TimeCreated_SystemTime").value
-                        ),
-                        "task": task,
-                        "event_id": event_id,
-                        "event_record_id": event.get("EventRecordID"),
-                        "capacity_gb": capacity_gb,
-                        "manufacturer": event.get("Manufacturer"),
-                        "model": event.get("Model"),
-                        "revision": event.get("Revision"),
-                        "serialnumber": event.get("SerialNumber"),
-                        "mbr": event.get("Mbr"),
-                        "parent_id": event.get("ParentId"),
-                        "channel": event.get("Channel"),
-                        "provider": str(event.get("Provider_Name")),
-                        "evidence_id": self.evidence_id,
-                    }
-
-                    try:
-                        yield UsbEventRecord(**parsed_data)
-                    except ValidationError as e:
-                        self.log_error(e)
-                        continue
-                else:
-                    logger.debug(f"Unable to parse event: {event_id}")
-
-
-class WlanEvent(ForensicArtifact):
+@dataclass(kw_only=True)
+class LogonSession:
+    logon: Optional[dict] = None
+    logoff: Optional[dict] = None
+
+
+class LogonSessions(EventLogArtifact):
+    """Logon sessions, built from the logon and logoff events during the EVTX pass.
+
+    Events come in EventRecordID order, so a logon is joined to its logoff(s)
+    through a hash map of the open sessions, keyed by (evidence_id,
+    target_logon_id): a session row is emitted on the 4634 which ends it, the
+    logoff time being the one of a preceding 4647. Logons without a logoff are
+    emitted as open sessions at the end of the pass, or as soon as their logon id
+    is reused. Logoffs without a logon are orphans, a single row per logon id: a
+    4647 without a logon is kept open until its 4634 as well. At most
+    LOGON_SESSIONS_MAX_OPEN sessions are kept open, the oldest ones are emitted
+    as open past that.
+
+    Sessions still open at the end of an ingest only end in a later one, so the
+    Security log is always read whole (not `incremental`).
+    """
+
+    channel = "Security"
+    event_ids = frozenset({LOGON_EVENT_ID, *LOGOFF_EVENT_IDS})
+    incremental = False
+
     def __init__(self, src: Source, schema: ArtifactSchema):
         super().__init__(src=src, schema=schema)
+        self.sessions: dict[tuple[str, str], LogonSession] = {}
+
+    def finish(self) -> Generator[ArtifactRow, None, None]:
+        sessions, self.sessions = self.sessions, {}
+        for session in sessions.values():
+            yield from self.session_rows(session)
+
+    def read_event(self, event: dict) -> Generator[ArtifactRow, None, None]:
+        if event.get("TargetDomainName") in LOGON_EXCLUDE_DOMAINS:
+            return
+        key = (self.evidence_id, str(event.get("TargetLogonId")))
+        session = self.sessions.get(key)
+
+        if event.get("EventID") == LOGON_EVENT_ID:
+            if session is not None:
+                # the logon id was reused, the previous session never ended
+                yield from self.session_rows(self.sessions.pop(key))
+            yield from self.open_session(key, LogonSession(logon=event))
+            return
+
+        if session is None:
+            if event.get("EventID") == SESSION_END_EVENT_ID:
+                yield from self.session_rows(LogonSession(logoff=event))
+            else:
+                yield from self.open_session(key, LogonSession(logoff=event))
+            return
+        if session.logoff is None:
+            session.logoff = event
+        if event.get("EventID") == SESSION_END_EVENT_ID:
+            yield from self.session_rows(self.sessions.pop(key))
+
+    def open_session(
+        self, key: tuple[str, str], session: LogonSession
+    ) -> Generator[ArtifactRow, None, None]:
+        """Keep a session open, emitting the oldest one past LOGON_SESSIONS_MAX_OPEN."""
+        self.sessions[key] = session
+        if len(self.sessions) > LOGON_SESSIONS_MAX_OPEN:
+            oldest = next(iter(self.sessions))
+            yield from self.session_rows(self.sessions.pop(oldest))
+
+    def session_rows(self, session: LogonSession) -> Generator[ArtifactRow, None, None]:
+        logon, logoff = session.logon, session.logoff
+        logon_ts = logon and self.event_time(logon)
+        logoff_ts = logoff and self.event_time(logoff)
+        if logon is None:
+            state = SESSION_ORPHAN_LOGOFF
+        elif logoff is None:
+            state = SESSION_OPEN
+        else:
+            state = SESSION_CLOSED
+        event = logon or logoff
+
+        parsed_data = {
+            "ts": logon_ts or logoff_ts,
+            "session_state": state,
+            "logon_ts": logon_ts,
+            "logoff_ts": logoff_ts,
+            "duration": (
+                (logoff_ts - logon_ts).total_seconds()
+                if logon_ts and logoff_ts
+                else None
+            ),
+            "target_logon_id": str(event.get("TargetLogonId")),
+            "target_user_sid": event.get("TargetUserSid"),
+            "target_user_name": event.get("TargetUserName"),
+            "target_domain_name": event.get("TargetDomainName"),
+            "logon_type": logon and LOGON_TYPE_DESCRIPTION.get(logon.get("LogonType")),
+            "workstation_name": logon and logon.get("WorkstationName"),
+            "ip_address": logon and logon.get("IpAddress"),
+            "logon_event_record_id": logon and logon.get("EventRecordID"),
+            "logoff_event_id": logoff and logoff.get("EventID"),
+            "logoff_event_record_id": logoff and logoff.get("EventRecordID"),
+            "carved_offset": event.get(CARVED_OFFSET),
+            "evidence_id": self.evidence_id,
+        }
 
-    def parse(self, descending: bool = False):
         try:
-            wlan_event = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.wlan_event())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
-            self.records.append(wlan_event)
-        except Exception as e:
+            yield self.build_record(LogonSessionRecord, parsed_data)
+        except ValidationError as e:
             self.log_error(e)
-            wlan_event = []
-        finally:
-            return wlan_event
 
-    def wlan_event(self) -> Generator[dict, None, None]:
-        for entry in self.check_empty_entry(self.iter_entry()):
-            try:
-                evtx = Evtx(fh=entry.open("rb"))
-            except:
-                pass
-
-            for event in evtx:
-                event_id = event.get("EventID")
-                if event_id == 8001:
-                    task = "Wifi Connected"
-                elif event_id == 8002:
-                    task = "Wifi Connection Failed"
-                elif event_id == 8003:
-                    task = "Wifi Disconnected"
-                else:
-                    continue
-
-                parsed_data = {
-                    "ts": self.ts.to_localtime(
-                        event.get("TimeCreated_SystemTime").value
-                    ),
-                    "task": task,
-                    "event_id": event_id,
-                    "event_record_id": event.get("EventRecordID"),
-                    "interface_guid": event.get("InterfaceGuid"),
-                    "interface_description": event.get("InterfaceDescription"),
-                    "connection_mode": event.get("ConnectionMode"),
-                    "profile_name": event.get("ProfileName"),
-                    "failure_reason": event.get("FailureReason"),
-                    "reason_code": event.get("ReasonCode"),
-                    "ssid": event.get("SSID"),
-                    "bsstype": event.get("BSSType"),
-                    "phytype": event.get("PHYType"),
-                    "authentication_algorithm": event.get("AuthenticationAlgorithm"),
-                    "cipher_algorithm": event.get("CipherAlgorithm"),
-                    "connection_id": event.get("ConnectionId"),
-                    "channel": event.get("Channel"),
-                    "provider": str(event.get("Provider_Name")),
-                    "evidence_id": self.evidence_id,
-                }
+    def event_time(self, event: dict) -> datetime:
+        return self.ts.to_localtime(event.get("TimeCreated_SystemTime").value)
+
+
+class EventAll(ForensicArtifact):
+    """Every event of every event log file, in the generic event_all table.
+
+    Meant for a full ingest, so it isn't parsed with its category. It doesn't go
+    through the EVTX engine: with `--evtx-workers` above 1, the chunks of the log
+    files are decoded in a process pool, a run of chunks per task and a bounded
+    number of tasks in flight. Rows are exported in large batches, without being
+    sorted in memory (see event_all_view).
+    """
+
+    optional = True
+    min_batch_size = EVTX_INGEST_BATCH_SIZE
 
+    def __init__(self, src: Source, schema: ArtifactSchema):
+        super().__init__(src=src, schema=schema)
+
+    def parse(self, descending: bool = False) -> None:
+        self.records.append(self.events())
+
+    def events(self) -> Generator[ArtifactRow, None, None]:
+        wanted = EventFilter(all_channels=True, window=self.time_window)
+        log_files = self.check_empty_entry(self.iter_entry())
+        workers = get_evtx_engine(self.src).workers
+
+        if workers <= 1:
+            for log_file in log_files:
                 try:
-                    yield WlanEventRecord(**parsed_data)
-                except ValidationError as e:
+                    with log_file.open("rb") as fh:
+                        yield from event_all_rows(
+                            read_events(fh, wanted), self.ts, self.evidence_id
+                        )
+                except Exception as e:
                     self.log_error(e)
-                    continue
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: deque[tuple[Path, Future]] = deque()
+            for log_file in log_files:
+                for chunks in self.chunk_runs(log_file):
+                    pending.append(
+                        (
+                            log_file,
+                            executor.submit(
+                                ingest_chunks, chunks, wanted, self.ts, self.evidence_id
+                            ),
+                        )
+                    )
+                    if len(pending) >= workers * EVTX_INGEST_TASKS_PER_WORKER:
+                        yield from self.ingested_rows(*pending.popleft())
+
+            while pending:
+                yield from self.ingested_rows(*pending.popleft())
+
+    def chunk_runs(self, log_file: Path) -> Generator[list[bytes], None, None]:
+        """Yield the chunks of a log file by runs of `EVTX_INGEST_CHUNKS_PER_TASK`, in
+        the order of their first EventRecordID."""
+        try:
+            with log_file.open("rb") as fh:
+                offsets = [offset for _, _, offset in evtx_chunk_headers(fh)]
+                for start in range(0, len(offsets), EVTX_INGEST_CHUNKS_PER_TASK):
+                    chunks = []
+                    for offset in offsets[start : start + EVTX_INGEST_CHUNKS_PER_TASK]:
+                        fh.seek(offset)
+                        chunks.append(fh.read(EVTX_CHUNK_SIZE))
+                    yield chunks
+        except Exception as e:
+            self.log_error(f"{log_file}: {e}")
+
+    def ingested_rows(self, log_file: Path, future: Future) -> list[ArtifactRow]:
+        try:
+            return future.result()
+        except Exception as e:
+            self.log_error(f"{log_file}: {e}")
+            return []
+
+
+class EvtxCarving(ForensicArtifact):
+    """Events of deleted or cleared event logs, carved from the volumes.
+
+    NTFS volumes are carved in their unallocated clusters, volumes without a
+    filesystem as a raw stream. Valid chunks are read whole and records found
+    elsewhere are decoded on their own. The events go to the tables of the event
+    log artifacts, through their `read_event()`, with the volume offset they were
+    carved from as `carved_offset` (None for the events of log files).
+
+    Volumes are carved by windows of volume offsets (see `plan()`). With
+    `--evtx-workers` above 1, windows are carved in a process pool, each worker
+    opening the evidence itself. In streaming mode, the rows of a window are
+    exported before the events of the next one are read.
+    """
+
+    optional = True
+
+    def __init__(self, src: Source, schema: ArtifactSchema):
+        super().__init__(src=src, schema=schema)
+
+    def parse(self, descending: bool = False) -> None:
+        engine = EvtxEngine(
+            time_window=self.time_window,
+            batch_size=get_evtx_engine(self.src).batch_size,
+        )
+        if get_evtx_engine(self.src).export:
+            engine.export = self.export_rows
+        consumers = self.consumers()
+        routes, channels = engine.route(consumers)
+        wanted = engine.event_filter(routes, channels)
+        try:
+            for events in self.carved_windows(wanted):
+                engine.dispatch_chunk(events, routes=routes, channels=channels)
+                if engine.export:
+                    for consumer in consumers:
+                        engine.flush(consumer)
+        except Exception as e:
+            self.log_export_error(e)
+        engine.finish(consumers)
+
+        for consumer in consumers:
+            self.collect(engine.rows(consumer), key="ts", descending=descending)
+
+    def export_rows(self, consumer: EventLogArtifact, rows: list[ArtifactRow]) -> None:
+        """Export rows of an event log artifact as rows carved by this one."""
+        try:
+            get_evtx_engine(self.src).export(self, rows)
+        except Exception as e:
+            self.log_export_error(e)
+
+    def consumers(self) -> list[EventLogArtifact]:
+        """Return an instance of every event log artifact."""
+        # settings.artifacts imports this module
+        from settings.artifacts import Artifacts
+
+        consumers = []
+        for Artifact in Artifacts:
+            name, category, ForensicArtifact = Artifact.value
+            if not issubclass(ForensicArtifact, EventLogArtifact):
+                continue
+            consumer = ForensicArtifact(
+                src=self.src, schema=ArtifactSchema(name=name, category=category)
+            )
+            consumer.evidence_id = self.evidence_id
+            consumer.validation = self.validation
+            consumer.sample_rate = self.sample_rate
+            consumer.time_window = self.time_window
+            consumers.append(consumer)
+        return consumers
+
+    def carve_ranges(self) -> list[list[CarveRange]]:
+        """Return the ranges of the volumes to carve, by range of volume offsets."""
+        carve_ranges = []
+        for index, volume in enumerate(self.src.source.volumes):
+            try:
+                fs = getattr(volume, "fs", None)
+                if fs is None:
+                    carve_ranges.extend(plan(index, [(0, volume.size)]))
+                elif fs.__fstype__ == "ntfs":
+                    carve_ranges.extend(plan(index, free_space(fs.ntfs)))
+            except Exception as e:
+                self.log_error(e)
+        return carve_ranges
+
+    def carved_windows(
+        self, wanted: EventFilter
+    ) -> Generator[Iterable[dict], None, None]:
+        """Yield the events carved from each window of volume offsets."""
+        workers = get_evtx_engine(self.src).workers
+
+        if workers <= 1:
+            for carve_ranges in self.carve_ranges():
+                yield self.carved_stream(carve_ranges, wanted)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: deque[Future] = deque()
+            for carve_ranges in self.carve_ranges():
+                pending.append(
+                    executor.submit(
+                        carve_evidence, self.src.source_path, carve_ranges, wanted
+                    )
+                )
+                if len(pending) >= workers * CARVE_RANGES_PER_WORKER:
+                    yield self.carved(pending.popleft())
+
+            while pending:
+                yield self.carved(pending.popleft())
+
+    def carved_stream(
+        self, carve_ranges: list[CarveRange], wanted: EventFilter
+    ) -> Generator[dict, None, None]:
+        volumes = self.src.source.volumes
+        for carve_range in carve_ranges:
+            try:
+                yield from carve_stream(
+                    volumes[carve_range.volume], carve_range, wanted
+                )
+            except Exception as e:
+                self.log_error(e)
+
+    def carved(self, future: Future) -> list[dict]:
+        try:
+            return future.result()
+        except Exception as e:
+            self.log_error(e)
+            return []
+
+
+def ingest_chunks(
+    chunks: list[bytes], wanted: EventFilter, ts: Timestamp, evidence_id: str
+) -> list[ArtifactRow]:
+    """Decode a run of event log chunks into event_all rows (in a worker process)."""
+    return [
+        row
+        for data in chunks
+        for row in event_all_rows(read_chunk(data, wanted), ts, evidence_id)
+    ]
+
+
+def event_all_rows(
+    events: Iterable[dict], ts: Timestamp, evidence_id: str
+) -> Generator[ArtifactRow, None, None]:
+    """Turn events into event_all rows.
+
+    Every value is converted here, so rows are built without model validation.
+    """
+    for event in events:
+        event_id = event.get("EventID")
+        event_record_id = event.get("EventRecordID")
+        yield construct_row(
+            EventAllRecord,
+            {
+                "ts": ts.to_localtime(event.get("TimeCreated_SystemTime").value),
+                "channel": optional_str(event.get("Channel")),
+                "provider": optional_str(event.get("Provider_Name")),
+                "event_id": int(event_id) if event_id is not None else None,
+                "event_record_id": (
+                    int(event_record_id) if event_record_id is not None else None
+                ),
+                "event_data": json.dumps(
+                    {
+                        str(key): json_value(value)
+                        for key, value in event.items()
+                        if key not in EVENT_ALL_COLUMNS
+                    },
+                    separators=(",", ":"),
+                    ensure_ascii=False,
+                ),
+                "evidence_id": evidence_id,
+            },
+        )
+
+
+def optional_str(value) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+def json_value(value):
+    if isinstance(value, BxmlSub):
+        return json_value(value.get())
+    if isinstance(value, list):
+        return [json_value(item) for item in value]
+    if isinstance(value, bytes):
+        return value.hex()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    return str(value)
@@ -30,6 +30,7 @@ class FileHistoryRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.WIN_FILEHISTORY.value
+        sort_key: str = "ts"
 
 
 @dataclass(kw_only=True)
@@ -72,24 +73,14 @@ class FileHistory(ForensicArtifact):
 
     def parse(self, descending: bool = False):
         try:
-            file_history = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.file_history())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
+            self.collect(self.file_history(), key="ts", descending=descending)
         except Exception as e:
             self.log_error(e)
-            file_history = []
-        finally:
-            self.records.append(file_history)
 
     def file_history(self) -> Generator[dict, None, None]:
         for data in self._combined_file_history():
             try:
-                yield FileHistoryRecord(**data)
+                yield self.build_record(FileHistoryRecord, data)
             except ValidationError as e:
                 self.log_error(e)
                 continue
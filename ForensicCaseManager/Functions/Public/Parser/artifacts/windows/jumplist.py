@@ -68,6 +68,7 @@ class JumpListRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.WIN_JUMPLIST.value
+        sort_key: str = "last_opened"
 
 
 # DestListEntry : https://bonggang.tistory.com/120
@@ -251,19 +252,9 @@ class JumpList(ForensicArtifact):
 
     def parse(self, descending: bool = False) -> None:
         try:
-            jumplist = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.jumplist())
-                ),
-                key=lambda record: record.last_opened,
-                reverse=descending,
-            )
+            self.collect(self.jumplist(), key="last_opened", descending=descending)
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(jumplist)
 
     def parse_jumplist_entry(self, entry):
         # Initialize the JumpList parser with the file handle
@@ -314,18 +305,17 @@ class JumpList(ForensicArtifact):
             }
 
             try:
-                return JumpListRecord(**parsed_data)
+                return self.build_record(JumpListRecord, parsed_data)
             except ValidationError as e:
                 self.log_error(e)
                 return
         except Exception as e:
             self.log_error(e)
-            return
 
     def jumplist(self) -> Generator[dict, None, None]:
         for entry in self.check_empty_entry(self.iter_entry()):
             try:
-                yield from self.parse_jumplist_entry(entry)
+                yield from self.read_cached(entry, self.parse_jumplist_entry)
             except Exception as e:
                 logger.exception("Error parsing JumpList entry: %s", entry)
                 continue
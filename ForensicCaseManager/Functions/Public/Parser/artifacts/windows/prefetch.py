@@ -162,6 +162,7 @@ class PrefetchRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.WIN_PREFETCH.value
+        sort_key: str = "ts"
 
 
 class PrefetchParser:
@@ -265,47 +266,38 @@ class Prefetch(ForensicArtifact):
             previousruns: Previous run non zero timestamps
         """
         try:
-            prefetch = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.prefetch())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
+            self.collect(self.prefetch(), key="ts", descending=descending)
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(prefetch)
 
     def prefetch(self) -> Generator[dict, None, None]:
         for entry in self.check_empty_entry(self.iter_entry()):
+            yield from self.read_cached(entry, self.read_prefetch)
+
+    def read_prefetch(self, entry: Path) -> Generator[dict, None, None]:
+        try:
+            prefetch = PrefetchParser(fh=entry.open("rb"))
+            filename = prefetch.header.name.decode("utf-16-le", errors="ignore").split(
+                "\x00"
+            )[0]
+            ts = self.ts.wintimestamp(prefetch.latest_timestamp)
+            previousruns = [
+                self.ts.wintimestamp(ts) for ts in prefetch.previous_timestamps
+            ]
+
+            parsed_data = {
+                "ts": ts,
+                "filename": filename,
+                "prefetch": entry.name,
+                "linkedfiles": prefetch.metrics,
+                "runcount": prefetch.fn.run_count,
+                "previousruns": previousruns,
+                "evidence_id": self.evidence_id,
+            }
+
             try:
-                prefetch = PrefetchParser(fh=entry.open("rb"))
-                filename = prefetch.header.name.decode(
-                    "utf-16-le", errors="ignore"
-                ).split("\x00")[0]
-                ts = self.ts.wintimestamp(prefetch.latest_timestamp)
-                previousruns = [
-                    self.ts.wintimestamp(ts) for ts in prefetch.previous_timestamps
-                ]
-
-                parsed_data = {
-                    "ts": ts,
-                    "filename": filename,
-                    "prefetch": entry.name,
-                    "linkedfiles": prefetch.metrics,
-                    "runcount": prefetch.fn.run_count,
-                    "previousruns": previousruns,
-                    "evidence_id": self.evidence_id,
-                }
-
-                try:
-                    yield PrefetchRecord(**parsed_data)
-                except ValidationError as e:
-                    self.log_error(e)
-                    continue
-            except Exception as e:
+                yield self.build_record(PrefetchRecord, parsed_data)
+            except ValidationError as e:
                 self.log_error(e)
-                continue
+        except Exception as e:
+            self.log_error(e)
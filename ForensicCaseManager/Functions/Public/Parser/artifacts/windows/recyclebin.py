@@ -48,6 +48,7 @@ class RecyclebinRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.WIN_RECYCLEBIN.value
+        sort_key: str = "ts"
 
 
 @dataclass(kw_only=True)
@@ -106,43 +107,34 @@ class RecycleBin(ForensicArtifact):
           source (uri): Location of $I meta file on disk
         """
         try:
-            recyclebin = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.recyclebin())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
+            self.collect(self.recyclebin(), key="ts", descending=descending)
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(recyclebin)
 
     def recyclebin(self) -> Generator[dict, None, None]:
         for entry in self.check_empty_entry(self.iter_entry(recurse=True)):
+            yield from self.read_cached(entry, self.read_recyclebin)
+
+    def read_recyclebin(self, entry: TargetPath) -> Generator[dict, None, None]:
+        try:
+            recyclebin = RecycleBinParser(path=entry)
+            ts = self.ts.wintimestamp(recyclebin.timestamp)
+            path = uri.from_windows(recyclebin.filename.rstrip("\x00"))
+            filename = os.path.split(path)[1]
+
+            parsed_data = {
+                "ts": ts,
+                "path": path,
+                "filename": filename,
+                "filesize": recyclebin.file_size,
+                "deleted_path": uri.from_windows(recyclebin.deleted_path),
+                "source": uri.from_windows(recyclebin.source_path),
+                "evidence_id": self.evidence_id,
+            }
+
             try:
-                recyclebin = RecycleBinParser(path=entry)
-                ts = self.ts.wintimestamp(recyclebin.timestamp)
-                path = uri.from_windows(recyclebin.filename.rstrip("\x00"))
-                filename = os.path.split(path)[1]
-
-                parsed_data = {
-                    "ts": ts,
-                    "path": path,
-                    "filename": filename,
-                    "filesize": recyclebin.file_size,
-                    "deleted_path": uri.from_windows(recyclebin.deleted_path),
-                    "source": uri.from_windows(recyclebin.source_path),
-                    "evidence_id": self.evidence_id,
-                }
-
-                try:
-                    yield RecyclebinRecord(**parsed_data)
-                except ValidationError as e:
-                    self.log_error(e)
-                    continue
-            except Exception as e:
+                yield self.build_record(RecyclebinRecord, parsed_data)
+            except ValidationError as e:
                 self.log_error(e)
-                continue
+        except Exception as e:
+            self.log_error(e)
@@ -35,6 +35,7 @@ class ApplicationAppcompatRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_AMCACHE_APPLICATION.value
+        sort_key: str = "install_date"
 
 
 class ApplicationFileAppcompatRecord(ArtifactRecord):
@@ -60,6 +61,7 @@ class ApplicationFileAppcompatRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_AMCACHE_APPLICATION_FILE.value
+        sort_key: str = "mtime_regf"
 
 
 class FileAppcompatRecord(ArtifactRecord):
@@ -251,7 +253,7 @@ class AmcachePluginOldMixin:
                 }
 
                 try:
-                    yield FileAppcompatRecord(**parsed_data)
+                    yield self.build_record(FileAppcompatRecord, parsed_data)
                 except ValidationError as e:
                     self.log_error(e)
                     continue
@@ -278,7 +280,7 @@ class AmcachePluginOldMixin:
             }
 
             try:
-                yield ProgramsAppcompatRecord(**parsed_data)
+                yield self.build_record(ProgramsAppcompatRecord, parsed_data)
             except ValidationError as e:
                 self.log_error(e)
                 continue
@@ -303,7 +305,7 @@ class AmcachePluginOldMixin:
                         "msi_package_code2": entry_data.get("MsiPackageCode2"),
                     }
                     try:
-                        yield ProgramsAppcompatRecord(**parsed_data)
+                        yield self.build_record(ProgramsAppcompatRecord, parsed_data)
                     except ValidationError as e:
                         self.log_error(e)
                         continue
@@ -328,7 +330,7 @@ class AmcachePluginOldMixin:
                         "msi_package_code2": entry_data.get("MsiPackageCode2"),
                     }
                     try:
-                        yield ProgramsAppcompatRecord(**parsed_data)
+                        yield self.build_record(ProgramsAppcompatRecord, parsed_data)
                     except ValidationError as e:
                         self.log_error(e)
                         continue
@@ -396,29 +398,14 @@ class Amcache(AmcachePluginOldMixin, ForensicArtifact):
         # ]
 
         try:
-            applications = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.applications())
-                ),
-                key=lambda record: record.install_date,
-                reverse=descending,
+            self.collect(
+                self.applications(), key="install_date", descending=descending
             )
-
-            application_files = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.application_files())
-                ),
-                key=lambda record: record.mtime_regf,
-                reverse=descending,
+            self.collect(
+                self.application_files(), key="mtime_regf", descending=descending
             )
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(applications)
-        self.records.append(application_files)
 
         # TODO: bug fix on timestamp
         # application_files = sorted(
@@ -548,7 +535,7 @@ class Amcache(AmcachePluginOldMixin, ForensicArtifact):
             }
 
             try:
-                yield ApplicationAppcompatRecord(**parsed_data)
+                yield self.build_record(ApplicationAppcompatRecord, parsed_data)
             except ValidationError as e:
                 self.log_error(e)
                 continue
@@ -627,7 +614,7 @@ class Amcache(AmcachePluginOldMixin, ForensicArtifact):
             }
 
             try:
-                yield ApplicationFileAppcompatRecord(**parsed_data)
+                yield self.build_record(ApplicationFileAppcompatRecord, parsed_data)
             except ValidationError as e:
                 self.log_error(e)
                 continue
@@ -671,7 +658,7 @@ class Amcache(AmcachePluginOldMixin, ForensicArtifact):
             }
 
             try:
-                yield BinaryAppcompatRecord(**parsed_data)
+                yield self.build_record(BinaryAppcompatRecord, parsed_data)
             except ValidationError as e:
                 self.log_error(e)
                 continue
@@ -697,7 +684,7 @@ class Amcache(AmcachePluginOldMixin, ForensicArtifact):
             }
 
             try:
-                yield ShortcutAppcompatRecord(**parsed_data)
+                yield self.build_record(ShortcutAppcompatRecord, parsed_data)
             except ValidationError as e:
                 self.log_error(e)
                 continue
@@ -739,7 +726,7 @@ class Amcache(AmcachePluginOldMixin, ForensicArtifact):
             }
 
             try:
-                yield ContainerAppcompatRecord(**parsed_data)
+                yield self.build_record(ContainerAppcompatRecord, parsed_data)
             except ValidationError as e:
                 self.log_error(e)
                 continue
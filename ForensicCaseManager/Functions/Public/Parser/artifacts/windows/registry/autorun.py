@@ -18,6 +18,7 @@ class AutoRunRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_AUTORUN.value
+        sort_key: str = "ts"
 
 
 class AutoRun(ForensicArtifact):
@@ -28,19 +29,9 @@ class AutoRun(ForensicArtifact):
 
     def parse(self, descending: bool = False):
         try:
-            runkeys = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.runkeys())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
+            self.collect(self.runkeys(), key="ts", descending=descending)
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(runkeys)
 
     def runkeys(self):
         """Iterate various run key locations. See source for all locations.
@@ -77,7 +68,7 @@ class AutoRun(ForensicArtifact):
                     }
 
                     try:
-                        yield AutoRunRecord(**parsed_data)
+                        yield self.build_record(AutoRunRecord, parsed_data)
                     except ValidationError as e:
                         self.log_error(e)
                         continue
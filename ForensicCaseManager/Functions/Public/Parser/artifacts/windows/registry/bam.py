@@ -25,6 +25,7 @@ class BamRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_BAM.value
+        sort_key: str = "ts"
 
 
 class BAM(ForensicArtifact):
@@ -35,19 +36,9 @@ class BAM(ForensicArtifact):
 
     def parse(self, descending: bool = False):
         try:
-            bam = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.bam())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
+            self.collect(self.bam(), key="ts", descending=descending)
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(bam)
 
     def bam(self):
         """Parse bam and dam registry keys.
@@ -77,7 +68,7 @@ class BAM(ForensicArtifact):
                         }
 
                         try:
-                            yield BamRecord(**parsed_data)
+                            yield self.build_record(BamRecord, parsed_data)
                         except ValidationError as e:
                             self.log_error(e)
                             continue
@@ -22,6 +22,7 @@ class NetworkInterfaceRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_NETWORK_INTERFACE.value
+        sort_key: str = "lease_obtained_time"
 
 
 class NetworkHistoryRecord(ArtifactRecord):
@@ -39,6 +40,7 @@ class NetworkHistoryRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_NETWORK_HISTORY.value
+        sort_key: str = "created"
 
 
 class NetworkInfo(ForensicArtifact):
@@ -47,28 +49,14 @@ class NetworkInfo(ForensicArtifact):
 
     def parse(self, descending: bool = False):
         try:
-            network_history = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.network_history())
-                ),
-                key=lambda record: record.created,
-                reverse=descending,
-            )
-            network_interface = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.network_interface())
-                ),
-                key=lambda record: record.lease_obtained_time,
-                reverse=descending,
+            self.collect(self.network_history(), key="created", descending=descending)
+            self.collect(
+                self.network_interface(),
+                key="lease_obtained_time",
+                descending=descending,
             )
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(network_history)
-        self.records.append(network_interface)
 
     def network_interface(self):
         entry_name = "Interfaces"
@@ -137,7 +125,7 @@ class NetworkInfo(ForensicArtifact):
                     }
 
                     try:
-                        yield NetworkInterfaceRecord(**parsed_data)
+                        yield self.build_record(NetworkInterfaceRecord, parsed_data)
                     except ValidationError as e:
                         self.log_error(e)
                         continue
@@ -190,7 +178,7 @@ class NetworkInfo(ForensicArtifact):
                         }
 
                         try:
-                            yield NetworkHistoryRecord(**parsed_data)
+                            yield self.build_record(NetworkHistoryRecord, parsed_data)
                         except ValidationError as e:
                             self.log_error(e)
                             continue
@@ -51,6 +51,7 @@ class UsbstorRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_USB.value
+        sort_key: str = "first_insert"
 
 
 class USB(ForensicArtifact):
@@ -61,19 +62,9 @@ class USB(ForensicArtifact):
 
     def parse(self, descending: bool = False):
         try:
-            usbstor = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.usbstor())
-                ),
-                key=lambda record: record.first_insert,
-                reverse=descending,
-            )
+            self.collect(self.usbstor(), key="first_insert", descending=descending)
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(usbstor)
 
     @internal
     def unpack_timestamps(self, usb_reg_properties) -> dict:
@@ -204,7 +195,7 @@ class USB(ForensicArtifact):
                         }
 
                         try:
-                            yield UsbstorRecord(**parsed_data)
+                            yield self.build_record(UsbstorRecord, parsed_data)
                         except ValidationError as e:
                             self.log_error(e)
                             continue
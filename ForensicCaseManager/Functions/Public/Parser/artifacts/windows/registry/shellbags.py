@@ -280,6 +280,7 @@ class ShellBagRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_SHELLBAGS.value
+        sort_key: str = "path"
 
 
 class Shellbags(ForensicArtifact):
@@ -294,19 +295,9 @@ class Shellbags(ForensicArtifact):
 
     def parse(self, descending: bool = False):
         try:
-            shellbags = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.shellbags())
-                ),
-                key=lambda record: record.path,
-                reverse=descending,
-            )
+            self.collect(self.shellbags(), key="path", descending=descending)
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(shellbags)
 
     def shellbags(self):
         """Return Windows Shellbags.
@@ -373,7 +364,7 @@ class Shellbags(ForensicArtifact):
                 }
 
                 try:
-                    yield ShellBagRecord(**parsed_data)
+                    yield self.build_record(ShellBagRecord, parsed_data)
                 except ValidationError as e:
                     self.log_error(e)
                     continue
@@ -115,6 +115,7 @@ class ShimCacheRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_SHIMCACHE.value
+        sort_key: str = "last_modified"
 
 
 class SHIMCACHE_WIN_TYPE(IntEnum):
@@ -313,19 +314,9 @@ class ShimCache(ForensicArtifact):
 
     def parse(self, descending: bool = False):
         try:
-            shimcache = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.shimcache())
-                ),
-                key=lambda record: record.last_modified,
-                reverse=descending,
-            )
+            self.collect(self.shimcache(), key="last_modified", descending=descending)
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(shimcache)
 
     def shimcache(self) -> Generator[dict, None, None]:
         """Return the shimcache.
@@ -397,7 +388,7 @@ class ShimCache(ForensicArtifact):
             }
 
             try:
-                yield ShimCacheRecord(**parsed_data)
+                yield self.build_record(ShimCacheRecord, parsed_data)
             except ValidationError as e:
                 self.log_error(e)
                 continue
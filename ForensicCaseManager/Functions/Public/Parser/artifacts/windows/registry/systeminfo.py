@@ -40,15 +40,9 @@ class SystemInfo(ForensicArtifact):
 
     def parse(self, descending: bool = False):
         try:
-            system_info = [
-                self.validate_record(index=index, record=record)
-                for index, record in enumerate(self.system_info())
-            ]
+            self.collect(self.system_info())
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(system_info)
 
     @property
     def timezone(self):
@@ -205,7 +199,7 @@ class SystemInfo(ForensicArtifact):
         }
 
         try:
-            yield SystemInfoRecord(**parsed_data)
+            yield self.build_record(SystemInfoRecord, parsed_data)
         except ValidationError as e:
             self.log_error(e)
             pass
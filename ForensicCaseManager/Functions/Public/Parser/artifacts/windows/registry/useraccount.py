@@ -229,6 +229,7 @@ class SamRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_USERACCOUNT_SAM.value
+        sort_key: str = "rid"
 
 
 class ProfileListRecord(ArtifactRecord):
@@ -241,6 +242,7 @@ class ProfileListRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_USERACCOUNT_PROFILELIST.value
+        sort_key: str = "rid"
 
 
 def expand_des_key(key: bytes) -> bytes:
@@ -304,28 +306,10 @@ class UserAccount(ForensicArtifact):
 
     def parse(self, descending: bool = False):
         try:
-            sam = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.sam())
-                ),
-                key=lambda record: record.rid,
-                reverse=descending,
-            )
-            profilelist = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.profilelist())
-                ),
-                key=lambda record: record.rid,
-                reverse=descending,
-            )
+            self.collect(self.sam(), key="rid", descending=descending)
+            self.collect(self.profilelist(), key="rid", descending=descending)
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(sam)
-        self.records.append(profilelist)
 
         """
         References:
@@ -474,7 +458,7 @@ class UserAccount(ForensicArtifact):
                     }
 
                     try:
-                        yield SamRecord(**parsed_data)
+                        yield self.build_record(SamRecord, parsed_data)
                     except ValidationError as e:
                         self.log_error(e)
                         continue
@@ -512,7 +496,7 @@ class UserAccount(ForensicArtifact):
                     }
 
                     try:
-                        yield ProfileListRecord(**parsed_data)
+                        yield self.build_record(ProfileListRecord, parsed_data)
                     except ValidationError as e:
                         self.log_error(e)
                         continue
@@ -48,6 +48,7 @@ class UserAssistRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.REG_USERASSIST.value
+        sort_key: str = "ts"
 
 
 class UserAssist(ForensicArtifact):
@@ -56,19 +57,9 @@ class UserAssist(ForensicArtifact):
 
     def parse(self, descending: bool = False):
         try:
-            userassist = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.userassist())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
+            self.collect(self.userassist(), key="ts", descending=descending)
         except Exception as e:
             self.log_error(e)
-            return
-
-        self.records.append(userassist)
 
     def userassist(self):
         """Return the UserAssist information for each user.
@@ -156,7 +147,7 @@ class UserAssist(ForensicArtifact):
                             }
 
                             try:
-                                yield UserAssistRecord(**parsed_data)
+                                yield self.build_record(UserAssistRecord, parsed_data)
                             except ValidationError as e:
                                 self.log_error(e)
                                 continue
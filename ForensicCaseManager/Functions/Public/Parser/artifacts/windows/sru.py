@@ -6,7 +6,7 @@ from pydantic import ValidationError
 from dissect.esedb.tools.sru import SRU as SRUParser
 from dissect.target.plugins.os.windows.sru import FIELD_MAPPINGS, TRANSFORMS
 
-from core.forensic_artifact import Source, ArtifactRecord, ForensicArtifact
+from core.forensic_artifact import Source, ArtifactRecord, ArtifactRow, ForensicArtifact
 from settings.tables import Tables
 from settings.artifact_schema import ArtifactSchema
 
@@ -30,6 +30,7 @@ class SruNetworkRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.WIN_SRU_NETWORK.value
+        sort_key: str = "ts"
 
 
 class SruApplicationRecord(ArtifactRecord):
@@ -57,6 +58,7 @@ class SruApplicationRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.WIN_SRU_APPLICATION.value
+        sort_key: str = "ts"
 
 
 class SRU(ForensicArtifact):
@@ -67,17 +69,17 @@ class SRU(ForensicArtifact):
         pass
 
     def _process_records(
-        self, record_generator: Generator, record_class: ArtifactRecord
-    ) -> Generator:
+        self, record_generator: Generator, record_class: type[ArtifactRecord]
+    ) -> Generator[ArtifactRow, None, None]:
         """
         Process records based on the specified type and record class.
 
         Args:
         record_generator (Generator): The generator of the record.
-        record_class (ArtifactRecord): The class of the record.
+        record_class (type[ArtifactRecord]): The class of the record.
 
         Yields:
-        Generator: Yields instances of the specified record class.
+        ArtifactRow: Yields rows of the specified record class.
         """
         for record in record_generator:
             processed_record = {
@@ -88,7 +90,7 @@ class SRU(ForensicArtifact):
             ] = self.evidence_id  # Set evidence_id for each record
 
             try:
-                yield record_class(**processed_record)
+                yield self.build_record(record_class, processed_record)
             except ValidationError as e:
                 self.log_error(e)
                 continue
@@ -162,6 +164,13 @@ class SRU(ForensicArtifact):
                 columns = columns[1:]
 
                 for entry in db.get_table_entries(table=table):
+                    # skip entries outside the time window before decoding their
+                    # other columns. Tables are in AutoIncId order, TimeStamp
+                    # can go back (clock changes, late provider flushes)
+                    ts = entry["TimeStamp"]
+                    if not self.time_window.contains(ts):
+                        continue
+
                     values = (entry[name] for name in columns)
                     column_values = zip(columns, values)
 
@@ -186,19 +195,9 @@ class SruNetwork(SRU):
 
     def parse(self, descending: bool = False):
         try:
-            sru_network = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.sru_network())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
+            self.collect(self.sru_network(), key="ts", descending=descending)
         except Exception as e:
             self.log_error(e)
-            sru_network = []
-        finally:
-            self.records.append(sru_network)
 
     def _combined_network(self):
         """
@@ -226,19 +225,9 @@ class SruApplication(SRU):
 
     def parse(self, descending: bool = False):
         try:
-            sru_application = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.sru_application())
-                ),
-                key=lambda record: record.ts,
-                reverse=descending,
-            )
+            self.collect(self.sru_application(), key="ts", descending=descending)
         except Exception as e:
             self.log_error(e)
-            sru_application = []
-        finally:
-            self.records.append(sru_application)
 
     def sru_application(self):
         """
@@ -31,6 +31,7 @@ class ThumbcacheRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.WIN_THUMBCACHE.value
+        sort_key: str = "identifier"
 
 
 class ThumbcacheParser:
@@ -101,19 +102,11 @@ class Thumbcache(ForensicArtifact):
 
     def parse(self, descending: bool = False) -> None:
         try:
-            thumbcache = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self._combined_thumbcache())
-                ),
-                key=lambda record: record.identifier,
-                reverse=descending,
+            self.collect(
+                self._combined_thumbcache(), key="identifier", descending=descending
             )
         except Exception as e:
             self.log_error(e)
-            thumbcache = []
-        finally:
-            self.records.append(thumbcache)
 
     def _create_entries(self, cache: ThumbcacheParser) -> Iterator[dict]:
         for path, entry in cache.entries():
@@ -132,7 +125,7 @@ class Thumbcache(ForensicArtifact):
             }
 
             try:
-                yield ThumbcacheRecord(**parsed_data)
+                yield self.build_record(ThumbcacheRecord, parsed_data)
             except ValidationError as e:
                 logger.error(e)
                 return
@@ -153,7 +146,7 @@ class Thumbcache(ForensicArtifact):
             }
 
             try:
-                yield ThumbcacheRecord(**parsed_data)
+                yield self.build_record(ThumbcacheRecord, parsed_data)
             except ValidationError as e:
                 logger.error(e)
                 return
@@ -45,6 +45,7 @@ class WindowsTimelineRecord(ArtifactRecord):
 
     class Config:
         table_name: str = Tables.WIN_WINDOWSTIMELINE.value
+        sort_key: str = "start_time"
 
 
 class WindowsTimeline(ForensicArtifact):
@@ -96,18 +97,11 @@ class WindowsTimeline(ForensicArtifact):
         """
 
         try:
-            windows_timeline = sorted(
-                (
-                    self.validate_record(index=index, record=record)
-                    for index, record in enumerate(self.windows_timeline())
-                ),
-                key=lambda record: record.start_time,
+            self.collect(
+                self.windows_timeline(), key="start_time", descending=descending
             )
         except Exception as e:
             self.log_error(e)
-            windows_timeline = []
-        finally:
-            self.records.append(windows_timeline)
 
     def windows_timeline(self) -> Generator[dict, None, None]:
         for entry in self.check_empty_entry(self.iter_entry(recurse=True)):
@@ -147,7 +141,7 @@ class WindowsTimeline(ForensicArtifact):
                     }
 
                     try:
-                        yield WindowsTimelineRecord(**parsed_data)
+                        yield self.build_record(WindowsTimelineRecord, parsed_data)
                     except ValidationError as e:
                         self.log_error(e)
                         continue
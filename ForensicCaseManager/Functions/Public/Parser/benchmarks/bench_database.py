@@ -0,0 +1,180 @@
+"""Benchmark of artifact record insertion into the case database.
+
+Compares the legacy write path (model instances converted through `model_dump()`,
+a fresh connection and commit per batch, default PRAGMAs) with the persistent
+connection + bulk ingest profile used through the DatabaseWriter, on a synthetic
+artifact, for one or more batch sizes. The DatabaseWriter is also run with the
+default PRAGMAs, to tell the share of the PRAGMA profile apart.
+
+Usage (from the Parser directory):
+    python -m benchmarks.bench_database --rows 1000000 --batch-size 100 1000 10000
+"""
+
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+from pathlib import Path
+from functools import partial
+from typing import Callable, Generator, Optional
+from datetime import datetime, timedelta, timezone
+
+from core.forensic_artifact import ArtifactRecord, ArtifactRow, construct_row
+from core.database_manager import DatabaseManager
+from core.database_writer import DatabaseWriter
+from settings.config import DEFAULT_BATCH_SIZE
+
+
+class BenchmarkRecord(ArtifactRecord):
+    """Synthetic record shaped like a UsnJrnl record."""
+
+    ts: Optional[datetime]
+    segment: Optional[str]
+    path: Optional[str]
+    usn: Optional[int]
+    reason: Optional[str]
+    attr: Optional[str]
+    source: Optional[str]
+    security_id: Optional[int]
+    major: Optional[int]
+    minor: Optional[int]
+
+    class Config:
+        table_name: str = "bench_usnjrnl"
+
+
+def synthetic_batches(
+    rows: int, batch_size: int, convert: Callable = lambda row: row
+) -> Generator[list, None, None]:
+    """Yield batches of a synthetic artifact.
+
+    A single batch is built (and converted) once and yielded repeatedly, so that
+    record creation is not part of the measurement.
+    """
+    record = [convert(row) for row in synthetic_records(batch_size)]
+    for start in range(0, rows, batch_size):
+        yield record[: rows - start]
+
+
+def synthetic_records(rows: int) -> Generator[ArtifactRow, None, None]:
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for index in range(rows):
+        yield construct_row(
+            BenchmarkRecord,
+            {
+                "ts": base + timedelta(microseconds=index),
+                "segment": f"{index % 500000}#{index % 7}",
+                "path": f"C:\\Users\\user\\AppData\\Local\\Temp\\file_{index}.tmp",
+                "usn": index * 96,
+                "reason": "DATA_EXTEND|CLOSE",
+                "attr": "ARCHIVE",
+                "source": "",
+                "security_id": index % 1024,
+                "major": 2,
+                "minor": 0,
+                "evidence_id": "benchmark-0",
+            },
+        )
+
+
+def legacy_row(record: ArtifactRecord) -> tuple[list[str], tuple]:
+    """Row conversion before the table schemas: `model_dump()`, lists as JSON and
+    datetimes left to the default sqlite3 adapter."""
+    data = {
+        key: (
+            json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in value])
+            if isinstance(value, list)
+            else value
+        )
+        for key, value in record.model_dump().items()
+    }
+    return list(data.keys()), tuple(data.values())
+
+
+def legacy_insert(database: Path, rows: int, batch_size: int) -> None:
+    """Write path before the persistent connection: model instances, converted one by
+    one, and connect/commit/close per statement."""
+    to_model = lambda row: BenchmarkRecord.model_construct(**row._asdict())
+    table_name = BenchmarkRecord.Config.table_name
+    # Optional annotations fell back to TEXT columns
+    columns = ", ".join(f"{name} TEXT" for name in BenchmarkRecord.model_fields)
+    create_statement = f"CREATE TABLE IF NOT EXISTS {table_name} ({columns})"
+    for record in synthetic_batches(rows, batch_size, to_model):
+        conn = sqlite3.connect(database)
+        conn.execute(create_statement)
+        conn.commit()
+        conn.close()
+
+        data = []
+        for model in record:
+            keys, values = legacy_row(model)
+            data.append(values)
+        placeholders = ", ".join(["?"] * len(keys))
+        insert_statement = (
+            f"INSERT INTO {table_name} ({', '.join(keys)}) VALUES ({placeholders})"
+        )
+        conn = sqlite3.connect(database)
+        conn.executemany(insert_statement, data)
+        conn.commit()
+        conn.close()
+
+
+def bulk_insert(
+    database: Path, rows: int, batch_size: int, pragmas: Optional[dict] = None
+) -> None:
+    """Current write path: writer thread on a persistent bulk ingest connection.
+
+    With `pragmas`, the connection uses them instead of the bulk ingest profile.
+    """
+    db_manager = (
+        DatabaseManager(database=database)
+        if pragmas is None
+        else DatabaseManager(database=database, pragmas=pragmas)
+    )
+    db_manager.create_processing_state_table()
+    with DatabaseWriter(db_manager=db_manager) as db_writer:
+        for record in synthetic_batches(rows, batch_size):
+            db_writer.write(
+                record=record, evidence_id="benchmark-0", artifact="benchmark"
+            )
+        db_writer.complete(evidence_id="benchmark-0", artifact="benchmark")
+    db_manager.finalize()
+
+
+def run(name: str, func: Callable, rows: int, batch_size: int, repeat: int) -> None:
+    """Time a write path, the best of `repeat` runs."""
+    elapsed = float("inf")
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            database = Path(directory) / "case.db"
+            start = time.perf_counter()
+            func(database, rows, batch_size)
+            elapsed = min(elapsed, time.perf_counter() - start)
+            size = database.stat().st_size / (1024 * 1024)
+    print(
+        f"{name:<8} {rows:>10} rows {batch_size:>8} batch {elapsed:>8.2f} s"
+        f" {rows / elapsed:>12.0f} rows/s {size:>8.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default=1000000, type=int)
+    parser.add_argument(
+        "--batch-size", default=[DEFAULT_BATCH_SIZE], type=int, nargs="+"
+    )
+    parser.add_argument("--repeat", default=3, type=int)
+    args = parser.parse_args()
+
+    for batch_size in args.batch_size:
+        run("legacy", legacy_insert, args.rows, batch_size, args.repeat)
+        # the writer without the bulk ingest PRAGMA profile, to tell its share apart
+        run(
+            "default",
+            partial(bulk_insert, pragmas={}),
+            args.rows,
+            batch_size,
+            args.repeat,
+        )
+        run("bulk", bulk_insert, args.rows, batch_size, args.repeat)
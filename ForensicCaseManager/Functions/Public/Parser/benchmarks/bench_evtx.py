@@ -0,0 +1,152 @@
+"""Benchmark of EVTX decoding through the EVTX engine.
+
+Decodes a synthetic Security log, built in-repo (see benchmarks.synthetic_evtx),
+for a consumer of a few EventIDs:
+  - rendered: every record rendered by dissect, then filtered by EventID
+  - serial: the engine in a single process, records prefiltered by EventID
+  - parallel: the engine with a pool of chunk workers
+and checks that all of them produce the same events, the engine ones in
+EventRecordID order.
+
+Usage (from the Parser directory):
+    python -m benchmarks.bench_evtx --chunks 4096 --workers 8 --event-ids 4624
+"""
+
+import os
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Generator, Optional
+
+from dissect.eventlog.evtx import Evtx
+
+from core.evtx_engine import EvtxEngine
+from benchmarks.synthetic_evtx import (
+    SECURITY_CHANNEL,
+    EVTX_CHUNK_SIZE,
+    EVENT_IDS,
+    write_evtx,
+)
+
+
+class BenchmarkConsumer:
+    """Stands in for an event log artifact, keeps (EventRecordID, EventID) rows."""
+
+    channel = SECURITY_CHANNEL
+
+    def __init__(self, log_file: Path, event_ids: Optional[frozenset[int]]):
+        self.log_file = log_file
+        self.event_ids = event_ids
+        self.errors = 0
+
+    def log_files(self) -> list[Path]:
+        return [self.log_file]
+
+    def read_event(self, event: dict) -> Generator[tuple, None, None]:
+        yield (
+            event.get("EventRecordID"),
+            event.get("EventID"),
+            event.get("TimeCreated_SystemTime").value,
+        )
+
+    def finish(self):
+        return ()
+
+    def log_error(self, e: Exception) -> None:
+        self.errors += 1
+
+
+def render(
+    log_file: Path, event_ids: Optional[frozenset[int]]
+) -> tuple[list[tuple], float]:
+    """Decoding before the engine: render every record, then filter."""
+    consumer = BenchmarkConsumer(log_file, event_ids)
+
+    start = time.perf_counter()
+    rows = []
+    with log_file.open("rb") as fh:
+        for event in Evtx(fh=fh):
+            if event_ids is None or event.get("EventID") in event_ids:
+                rows.extend(consumer.read_event(event))
+    return rows, time.perf_counter() - start
+
+
+def decode(
+    log_file: Path, event_ids: Optional[frozenset[int]], workers: int
+) -> tuple[list[tuple], float]:
+    consumer = BenchmarkConsumer(log_file, event_ids)
+    engine = EvtxEngine(workers=workers)
+    engine.register(consumer)
+
+    start = time.perf_counter()
+    rows = engine.rows(consumer)
+    elapsed = time.perf_counter() - start
+
+    if consumer.errors:
+        raise SystemExit(f"{consumer.errors} events failed to decode")
+    return rows, elapsed
+
+
+def report(name: str, rows: list, elapsed: float, baseline: float) -> None:
+    print(
+        f"{name:<16} {elapsed:8.2f}s {len(rows) / elapsed:>10,.0f} events/s"
+        f" ({baseline / elapsed:.1f}x)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--event-ids",
+        default="4624",
+        help=f"comma separated EventIDs to keep, or 'all' (log has {EVENT_IDS})",
+    )
+    parser.add_argument(
+        "--wrap",
+        type=int,
+        default=None,
+        help="rotate the chunks like a wrapped log (default: a third of them)",
+    )
+    args = parser.parse_args()
+    wrap = args.chunks // 3 if args.wrap is None else args.wrap
+    event_ids = (
+        None
+        if args.event_ids == "all"
+        else frozenset(int(event_id) for event_id in args.event_ids.split(","))
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_file = Path(directory) / "Security.evtx"
+
+        start = time.perf_counter()
+        records = write_evtx(log_file, chunks=args.chunks, wrap=wrap)
+        size = args.chunks * EVTX_CHUNK_SIZE / 1024 / 1024
+        print(
+            f"synthetic log: {args.chunks} chunks ({size:.0f} MiB), {records} records,"
+            f" built in {time.perf_counter() - start:.1f}s"
+        )
+
+        rendered, rendered_elapsed = render(log_file, event_ids)
+        report("rendered", rendered, rendered_elapsed, rendered_elapsed)
+
+        serial, serial_elapsed = decode(log_file, event_ids, workers=1)
+        report("serial", serial, serial_elapsed, rendered_elapsed)
+
+        parallel, parallel_elapsed = decode(log_file, event_ids, workers=args.workers)
+        report(
+            f"parallel ({args.workers})", parallel, parallel_elapsed, rendered_elapsed
+        )
+
+    if sorted(rendered) != serial or serial != parallel:
+        raise SystemExit("engine events differ from the rendered ones")
+    print(
+        f"{len(serial)} of {records} events kept,"
+        " the same for all, in EventRecordID order"
+    )
+
+
+if __name__ == "__main__":
+    main()
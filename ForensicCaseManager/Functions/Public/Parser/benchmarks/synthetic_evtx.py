@@ -0,0 +1,291 @@
+"""Synthetic EVTX files for the event log benchmarks.
+
+Builds Security-like logon events as real BinXML: the first record of every chunk
+defines the event template inline, the following records only reference it and
+carry their substitution values, like the logs written by Windows. As in those,
+the provider, channel and computer are literals of the template.
+
+Chunk headers carry their checksum, which the carver checks. The file header
+checksum and the records checksum are left empty, dissect doesn't verify them.
+"""
+
+import zlib
+import struct
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+EVTX_HEADER_BLOCK_SIZE = 0x1000
+EVTX_CHUNK_SIZE = 0x10000
+EVTX_CHUNK_HEADER_SIZE = 0x200
+EVTX_RECORD_HEADER_SIZE = 24
+
+SECURITY_CHANNEL = "Security"
+SECURITY_PROVIDER = "Microsoft-Windows-Security-Auditing"
+COMPUTER_NAME = "WORKSTATION-01"
+EVENT_IDS = (4624, 4625, 4634, 4647, 4648, 4672, 4688, 4720)
+
+# BinXML tokens and value types
+TOKEN_END = 0x00
+TOKEN_START_ELEMENT = 0x01
+TOKEN_CLOSE_START_ELEMENT = 0x02
+TOKEN_CLOSE_EMPTY_ELEMENT = 0x03
+TOKEN_END_ELEMENT = 0x04
+TOKEN_VALUE = 0x05
+TOKEN_ATTRIBUTE = 0x06
+TOKEN_TEMPLATE_INSTANCE = 0x0C
+TOKEN_OPTIONAL_SUBSTITUTION = 0x0E
+TOKEN_FRAGMENT_HEADER = 0x0F
+FLAG_MORE = 0x40
+
+TYPE_STRING = 0x01
+TYPE_UINT16 = 0x06
+TYPE_UINT32 = 0x08
+TYPE_UINT64 = 0x0A
+TYPE_FILETIME = 0x11
+
+FRAGMENT_HEADER = bytes([TOKEN_FRAGMENT_HEADER, 1, 1, 0])
+TEMPLATE_GUID = bytes(range(16))
+# template references carry the first 4 bytes of the template GUID
+TEMPLATE_ID = int.from_bytes(TEMPLATE_GUID[:4], "little")
+
+# (name, value type) of the substitutions, in template order
+SUBSTITUTIONS = (
+    ("EventID", TYPE_UINT16),
+    ("TimeCreated_SystemTime", TYPE_FILETIME),
+    ("EventRecordID", TYPE_UINT64),
+    ("SubjectUserSid", TYPE_STRING),
+    ("TargetUserName", TYPE_STRING),
+    ("TargetDomainName", TYPE_STRING),
+    ("LogonType", TYPE_UINT32),
+    ("IpAddress", TYPE_STRING),
+)
+EVENT_DATA = SUBSTITUTIONS[3:]
+
+FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+
+class BinXmlWriter:
+    """Writes BinXML at a known offset of its chunk, names are stored inline."""
+
+    def __init__(self, offset: int):
+        self.offset = offset
+        self.data = bytearray()
+
+    @property
+    def position(self) -> int:
+        return self.offset + len(self.data)
+
+    def pack(self, fmt: str, *values) -> None:
+        self.data += struct.pack(fmt, *values)
+
+    def name(self, name: str) -> None:
+        # the name follows its own offset
+        self.pack("<I", self.position + 4)
+        self.pack("<IHH", 0, 0, len(name))
+        self.data += name.encode("utf-16-le") + b"\x00\x00"
+
+    def element(
+        self,
+        name: str,
+        attributes: tuple = (),
+        children: tuple = (),
+        content=None,
+    ) -> None:
+        """Write an element with `(name, value)` attributes and either child elements
+        or a value as content, where an int value is a substitution."""
+        self.pack("<B", TOKEN_START_ELEMENT | (FLAG_MORE if attributes else 0))
+        self.pack("<HI", 0xFFFF, 0)
+        self.name(name)
+        if attributes:
+            size_offset = len(self.data)
+            self.pack("<I", 0)
+            for attribute, value in attributes:
+                self.pack("<B", TOKEN_ATTRIBUTE)
+                self.name(attribute)
+                self.value(value)
+            struct.pack_into(
+                "<I", self.data, size_offset, len(self.data) - size_offset - 4
+            )
+
+        if not children and content is None:
+            self.pack("<B", TOKEN_CLOSE_EMPTY_ELEMENT)
+            return
+
+        self.pack("<B", TOKEN_CLOSE_START_ELEMENT)
+        if content is not None:
+            self.value(content)
+        for child in children:
+            self.element(*child)
+        self.pack("<B", TOKEN_END_ELEMENT)
+
+    def value(self, value) -> None:
+        if isinstance(value, int):
+            self.pack(
+                "<BHB", TOKEN_OPTIONAL_SUBSTITUTION, value, SUBSTITUTIONS[value][1]
+            )
+        else:
+            self.pack("<BBH", TOKEN_VALUE, TYPE_STRING, len(value))
+            self.data += value.encode("utf-16-le")
+
+    def template(self) -> None:
+        """Write the definition of the logon event template."""
+        self.pack("<I16sI", 0, TEMPLATE_GUID, 0)
+        size_offset = len(self.data) - 4
+        self.data += FRAGMENT_HEADER
+        self.element(
+            "Event",
+            children=(
+                (
+                    "System",
+                    (),
+                    (
+                        ("Provider", (("Name", SECURITY_PROVIDER),)),
+                        ("EventID", (), (), 0),
+                        ("TimeCreated", (("SystemTime", 1),)),
+                        ("EventRecordID", (), (), 2),
+                        ("Channel", (), (), SECURITY_CHANNEL),
+                        ("Computer", (), (), COMPUTER_NAME),
+                    ),
+                ),
+                (
+                    "EventData",
+                    (),
+                    tuple(
+                        ("Data", (("Name", name),), (), index)
+                        for index, (name, _) in enumerate(EVENT_DATA, start=3)
+                    ),
+                ),
+            ),
+        )
+        self.pack("<B", TOKEN_END)
+        struct.pack_into("<I", self.data, size_offset, len(self.data) - size_offset - 4)
+
+
+def encode_value(value_type: int, value) -> bytes:
+    if value_type == TYPE_STRING:
+        return value.encode("utf-16-le")
+    if value_type == TYPE_FILETIME:
+        return struct.pack(
+            "<Q", (value - FILETIME_EPOCH) // timedelta(microseconds=1) * 10
+        )
+    return struct.pack(
+        {TYPE_UINT16: "<H", TYPE_UINT32: "<I", TYPE_UINT64: "<Q"}[value_type], value
+    )
+
+
+def event_values(record_id: int, base: datetime) -> tuple:
+    return (
+        EVENT_IDS[record_id % len(EVENT_IDS)],
+        base + timedelta(seconds=record_id),
+        record_id,
+        "S-1-5-18",
+        f"user{record_id % 97}",
+        "CORP",
+        (2, 3, 10, 11)[record_id % 4],
+        f"10.0.{record_id % 256}.{record_id % 251}",
+    )
+
+
+def build_record(
+    record_id: int, offset: int, template: Optional[int], base: datetime
+) -> tuple[bytes, int]:
+    """Return a record at chunk `offset` and the offset of its template definition."""
+    writer = BinXmlWriter(offset + EVTX_RECORD_HEADER_SIZE)
+    writer.data += FRAGMENT_HEADER
+    writer.pack("<B", TOKEN_TEMPLATE_INSTANCE)
+    if template is None:
+        template = writer.position + 9
+        writer.pack("<BII", 1, TEMPLATE_ID, template)
+        writer.template()
+    else:
+        writer.pack("<BII", 1, TEMPLATE_ID, template)
+
+    values = [
+        encode_value(value_type, value)
+        for (_, value_type), value in zip(SUBSTITUTIONS, event_values(record_id, base))
+    ]
+    writer.pack("<I", len(values))
+    for (_, value_type), value in zip(SUBSTITUTIONS, values):
+        writer.pack("<HBB", len(value), value_type, 0)
+    for value in values:
+        writer.data += value
+    writer.pack("<B", TOKEN_END)
+
+    size = EVTX_RECORD_HEADER_SIZE + len(writer.data) + 4
+    time_written = struct.unpack("<Q", values[1])[0]
+    record = (
+        struct.pack("<IIQQ", 0x2A2A, size, record_id, time_written)
+        + writer.data
+        + struct.pack("<I", size)
+    )
+    return record, template
+
+
+def build_chunk(first_record_id: int, base: datetime) -> tuple[bytes, int]:
+    """Return a full chunk starting at `first_record_id` and its number of records."""
+    records = bytearray()
+    template = None
+    record_id = first_record_id
+    last_record_offset = EVTX_CHUNK_HEADER_SIZE
+    while True:
+        offset = EVTX_CHUNK_HEADER_SIZE + len(records)
+        record, template = build_record(record_id, offset, template, base)
+        if offset + len(record) > EVTX_CHUNK_SIZE:
+            break
+        records += record
+        last_record_offset = offset
+        record_id += 1
+
+    count = record_id - first_record_id
+    header = struct.pack(
+        "<8s4Q4I",
+        b"ElfChnk\x00",
+        first_record_id,
+        record_id - 1,
+        first_record_id,
+        record_id - 1,
+        0x80,
+        last_record_offset,
+        EVTX_CHUNK_HEADER_SIZE + len(records),
+        0,
+    )
+    header = header.ljust(EVTX_CHUNK_HEADER_SIZE, b"\x00")
+    checksum = zlib.crc32(header[128:], zlib.crc32(header[:120]))
+    header = header[:124] + struct.pack("<I", checksum) + header[128:]
+    return (header + records).ljust(EVTX_CHUNK_SIZE, b"\x00"), count
+
+
+def write_evtx(path: Path, chunks: int, wrap: int = 0) -> int:
+    """Write a synthetic Security log of `chunks` chunks and return its record count.
+
+    With `wrap`, the chunks are rotated by as many positions, like a log which
+    overwrote its oldest chunks.
+    """
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    record_id = 1
+    with path.open("wb") as fh:
+        for index in range(chunks):
+            chunk, count = build_chunk(record_id, base)
+            fh.seek(EVTX_HEADER_BLOCK_SIZE + (index - wrap) % chunks * EVTX_CHUNK_SIZE)
+            fh.write(chunk)
+            record_id += count
+
+        header = struct.pack(
+            "<8sQQQIHHHH76sII",
+            b"ElfFile\x00",
+            0,
+            chunks - 1,
+            record_id,
+            0x80,
+            1,
+            3,
+            EVTX_HEADER_BLOCK_SIZE,
+            chunks,
+            b"",
+            0,
+            0,
+        )
+        fh.seek(0)
+        fh.write(header.ljust(EVTX_HEADER_BLOCK_SIZE, b"\x00"))
+    return record_id - 1
@@ -0,0 +1,154 @@
+import logging
+from pathlib import Path
+from queue import Queue
+from functools import partial
+from typing import Optional
+from dataclasses import dataclass, field
+
+from core.forensic_artifact import Source, ForensicArtifact
+from core.parse_cache import ParseCache
+from core.evtx_engine import get_evtx_engine
+from core.time_window import TimeWindow
+from settings.artifacts import Artifacts
+from settings.artifact_schema import ArtifactSchema
+from settings.config import LOG_FORMAT
+from util.batch import batched
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(kw_only=True)
+class ArtifactTask:
+    """Picklable description of the artifacts to parse in a worker process.
+
+    A task holds a single artifact, or the artifacts of a group which share a
+    parsing pass (e.g. the event logs), as `(name, category)` pairs.
+    """
+
+    evidence: str
+    evidence_id: str
+    artifacts: list[tuple[str, int]]
+    streaming: bool
+    batch_size: int
+    evtx_workers: int = 1
+    host: Optional[str] = None
+    incremental_evtx: bool = False
+    evtx_watermarks: dict[tuple[str, str], int] = field(default_factory=dict)
+    usn_workers: int = 1
+    sort_records: bool
+    parse_cache_directory: Optional[Path] = None
+    validation: str
+    sample_rate: int
+    time_window: TimeWindow = TimeWindow()
+    descending: bool = False
+
+    @property
+    def name(self) -> str:
+        return ",".join(name for name, _ in self.artifacts)
+
+
+def init_worker(log_file: Path) -> None:
+    """Configure logging of a worker process (spawned processes start unconfigured)."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=LOG_FORMAT,
+        filename=log_file,
+        encoding="utf-8",
+    )
+
+
+def parse_artifact(task: ArtifactTask, queue: Queue) -> None:
+    """Parse the artifacts of a task and put their records on `queue`, batch by batch.
+
+    Batches are put as `(evidence_id, name, records)` so that the writer can tell the
+    evidences apart when several of them are processed at once, followed by
+    `(evidence_id, name, None)` once an artifact is completely parsed without errors.
+
+    dissect targets can't be pickled, so every worker opens the evidence itself, once
+    for all its tasks (see `open_target()`); the state shared by the artifacts of a
+    task (`Source.shared`) is fresh for every task.
+    The parent process is the only writer of the case database. `None` is always
+    put on the queue when the worker is done, even if parsing failed.
+    """
+    try:
+        src = Source(_evidence=task.evidence)
+        get_evtx_engine(src).workers = task.evtx_workers
+        get_evtx_engine(src).time_window = task.time_window
+        get_evtx_engine(src).host = task.host
+        get_evtx_engine(src).incremental = task.incremental_evtx
+        get_evtx_engine(src).watermarks = task.evtx_watermarks
+        if task.streaming:
+            get_evtx_engine(src).export = partial(put_rows, queue, task.evidence_id)
+            get_evtx_engine(src).batch_size = task.batch_size
+        src.shared["usn_workers"] = task.usn_workers
+        forensic_artifacts = [
+            forensic_artifact
+            for name, category in task.artifacts
+            if (forensic_artifact := create_artifact(src, task, name, category))
+        ]
+        for forensic_artifact in forensic_artifacts:
+            forensic_artifact.prepare()
+
+        for forensic_artifact in forensic_artifacts:
+            try:
+                export_artifact(forensic_artifact, task, queue)
+            except Exception as e:
+                logger.exception(
+                    f"{task.evidence_id}:{forensic_artifact.name} - worker failed: {e}"
+                )
+    except Exception as e:
+        logger.exception(f"{task.evidence_id}:{task.name} - worker failed: {e}")
+    finally:
+        queue.put(None)
+
+
+def put_rows(
+    queue: Queue, evidence_id: str, forensic_artifact: ForensicArtifact, rows: list
+) -> None:
+    """Put a batch of rows of an artifact on `queue`, see `parse_artifact()`."""
+    queue.put((evidence_id, forensic_artifact.name, rows))
+
+
+def create_artifact(
+    src: Source, task: ArtifactTask, name: str, category: int
+) -> Optional[ForensicArtifact]:
+    for Artifact in Artifacts:
+        artifact_name, artifact_category, ForensicArtifact = Artifact.value
+        if artifact_name == name and artifact_category == category:
+            break
+    else:
+        logger.error(f"{task.evidence_id}:{name} - unknown artifact")
+        return None
+
+    forensic_artifact = ForensicArtifact(
+        src=src,
+        schema=ArtifactSchema(name=name, category=category),
+    )
+    forensic_artifact.evidence_id = task.evidence_id
+    forensic_artifact.streaming = task.streaming
+    forensic_artifact.sort_records = task.sort_records
+    if task.parse_cache_directory:
+        forensic_artifact.parse_cache = ParseCache(directory=task.parse_cache_directory)
+    forensic_artifact.validation = task.validation
+    forensic_artifact.sample_rate = task.sample_rate
+    forensic_artifact.time_window = task.time_window
+    return forensic_artifact
+
+
+def export_artifact(
+    forensic_artifact: ForensicArtifact, task: ArtifactTask, queue: Queue
+) -> None:
+    forensic_artifact.parse(descending=task.descending)
+
+    name = forensic_artifact.name
+    batch_size = max(task.batch_size, forensic_artifact.min_batch_size or 0)
+    for records in forensic_artifact.records:
+        try:
+            for record in batched(records, batch_size):
+                queue.put((task.evidence_id, name, record))
+        except Exception as e:
+            forensic_artifact.log_export_error(e)
+    forensic_artifact.log_validation_summary()
+    forensic_artifact.records.clear()
+    if not forensic_artifact.export_errors:
+        queue.put((task.evidence_id, name, None))
@@ -1,9 +1,20 @@
 import logging
 from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 from core.database_manager import DatabaseManager
-from settings.config import DATABASE_NAME
+from core.database_writer import DatabaseWriter
+from core.time_window import TimeWindow
+from settings.config import (
+    DATABASE_NAME,
+    LOGFILE_NAME,
+    PARSE_CACHE_DIRECTORY,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_VALIDATION,
+    VALIDATION_SAMPLE_RATE,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -12,11 +23,32 @@ logger = logging.getLogger(__name__)
 class CaseConfig:
     session_id: str
     case_directory: Path
+    streaming: bool = False
+    batch_size: int = DEFAULT_BATCH_SIZE
+    workers: int = 1
+    evtx_workers: int = 1
+    incremental_evtx: bool = False
+    usn_workers: int = 1
+    sort_records: bool = True
+    parse_cache: bool = False
+    validation: str = DEFAULT_VALIDATION
+    sample_rate: int = VALIDATION_SAMPLE_RATE
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
     case_name: str = field(init=False)
     database: Path = field(init=False)
+    log_file: Path = field(init=False)
+    parse_cache_directory: Optional[Path] = field(init=False)
+    time_window: TimeWindow = field(init=False)
     db_manager: DatabaseManager = field(init=False)
+    db_writer: Optional[DatabaseWriter] = field(init=False, default=None)
 
     def __post_init__(self):
         self.case_name = self.case_directory.name
         self.database = self.case_directory / DATABASE_NAME
+        self.log_file = self.case_directory / LOGFILE_NAME
+        self.parse_cache_directory = (
+            self.case_directory / PARSE_CACHE_DIRECTORY if self.parse_cache else None
+        )
+        self.time_window = TimeWindow(since=self.since, until=self.until)
         self.db_manager = DatabaseManager(database=self.database)
@@ -1,43 +1,148 @@
 import sqlite3
-import json
 import logging
-from typing import Generator, get_type_hints
+import threading
+from typing import Generator, Optional
 from contextlib import contextmanager
-from datetime import datetime
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-from core.forensic_artifact import ArtifactRecord, ArtifactRecord
+from core.forensic_artifact import ArtifactRow
+from core.table_schema import get_record_schema, record_schemas
+from settings.tables import Tables
 from settings.config import (
     TABLE_NAME_FORENSIC_CASE,
     TABLE_NAME_EVIDENCES,
     TABLE_NAME_ARTIFACT_CATEGORY,
+    TABLE_NAME_PROCESSING_STATE,
+    PRAGMAS_BULK_INGEST,
+    PRAGMAS_FINALIZE,
 )
 
 logger = logging.getLogger(__name__)
 
 
-@contextmanager
-def open_db(db_path: Path):
-    try:
-        conn = sqlite3.connect(db_path)
-        yield conn.cursor()
-    except Exception as e:
-        logger.error(f"Error: connect to database {db_path} / failed: {e}")
-    finally:
-        conn.commit()
-        conn.close()
+def apply_pragmas(conn: sqlite3.Connection, pragmas: dict) -> None:
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name}={value}")
 
 
 @dataclass(kw_only=True)
 class DatabaseManager:
     database: Path
+    pragmas: dict = field(default_factory=lambda: dict(PRAGMAS_BULK_INGEST))
+    _local: threading.local = field(init=False, default_factory=threading.local)
+    _connections: list[sqlite3.Connection] = field(init=False, default_factory=list)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+    _deferred_indexes: list[str] = field(init=False, default_factory=list)
 
     def __post_init__(self):
         pass
 
+    def connection(self) -> sqlite3.Connection:
+        """Return the persistent connection of the calling thread.
+
+        sqlite3 connections can't be shared between threads, so every thread gets its
+        own connection, opened once with the bulk ingest PRAGMA profile.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.database)
+            apply_pragmas(conn, self.pragmas)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def open_db(self):
+        conn = self.connection()
+        try:
+            yield conn.cursor()
+        except Exception as e:
+            logger.error(f"Error: connect to database {self.database} / failed: {e}")
+        finally:
+            conn.commit()
+
+    def disconnect(self) -> None:
+        """Close the connection of the calling thread."""
+        if (conn := getattr(self._local, "conn", None)) is None:
+            return
+        conn.commit()
+        conn.close()
+        self._local.conn = None
+        with self._lock:
+            self._connections.remove(conn)
+
+    def close(self) -> None:
+        """Close the connections of all threads."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.commit()
+            conn.close()
+        self._local = threading.local()
+
+    def finalize(self, vacuum: bool = False) -> None:
+        """Optimize the database once all artifacts are written.
+
+        Creates the sort key indexes of all the artifact tables of the database,
+        including the ones written by interrupted sessions (building an index once is
+        cheaper than maintaining it during the ingest), updates the query planner
+        statistics, optionally rebuilds the database file and switches back to a
+        single-file rollback journal for readers of `case.db`.
+        """
+        self.close()
+        conn = self.connection()
+        try:
+            self.create_deferred_indexes(conn)
+            conn.execute("ANALYZE")
+            conn.commit()
+            if vacuum:
+                conn.execute("VACUUM")
+            apply_pragmas(conn, PRAGMAS_FINALIZE)
+        except Exception as e:
+            logger.exception(f"Failed to finalize database {self.database}: {e}")
+        finally:
+            self.close()
+
+    def create_deferred_indexes(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            statements, self._deferred_indexes = self._deferred_indexes, []
+        for statement in self.existing_table_indexes(conn):
+            if statement not in statements:
+                statements.append(statement)
+        for statement in statements:
+            try:
+                conn.execute(statement)
+            except Exception as e:
+                logger.exception(f"Failed to create index ({statement}): {e}")
+        conn.commit()
+
+    def existing_table_indexes(self, conn: sqlite3.Connection) -> list[str]:
+        """Return the sort key index statements of the artifact tables in the database.
+
+        Tables created by a previous session are only known from the database, e.g.
+        on `--resume` after a crash, when the tables of finished units are skipped.
+        """
+        try:
+            tables = {
+                name
+                for (name,) in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type='table'"
+                )
+            }
+        except Exception as e:
+            logger.exception(f"Failed to list the tables of {self.database}: {e}")
+            return []
+        return [
+            statement
+            for table_name, schema in record_schemas().items()
+            if table_name in tables
+            for statement in schema.index_statements
+        ]
+
     def is_table_exist(self, table_name: str) -> bool:
-        with open_db(self.database) as cursor:
+        with self.open_db() as cursor:
             cursor.execute(
                 """
             SELECT name
@@ -51,7 +156,7 @@ class DatabaseManager:
     # create/insert forensic_case table
     def create_forensic_case_table(self):
         if not self.is_table_exist(TABLE_NAME_FORENSIC_CASE):
-            with open_db(self.database) as cursor:
+            with self.open_db() as cursor:
                 cursor.execute(
                     f"""
                 CREATE TABLE IF NOT EXISTS {TABLE_NAME_FORENSIC_CASE} (
@@ -69,10 +174,10 @@ class DatabaseManager:
         case_name: str,
         case_directory: str,
     ) -> bool:
-        with open_db(self.database) as cursor:
+        with self.open_db() as cursor:
             cursor.execute(
                 f"""
-            INSERT INTO {TABLE_NAME_FORENSIC_CASE} (id, case_name, case_directory)
+            INSERT OR IGNORE INTO {TABLE_NAME_FORENSIC_CASE} (id, case_name, case_directory)
             VALUES (?, ?, ?)
             """,
                 (
@@ -83,9 +188,24 @@ class DatabaseManager:
             )
             return True
 
+    def latest_session_id(self) -> Optional[str]:
+        """Return the id of the last session of the case, if any."""
+        if not self.is_table_exist(TABLE_NAME_FORENSIC_CASE):
+            return None
+        with self.open_db() as cursor:
+            cursor.execute(
+                f"""
+            SELECT id FROM {TABLE_NAME_FORENSIC_CASE}
+            ORDER BY created_at DESC, rowid DESC
+            LIMIT 1
+            """
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
     # create/insert evidences table
     def create_evidences_table(self):
-        with open_db(self.database) as cursor:
+        with self.open_db() as cursor:
             cursor.execute(
                 f"""
             CREATE TABLE IF NOT EXISTS {TABLE_NAME_EVIDENCES} (
@@ -111,10 +231,10 @@ class DatabaseManager:
         session_id: str,
         evidence_number: int,
     ) -> bool:
-        with open_db(self.database) as cursor:
+        with self.open_db() as cursor:
             cursor.execute(
                 f"""
-            INSERT INTO {TABLE_NAME_EVIDENCES} (
+            INSERT OR IGNORE INTO {TABLE_NAME_EVIDENCES} (
                 id,
                 evidence_label, 
                 computer_name, 
@@ -136,9 +256,150 @@ class DatabaseManager:
             )
             return True
 
+    # create/update processing_state table
+    # a unit is an artifact of an evidence, with one row per table it writes to and
+    # a row with an empty table name once the artifact is completely exported
+    def create_processing_state_table(self):
+        with self.open_db() as cursor:
+            cursor.execute(
+                f"""
+            CREATE TABLE IF NOT EXISTS {TABLE_NAME_PROCESSING_STATE} (
+                evidence_id TEXT NOT NULL,
+                artifact TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                row_count INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+                PRIMARY KEY (evidence_id, artifact, table_name)
+            )
+            """
+            )
+
+    def add_processed_rows(
+        self,
+        cursor: sqlite3.Cursor,
+        evidence_id: str,
+        artifact: str,
+        table_name: str,
+        row_count: int,
+    ) -> None:
+        """Count rows written to a table by a unit, in the transaction of the rows."""
+        cursor.execute(
+            f"""
+        INSERT INTO {TABLE_NAME_PROCESSING_STATE}
+            (evidence_id, artifact, table_name, status, row_count)
+        VALUES (?, ?, ?, 'running', ?)
+        ON CONFLICT (evidence_id, artifact, table_name) DO UPDATE SET
+            row_count = row_count + excluded.row_count,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+            (evidence_id, artifact, table_name, row_count),
+        )
+
+    def complete_unit(
+        self, cursor: sqlite3.Cursor, evidence_id: str, artifact: str
+    ) -> None:
+        cursor.execute(
+            f"""
+        UPDATE {TABLE_NAME_PROCESSING_STATE}
+        SET status = 'done', updated_at = CURRENT_TIMESTAMP
+        WHERE evidence_id = ? AND artifact = ?
+        """,
+            (evidence_id, artifact),
+        )
+        cursor.execute(
+            f"""
+        INSERT OR REPLACE INTO {TABLE_NAME_PROCESSING_STATE}
+            (evidence_id, artifact, table_name, status, row_count)
+        VALUES (?, ?, '', 'done', 0)
+        """,
+            (evidence_id, artifact),
+        )
+
+    def prepare_resume(self) -> set[tuple[str, str]]:
+        """Return the finished (evidence_id, artifact) units of the case.
+
+        Rows of unfinished units are removed from their tables. Tables are shared by
+        some artifacts (e.g. Chrome and Edge), so units of the same evidence which
+        wrote to a cleared table are unfinished as well.
+        """
+        with self.open_db() as cursor:
+            cursor.execute(
+                f"SELECT evidence_id, artifact, table_name, status FROM {TABLE_NAME_PROCESSING_STATE}"
+            )
+            states = cursor.fetchall()
+
+        finished: set[tuple[str, str]] = set()
+        tables: dict[tuple[str, str], set[str]] = {}
+        for evidence_id, artifact, table_name, status in states:
+            if table_name:
+                tables.setdefault((evidence_id, artifact), set()).add(table_name)
+            elif status == "done":
+                finished.add((evidence_id, artifact))
+
+        unfinished = set(tables) - finished
+        while True:
+            cleared = {
+                (evidence_id, table_name)
+                for evidence_id, artifact in unfinished
+                for table_name in tables[(evidence_id, artifact)]
+            }
+            shared = {
+                unit
+                for unit in finished - unfinished
+                if any(
+                    (unit[0], table_name) in cleared
+                    for table_name in tables.get(unit, ())
+                )
+            }
+            if not shared:
+                break
+            unfinished |= shared
+
+        with self.open_db() as cursor:
+            for evidence_id, table_name in cleared:
+                cursor.execute(
+                    f"DELETE FROM {table_name} WHERE evidence_id = ?", (evidence_id,)
+                )
+                logger.info(f"Removed partial rows of {evidence_id} from {table_name}")
+            for evidence_id, artifact in unfinished:
+                cursor.execute(
+                    f"DELETE FROM {TABLE_NAME_PROCESSING_STATE} WHERE evidence_id = ? AND artifact = ?",
+                    (evidence_id, artifact),
+                )
+
+        return finished - unfinished
+
+    def evtx_watermarks(self, host: Optional[str]) -> dict[tuple[str, str], int]:
+        """Return the highest EventRecordID read per (channel, artifact) of a host.
+
+        Only watermarks of completely exported artifacts count.
+        """
+        if not host or not self.is_table_exist(Tables.EVTX_WATERMARKS.value):
+            return {}
+        with self.open_db() as cursor:
+            cursor.execute(
+                f"""
+            SELECT w.channel, w.artifact, MAX(w.record_id)
+            FROM {Tables.EVTX_WATERMARKS.value} AS w
+            JOIN {TABLE_NAME_PROCESSING_STATE} AS p
+                ON p.evidence_id = w.evidence_id
+                AND p.artifact = w.artifact
+                AND p.table_name = ''
+                AND p.status = 'done'
+            WHERE w.host = ?
+            GROUP BY w.channel, w.artifact
+            """,
+                (host,),
+            )
+            return {
+                (channel, artifact): record_id
+                for channel, artifact, record_id in cursor.fetchall()
+            }
+
     # create/insert artifact category table
     # def create_artifact_category_table(self):
-    #     with open_db(self.database) as cursor:
+    #     with self.open_db() as cursor:
     #         cursor.execute(
     #             f"""
     #         CREATE TABLE IF NOT EXISTS {TABLE_NAME_ARTIFACT_CATEGORY} (
@@ -158,72 +419,53 @@ class DatabaseManager:
     #                 ),
     #             )
 
-    def create_artifact_table(self, record: list[ArtifactRecord], evidence_id: str):
+    def create_artifact_table(self, record: list[ArtifactRow], evidence_id: str):
         if not isinstance(record, list):
             logger.error(f"Error: record must be a list, not {type(record)}")
             return
 
         model = record[0]
-        full_annotations = self._get_full_annotations(model)
-        table_name = model.Config.table_name
+        table_name = get_record_schema(model).table_name
         try:
-            # Extracting table name and column definitions from the Pydantic model
-            columns = []
-            for field_name, field_type in full_annotations.items():
-                column_type = "TEXT"  # Default type, adjust as needed
-                if field_type == int:
-                    column_type = "INTEGER"
-                elif field_type == float:
-                    column_type = "REAL"
-                elif field_type == bool:
-                    column_type = "BOOLEAN"
-                elif field_type == datetime:
-                    column_type = "DATETIME"
-                # Add more data types as necessary
-                columns.append(f"{field_name} {column_type}")
-
-            column_definitions = ", ".join(columns)
-
-            # Constructing the CREATE TABLE SQL statement
-            create_statement = (
-                f"CREATE TABLE IF NOT EXISTS {table_name} ({column_definitions})"
-            )
-
-            # Creating the table
-            with open_db(self.database) as cursor:
-                cursor.execute(create_statement)
+            # Creating the table and its human-readable view
+            with self.open_db() as cursor:
+                for statement in self.artifact_table_statements(model):
+                    cursor.execute(statement)
 
         except Exception as e:
             logger.exception(
                 f"Failed to create table {table_name} to {evidence_id}: {e}"
             )
 
-    def _get_full_annotations(self, model):
-        annotations = {}
-        for cls in reversed(model.__class__.mro()):
-            if cls is object:
-                continue
-            annotations.update(get_type_hints(cls))
-        return annotations
+    def artifact_table_statements(self, model: ArtifactRow) -> list[str]:
+        """Return the statements creating the table of `model` and its views.
+
+        The index on the sort key is deferred to `finalize()`.
+        """
+        schema = get_record_schema(model)
+        with self._lock:
+            for statement in schema.index_statements:
+                if statement not in self._deferred_indexes:
+                    self._deferred_indexes.append(statement)
+        return schema.create_statements
 
     def insert_artifact_data(
-        self, record: Generator[ArtifactRecord, None, None], evidence_id: str
+        self,
+        record: Generator[ArtifactRow, None, None],
+        evidence_id: str,
+        artifact: Optional[str] = None,
     ):
         try:
-            all_records = []
-            table_name = None
-            keys = None
-
-            # Accumulate all records
-            for data in record:
-                table_name, prepared_data, keys = self._prepare_record_data(data)
-                all_records.append(prepared_data)
+            table_name, statement, all_records = self.prepare_artifact_data(record)
 
             # Perform batch insertion if there are records to insert
             if all_records:
-                statement = self._prepare_insert_statement(table_name, keys)
-                with open_db(self.database) as cursor:
+                with self.open_db() as cursor:
                     cursor.executemany(statement, all_records)
+                    if artifact:
+                        self.add_processed_rows(
+                            cursor, evidence_id, artifact, table_name, len(all_records)
+                        )
                     logger.info(
                         f"Inserted {len(all_records)} entries into {table_name} table in {evidence_id}"
                     )
@@ -231,22 +473,12 @@ class DatabaseManager:
         except Exception as e:
             logger.exception(f"Error inserting data into table: {e}")
 
-    def _prepare_record_data(self, data):
-        table_name = data.Config.table_name
-        processed_record = self._process_record_data(data.model_dump())
-        keys = list(processed_record.keys())  # Ensure keys are extracted here
-        return table_name, tuple(processed_record.values()), keys
+    def prepare_artifact_data(
+        self, record: list[ArtifactRow]
+    ) -> tuple[str, str, list[tuple]]:
+        """Return the table name, the insert statement and the rows of the records."""
+        if not record:
+            return None, None, []
 
-    def _process_record_data(self, record_data):
-        return {
-            key: json.dumps(
-                [v.isoformat() if isinstance(v, datetime) else v for v in value]
-            )
-            if isinstance(value, list)
-            else value
-            for key, value in record_data.items()
-        }
-
-    def _prepare_insert_statement(self, table_name, keys):
-        placeholders = ", ".join(["?"] * len(keys))
-        return f"INSERT INTO {table_name} ({', '.join(keys)}) VALUES ({placeholders})"
+        schema = get_record_schema(record[0])
+        return schema.table_name, schema.insert_statement, schema.rows(record)
@@ -0,0 +1,239 @@
+import sqlite3
+import logging
+import threading
+from queue import Queue
+from collections import defaultdict
+from typing import Optional
+from dataclasses import dataclass, field
+
+from core.forensic_artifact import ArtifactRow
+from core.database_manager import DatabaseManager
+from settings.config import WRITER_QUEUE_SIZE, WRITER_TRANSACTION_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WriteRequest:
+    evidence_id: str
+    table_name: str
+    create_statements: list[str]
+    insert_statement: str
+    rows: list[tuple]
+    artifact: Optional[str] = None
+
+
+@dataclass
+class CompleteRequest:
+    evidence_id: str
+    artifact: str
+
+
+@dataclass(kw_only=True)
+class DatabaseWriter:
+    """Single writer thread of the case database.
+
+    Parsers push batches of records onto a bounded queue with `write()`. The writer
+    thread owns the only connection to the database, creates artifact tables on first
+    sight of a model and groups batches into large transactions, so that parsing and
+    disk I/O overlap.
+
+    A failed commit stops the writes: the thread keeps draining the queue so that
+    no parser blocks on it, and the error is raised by the next `write()`,
+    `complete()` or `close()`.
+    """
+
+    db_manager: DatabaseManager
+    queue_size: int = WRITER_QUEUE_SIZE
+    transaction_size: int = WRITER_TRANSACTION_SIZE
+    _queue: Queue = field(init=False)
+    _thread: threading.Thread = field(init=False)
+    _announced_tables: set[str] = field(init=False, default_factory=set)
+    # (evidence_id, artifact) units with rows that failed to insert
+    _failed_units: set[tuple[str, str]] = field(init=False, default_factory=set)
+    # error which stopped the writes, raised to the parsers
+    _error: Optional[Exception] = field(init=False, default=None)
+
+    def __post_init__(self):
+        self._queue = Queue(maxsize=self.queue_size)
+        self._thread = threading.Thread(
+            target=self._run, name="DatabaseWriter", daemon=True
+        )
+
+    def __enter__(self) -> "DatabaseWriter":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        """Flush the pending batches and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _put(self, request) -> None:
+        self._raise_error()
+        if not self._thread.is_alive():
+            raise RuntimeError("Database writer thread is not running")
+        self._queue.put(request)
+
+    def write(
+        self,
+        record: list[ArtifactRow],
+        evidence_id: str,
+        artifact: Optional[str] = None,
+    ) -> None:
+        """Queue a batch of records of a single table, blocks while the queue is full.
+
+        Rows written for an `artifact` are counted in the processing_state table.
+        """
+        if not record:
+            return
+
+        table_name, insert_statement, rows = self.db_manager.prepare_artifact_data(
+            record
+        )
+
+        create_statements = []
+        if table_name not in self._announced_tables:
+            create_statements = self.db_manager.artifact_table_statements(record[0])
+            self._announced_tables.add(table_name)
+
+        self._put(
+            WriteRequest(
+                evidence_id=evidence_id,
+                table_name=table_name,
+                create_statements=create_statements,
+                insert_statement=insert_statement,
+                rows=rows,
+                artifact=artifact,
+            )
+        )
+
+    def complete(self, evidence_id: str, artifact: str) -> None:
+        """Mark an artifact of an evidence as completely written, once its rows are.
+
+        Artifacts with rows which failed to insert are left unfinished.
+        """
+        self._put(CompleteRequest(evidence_id=evidence_id, artifact=artifact))
+
+    def _run(self) -> None:
+        conn = self.db_manager.connection()
+        cursor = conn.cursor()
+        pending_rows = 0
+        # rows written per (evidence_id, artifact, table_name) in the transaction
+        processed_rows = defaultdict(int)
+        try:
+            while (request := self._queue.get()) is not None:
+                if self._error is not None:
+                    # writes stopped, only drain the queue
+                    continue
+                try:
+                    if isinstance(request, CompleteRequest):
+                        self._commit(conn, cursor, processed_rows)
+                        self._complete(cursor, request)
+                        conn.commit()
+                        pending_rows = 0
+                        continue
+
+                    rows = self._execute(cursor, request)
+                    pending_rows += rows
+                    if rows and request.artifact:
+                        key = (
+                            request.evidence_id,
+                            request.artifact,
+                            request.table_name,
+                        )
+                        processed_rows[key] += rows
+
+                    # commit once the transaction is large enough or the parsers are
+                    # behind
+                    if pending_rows >= self.transaction_size or self._queue.empty():
+                        self._commit(conn, cursor, processed_rows)
+                        pending_rows = 0
+                except Exception as e:
+                    self._fail(conn, e)
+            if self._error is None:
+                self._commit(conn, cursor, processed_rows)
+        except Exception as e:
+            self._fail(conn, e)
+        finally:
+            try:
+                self.db_manager.disconnect()
+            except Exception as e:
+                if self._error is None:
+                    self._error = e
+
+    def _fail(self, conn: sqlite3.Connection, error: Exception) -> None:
+        """Stop the writes on an error of the connection, e.g. a failed commit."""
+        logger.exception(
+            f"Database writer failed, no further rows are written: {error}"
+        )
+        self._error = error
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+
+    def _commit(
+        self, conn: sqlite3.Connection, cursor: sqlite3.Cursor, processed_rows: dict
+    ) -> None:
+        """Count the rows of the transaction in the processing_state table and commit,
+        so that the counts are durable along with the rows."""
+        try:
+            for key, row_count in processed_rows.items():
+                evidence_id, artifact, table_name = key
+                self.db_manager.add_processed_rows(
+                    cursor,
+                    evidence_id=evidence_id,
+                    artifact=artifact,
+                    table_name=table_name,
+                    row_count=row_count,
+                )
+        except Exception as e:
+            logger.exception(f"Error counting processed rows: {e}")
+        processed_rows.clear()
+        conn.commit()
+
+    def _execute(self, cursor: sqlite3.Cursor, request: WriteRequest) -> int:
+        try:
+            for statement in request.create_statements:
+                cursor.execute(statement)
+            cursor.executemany(request.insert_statement, request.rows)
+            logger.info(
+                f"Inserted {len(request.rows)} entries into {request.table_name} table in {request.evidence_id}"
+            )
+            return len(request.rows)
+        except Exception as e:
+            logger.exception(
+                f"Error inserting data into {request.table_name} table in {request.evidence_id}: {e}"
+            )
+            if request.artifact:
+                self._failed_units.add((request.evidence_id, request.artifact))
+            return 0
+
+    def _complete(self, cursor: sqlite3.Cursor, request: CompleteRequest) -> None:
+        # a unit missing rows stays unfinished, so that --resume runs it again
+        if (request.evidence_id, request.artifact) in self._failed_units:
+            logger.warning(
+                f"Not completing {request.artifact} in {request.evidence_id}: rows failed to insert"
+            )
+            return
+        try:
+            self.db_manager.complete_unit(
+                cursor, evidence_id=request.evidence_id, artifact=request.artifact
+            )
+        except Exception as e:
+            logger.exception(
+                f"Error completing {request.artifact} in {request.evidence_id}: {e}"
+            )
@@ -0,0 +1,342 @@
+import io
+import re
+import mmap
+import zlib
+import struct
+import logging
+from datetime import datetime, timezone
+from dataclasses import dataclass
+from contextlib import contextmanager
+from typing import BinaryIO, Generator, Iterable, Optional
+
+from dissect.ntfs import NTFS
+from dissect.eventlog.bxml import BxmlToken
+
+from core.evtx_reader import (
+    EVTX_CHUNK_SIZE,
+    EVTX_CHUNK_MAGIC,
+    EVTX_CHUNK_HEADER_SIZE,
+    RECORD_HEADER,
+    RECORD_SIZE_COPY,
+    TEMPLATE_INSTANCE_OFFSET,
+    TEMPLATE_REFERENCE,
+    TEMPLATE_VALUES_OFFSET,
+    EventFilter,
+    load_template,
+    plain_event,
+    read_chunk,
+    render_record,
+)
+from core.forensic_artifact import open_target
+from core.time_window import to_filetime
+from settings.config import CARVE_RANGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+EVTX_RECORD_MAGIC = b"**\x00\x00"
+FRAGMENT_HEADER = b"\x0f\x01\x01\x00"
+# the chunk header checksum is the CRC32 of its first 120 bytes and of the bytes
+# from 128 to 512, which hold the string and template tables
+CHUNK_CHECKSUM = struct.Struct("<I")
+CHUNK_CHECKSUM_OFFSET = 124
+# next template offset, GUID (whose first 4 bytes are the template id), data size
+TEMPLATE_DEFINITION = struct.Struct("<I4s12sI")
+# chunks are aligned to clusters, which are made of 512 bytes sectors at least
+CHUNK_ALIGNMENT = 512
+# records written outside of this period are taken for false positives
+MIN_RECORD_TIME = to_filetime(datetime(1990, 1, 1, tzinfo=timezone.utc))
+MAX_RECORD_TIME = to_filetime(datetime(2100, 1, 1, tzinfo=timezone.utc))
+MAX_RECORD_SIZE = EVTX_CHUNK_SIZE - EVTX_CHUNK_HEADER_SIZE
+# event field of the volume offset of the chunk, or of the lone record, an event
+# was carved from
+CARVED_OFFSET = "CarvedOffset"
+
+
+@dataclass(frozen=True)
+class CarveRange:
+    """Range of a volume to carve, from `start` to `end` (volume offsets).
+
+    Chunks and records are reported by the range they start in. Data up to a chunk
+    before and after the range is read as well, within `low` and `high`, the bounds
+    of the free space the range is part of, to decode those crossing its bounds.
+    """
+
+    volume: int
+    start: int
+    end: int
+    low: int
+    high: int
+
+
+def valid_chunk(view, offset: int) -> bool:
+    """Tell whether a whole chunk with a valid header checksum is at `offset`."""
+    if offset + EVTX_CHUNK_SIZE > len(view):
+        return False
+    (checksum,) = CHUNK_CHECKSUM.unpack_from(view, offset + CHUNK_CHECKSUM_OFFSET)
+    header = view[offset : offset + EVTX_CHUNK_HEADER_SIZE]
+    return zlib.crc32(header[128:], zlib.crc32(header[:120])) == checksum
+
+
+def valid_record(view, offset: int) -> Optional[int]:
+    """Return the size of a plausible record at `offset`, None if it isn't one."""
+    if offset + RECORD_HEADER.size + TEMPLATE_VALUES_OFFSET > len(view):
+        return None
+    _, size, _, written = RECORD_HEADER.unpack_from(view, offset)
+    if (
+        not RECORD_HEADER.size + TEMPLATE_VALUES_OFFSET + 4 <= size <= MAX_RECORD_SIZE
+        or offset + size > len(view)
+        or RECORD_SIZE_COPY.unpack_from(view, offset + size - 4)[0] != size
+        or not MIN_RECORD_TIME <= written <= MAX_RECORD_TIME
+    ):
+        return None
+    data_offset = offset + RECORD_HEADER.size
+    if view[data_offset : data_offset + len(FRAGMENT_HEADER)] != FRAGMENT_HEADER:
+        return None
+    return size
+
+
+def template_definition(view, offset: int, template_id: int) -> bool:
+    """Tell whether the definition of template `template_id` is at `offset`."""
+    if offset < 0 or offset + TEMPLATE_DEFINITION.size + 4 > len(view):
+        return False
+    _, identifier, _, size = TEMPLATE_DEFINITION.unpack_from(view, offset)
+    start = offset + TEMPLATE_DEFINITION.size
+    return (
+        int.from_bytes(identifier, "little") == template_id
+        and 0 < size < EVTX_CHUNK_SIZE
+        and view[start : start + len(FRAGMENT_HEADER)] == FRAGMENT_HEADER
+    )
+
+
+def chunk_start(view, offset: int, base: int) -> Optional[tuple[int, int]]:
+    """Find the chunk of the record at `offset` from its template reference.
+
+    Template offsets are relative to the chunk, the template is either defined by
+    the record itself or by an earlier record of the chunk. Returns the offset of
+    the chunk in `view` and of the template in the chunk.
+    """
+    data_offset = offset + RECORD_HEADER.size
+    if (
+        view[data_offset + TEMPLATE_INSTANCE_OFFSET] & 0x1F
+        != BxmlToken.BXML_TEMPLATE_INSTANCE
+    ):
+        return None
+    _, template_id, template_offset = TEMPLATE_REFERENCE.unpack_from(
+        view, data_offset + TEMPLATE_INSTANCE_OFFSET + 1
+    )
+    if not EVTX_CHUNK_HEADER_SIZE <= template_offset < EVTX_CHUNK_SIZE:
+        return None
+
+    # defined by the record itself, right after the reference
+    start = data_offset + TEMPLATE_VALUES_OFFSET - template_offset
+    if start >= 0 and template_definition(
+        view, data_offset + TEMPLATE_VALUES_OFFSET, template_id
+    ):
+        return start, template_offset
+
+    # defined earlier in the chunk, which starts at an aligned offset
+    last = offset - EVTX_CHUNK_HEADER_SIZE
+    first = max(0, offset - EVTX_CHUNK_SIZE + RECORD_HEADER.size)
+    start = last - (base + last) % CHUNK_ALIGNMENT
+    while start >= first:
+        if start + template_offset < offset and template_definition(
+            view, start + template_offset, template_id
+        ):
+            return start, template_offset
+        start -= CHUNK_ALIGNMENT
+    return None
+
+
+def read_record(view, offset: int, size: int, base: int) -> Optional[dict]:
+    """Decode a record found outside of a valid chunk."""
+    found = chunk_start(view, offset, base)
+    if found is None:
+        return None
+    start, template_offset = found
+
+    chunk = bytes(view[start : start + EVTX_CHUNK_SIZE])
+    stream = io.BytesIO(chunk)
+    templates = {}
+    data_offset = offset + RECORD_HEADER.size - start
+    if template_offset != data_offset + TEMPLATE_VALUES_OFFSET:
+        load_template(stream, templates, template_offset)
+    bxml_data = chunk[data_offset : offset + size - 4 - start]
+    return render_record(stream, templates, bxml_data, data_offset)
+
+
+def carve(
+    view, wanted: EventFilter, base: int = 0, start: int = 0, end: Optional[int] = None
+) -> Generator[dict, None, None]:
+    """Yield the events `wanted` wants of the chunks and records in `view`.
+
+    `view` holds bytes found at offset `base` of a volume (bytes or an mmap), only
+    chunks and records starting between its offsets `start` and `end` are read.
+    Chunks with a valid header are read whole, records found elsewhere are
+    validated and decoded on their own, if their template can be found. Chunks
+    starting up to a chunk before `start` are looked for too: their records belong
+    to the range before. Events have the volume offset they were carved from as
+    their CARVED_OFFSET field.
+    """
+    end = len(view) if end is None else end
+
+    chunks = []
+    stop = end + len(EVTX_CHUNK_MAGIC) - 1
+    offset = view.find(EVTX_CHUNK_MAGIC, max(0, start - EVTX_CHUNK_SIZE + 1), stop)
+    while offset != -1:
+        if valid_chunk(view, offset):
+            chunks.append(offset)
+            if offset >= start:
+                for event in read_chunk(
+                    bytes(view[offset : offset + EVTX_CHUNK_SIZE]), wanted
+                ):
+                    event[CARVED_OFFSET] = base + offset
+                    yield event
+            offset = view.find(EVTX_CHUNK_MAGIC, offset + EVTX_CHUNK_SIZE, stop)
+        else:
+            offset = view.find(EVTX_CHUNK_MAGIC, offset + 1, stop)
+
+    carved = 0
+    for gap_start, gap_end in gaps(chunks, start, end):
+        stop = gap_end + len(EVTX_RECORD_MAGIC) - 1
+        offset = view.find(EVTX_RECORD_MAGIC, gap_start, stop)
+        while offset != -1:
+            size = valid_record(view, offset)
+            if size is None:
+                offset = view.find(EVTX_RECORD_MAGIC, offset + 1, stop)
+                continue
+
+            try:
+                record = read_record(view, offset, size, base)
+            except Exception as e:
+                logger.debug(f"Unable to decode record at {base + offset:#x}: {e!r}")
+                record = None
+            if record is not None and wanted.wants_record(record):
+                carved += 1
+                record[CARVED_OFFSET] = base + offset
+                yield record
+            offset = view.find(EVTX_RECORD_MAGIC, offset + size, stop)
+
+    chunks = [chunk for chunk in chunks if chunk >= start]
+    if chunks or carved:
+        logger.info(
+            f"Carved {len(chunks)} chunks and {carved} records"
+            f" from {base + start:#x}-{base + end:#x}"
+        )
+
+
+def gaps(chunks: list[int], start: int, end: int) -> Generator[tuple, None, None]:
+    """Yield the ranges between `start` and `end` which aren't part of `chunks`."""
+    for chunk in chunks:
+        if chunk > start:
+            yield start, min(chunk, end)
+        start = max(start, chunk + EVTX_CHUNK_SIZE)
+        if start >= end:
+            return
+    if start < end:
+        yield start, end
+
+
+def carve_stream(
+    fh: BinaryIO, carve_range: CarveRange, wanted: EventFilter
+) -> Generator[dict, None, None]:
+    """Yield the events carved from a range of the volume `fh`."""
+    low = max(carve_range.low, carve_range.start - EVTX_CHUNK_SIZE)
+    high = min(carve_range.high, carve_range.end + EVTX_CHUNK_SIZE)
+    with open_view(fh, low, high - low) as (view, base):
+        yield from carve(
+            view,
+            wanted,
+            base=base,
+            start=carve_range.start - base,
+            end=carve_range.end - base,
+        )
+
+
+@contextmanager
+def open_view(fh: BinaryIO, offset: int, size: int):
+    """Return `size` bytes at `offset` of `fh` and the offset they start at.
+
+    Streams of files on disk (raw images) are memory-mapped, from the closest
+    allocation boundary, the streams of dissect volumes and containers are read.
+    """
+    try:
+        fileno = fh.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        fh.seek(offset)
+        yield fh.read(size), offset
+        return
+
+    base = offset - offset % mmap.ALLOCATIONGRANULARITY
+    with mmap.mmap(
+        fileno, size + offset - base, offset=base, access=mmap.ACCESS_READ
+    ) as view:
+        yield view, base
+
+
+def free_space(ntfs: NTFS) -> list[tuple[int, int]]:
+    """Return the unallocated byte ranges of an NTFS volume, from its $Bitmap.
+
+    Bit n of the bitmap is set when cluster n is in use: runs of zero bytes are
+    free, the clusters of bytes which are neither 0x00 nor 0xFF are checked one by
+    one.
+    """
+    bitmap = ntfs.mft.get("$Bitmap").open().read()
+    runs: list[tuple[int, int]] = []
+
+    def add(start: int, end: int) -> None:
+        if runs and runs[-1][1] == start:
+            start = runs.pop()[0]
+        runs.append((start, end))
+
+    for match in re.finditer(rb"\x00+|[^\x00\xff]", bitmap):
+        byte = bitmap[match.start()]
+        if byte == 0:
+            add(match.start() * 8, match.end() * 8)
+            continue
+        for bit in range(8):
+            if not byte >> bit & 1:
+                cluster = match.start() * 8 + bit
+                add(cluster, cluster + 1)
+
+    # the bitmap is padded, don't carve past the end of the volume
+    size = getattr(ntfs.fh, "size", None)
+    ranges = []
+    for start, end in runs:
+        start, end = start * ntfs.cluster_size, end * ntfs.cluster_size
+        if size is not None:
+            end = min(end, size)
+        if start < end:
+            ranges.append((start, end))
+    return ranges
+
+
+def plan(volume: int, ranges: Iterable[tuple[int, int]]) -> list[list[CarveRange]]:
+    """Split the ranges of a volume by CARVE_RANGE_SIZE windows of volume offsets.
+
+    Each window is a task for a worker process.
+    """
+    windows: dict[int, list[CarveRange]] = {}
+    for low, high in ranges:
+        start = low
+        while start < high:
+            window = start // CARVE_RANGE_SIZE
+            end = min(high, (window + 1) * CARVE_RANGE_SIZE)
+            windows.setdefault(window, []).append(
+                CarveRange(volume=volume, start=start, end=end, low=low, high=high)
+            )
+            start = end
+    return [windows[window] for window in sorted(windows)]
+
+
+def carve_evidence(
+    evidence: str, carve_ranges: list[CarveRange], wanted: EventFilter
+) -> list[dict]:
+    """Carve ranges of a volume of an evidence (in a worker process)."""
+    target = open_target(evidence)
+    events = []
+    for carve_range in carve_ranges:
+        volume = target.volumes[carve_range.volume]
+        events.extend(
+            plain_event(event) for event in carve_stream(volume, carve_range, wanted)
+        )
+    return events
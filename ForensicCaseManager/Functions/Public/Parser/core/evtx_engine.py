@@ -0,0 +1,383 @@
+import logging
+from pathlib import Path
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, ClassVar, Generator, Iterable, Optional
+
+from core.forensic_artifact import (
+    ArtifactRecord,
+    ArtifactRow,
+    ForensicArtifact,
+    Source,
+    construct_row,
+)
+from core.evtx_reader import (
+    EVTX_CHUNK_SIZE,
+    EventFilter,
+    decode_chunk,
+    evtx_chunk_headers,
+    read_chunk,
+)
+from core.time_window import TimeWindow
+from settings.tables import Tables
+from settings.config import DEFAULT_BATCH_SIZE, EVTX_CHUNKS_PER_WORKER
+
+logger = logging.getLogger(__name__)
+
+
+class EvtxWatermarkRecord(ArtifactRecord):
+    """Highest EventRecordID of a channel read by an event log artifact of a host."""
+
+    host: str
+    channel: str
+    artifact: str
+    record_id: int
+
+    class Config:
+        table_name: str = Tables.EVTX_WATERMARKS.value
+
+
+class EventLogArtifact(ForensicArtifact):
+    """Forensic artifact made of the events of a single event log channel.
+
+    Subclasses declare the channel and the EventIDs they consume (None for all of
+    them) and turn a single event into rows with `read_event()`. The log files
+    themselves are decoded by the EVTX engine of the evidence, once for all the
+    event log artifacts.
+    """
+
+    group: ClassVar[Optional[str]] = "evtx"
+    channel: ClassVar[str]
+    event_ids: ClassVar[Optional[frozenset[int]]] = None
+    # skip the events below the watermark of a previous ingest with --incremental-evtx
+    incremental: ClassVar[bool] = True
+
+    def prepare(self) -> None:
+        get_evtx_engine(self.src).register(self)
+
+    def parse(self, descending: bool = False) -> None:
+        try:
+            self.collect(self.events(), key="ts", descending=descending)
+            self.collect(self.watermarks())
+        except Exception as e:
+            self.log_error(e)
+
+    def events(self) -> list[ArtifactRow]:
+        return get_evtx_engine(self.src).rows(self)
+
+    def watermarks(self) -> list[ArtifactRow]:
+        return get_evtx_engine(self.src).watermark_rows(self)
+
+    def log_files(self) -> Generator[Path, None, None]:
+        yield from self.check_empty_entry(self.iter_entry())
+
+    def read_event(self, event: dict) -> Iterable[ArtifactRow]:
+        raise NotImplementedError
+
+    def finish(self) -> Iterable[ArtifactRow]:
+        """Return the last rows, once all events were read (state kept across events)."""
+        return ()
+
+
+@dataclass(kw_only=True)
+class EvtxEngine:
+    """Single pass EVTX decoder shared by the event log artifacts of an evidence.
+
+    Consumers register before parsing. On the first request for rows, every log file
+    of the registered consumers is opened once and each record is decoded once, then
+    routed by (channel, EventID) to the consumers which declared it. The rows of all
+    consumers are kept until they ask for them. Records no consumer wants, or outside
+    of the time window, are skipped before they are rendered (see FilteredChunk).
+
+    With more than one worker, the chunks of a log file are decoded in a process pool
+    and their events are dispatched in EventRecordID order.
+
+    The highest EventRecordID of the logs read by each consumer is kept as a
+    watermark of its (host, channel). With `incremental`, events up to the
+    `watermarks` of a previous ingest are skipped, and so are whole chunks below the
+    watermarks of all the consumers of a log file, from their headers alone.
+    Consumers which join events across ingests (not `incremental`) always read
+    their logs whole and keep no watermark.
+
+    In streaming mode, with an `export` callable, the rows of each consumer are
+    exported as soon as `batch_size` of them are read instead, along with its last
+    rows once all events are read.
+    """
+
+    workers: int = 1
+    time_window: TimeWindow = field(default_factory=TimeWindow)
+    host: Optional[str] = None
+    incremental: bool = False
+    watermarks: dict[tuple[str, str], int] = field(default_factory=dict)
+    export: Optional[Callable[[EventLogArtifact, list[ArtifactRow]], None]] = None
+    batch_size: int = DEFAULT_BATCH_SIZE
+    _pending: list[EventLogArtifact] = field(default_factory=list)
+    _rows: dict[int, list[ArtifactRow]] = field(default_factory=dict)
+    _marks: dict[int, int] = field(default_factory=dict)
+
+    def register(self, consumer: EventLogArtifact) -> None:
+        if id(consumer) not in self._rows and all(
+            pending is not consumer for pending in self._pending
+        ):
+            self._pending.append(consumer)
+
+    def rows(self, consumer: EventLogArtifact) -> list[ArtifactRow]:
+        """Return the rows of `consumer` not exported yet, decoding the logs of pending
+        consumers first."""
+        if id(consumer) not in self._rows:
+            self.register(consumer)
+            self.run()
+        return self._rows.pop(id(consumer), [])
+
+    def run(self) -> None:
+        consumers, self._pending = self._pending, []
+        if not consumers:
+            return
+
+        routes, channels = self.route(consumers)
+        log_files: dict[str, tuple[Path, list[EventLogArtifact]]] = {}
+        for consumer in consumers:
+            for log_file in consumer.log_files():
+                log_files.setdefault(str(log_file), (log_file, []))[1].append(consumer)
+
+        if self.workers <= 1:
+            for log_file, readers in log_files.values():
+                self.read_log(log_file, readers, routes=routes, channels=channels)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                for log_file, readers in log_files.values():
+                    self.read_log_parallel(
+                        log_file,
+                        readers,
+                        routes=routes,
+                        channels=channels,
+                        executor=executor,
+                    )
+        self.finish(consumers)
+
+    def route(self, consumers: list[EventLogArtifact]) -> tuple[
+        dict[tuple[str, int], list[EventLogArtifact]],
+        dict[str, list[EventLogArtifact]],
+    ]:
+        """Return the consumers by (channel, EventID) and those of whole channels.
+
+        The rows of the consumers are kept from then on, see `dispatch()`.
+        """
+        routes: dict[tuple[str, int], list[EventLogArtifact]] = defaultdict(list)
+        channels: dict[str, list[EventLogArtifact]] = defaultdict(list)
+        for consumer in consumers:
+            self._rows[id(consumer)] = []
+            if consumer.event_ids is None:
+                channels[consumer.channel].append(consumer)
+            else:
+                for event_id in consumer.event_ids:
+                    routes[(consumer.channel, event_id)].append(consumer)
+        return routes, channels
+
+    def event_filter(
+        self,
+        routes: dict[tuple[str, int], list[EventLogArtifact]],
+        channels: dict[str, list[EventLogArtifact]],
+        after_record_id: int = 0,
+    ) -> EventFilter:
+        return EventFilter(
+            routes=frozenset(routes),
+            channels=frozenset(channels),
+            window=self.time_window,
+            after_record_id=after_record_id,
+        )
+
+    def read_log(
+        self,
+        log_file: Path,
+        readers: list[EventLogArtifact],
+        routes: dict[tuple[str, int], list[EventLogArtifact]],
+        channels: dict[str, list[EventLogArtifact]],
+    ) -> None:
+        try:
+            with log_file.open("rb") as fh:
+                chunks = evtx_chunk_headers(fh)
+                floors = self.floors(log_file, chunks, readers)
+                wanted = self.event_filter(
+                    routes, channels, after_record_id=min(floors.values(), default=0)
+                )
+                for offset in self.chunk_offsets(chunks, wanted):
+                    fh.seek(offset)
+                    for event in read_chunk(fh.read(EVTX_CHUNK_SIZE), wanted):
+                        self.dispatch(
+                            event, routes=routes, channels=channels, floors=floors
+                        )
+        except Exception as e:
+            logger.exception(f"Unable to read event log {log_file}: {e}")
+
+    def read_log_parallel(
+        self,
+        log_file: Path,
+        readers: list[EventLogArtifact],
+        routes: dict[tuple[str, int], list[EventLogArtifact]],
+        channels: dict[str, list[EventLogArtifact]],
+        executor: Executor,
+    ) -> None:
+        """Decode the chunks of a log file in `executor` and dispatch their events.
+
+        Chunks are submitted in the order of their first EventRecordID, a bounded
+        number at a time, and their results are consumed in the same order.
+        """
+        try:
+            with log_file.open("rb") as fh:
+                chunks = evtx_chunk_headers(fh)
+                floors = self.floors(log_file, chunks, readers)
+                wanted = self.event_filter(
+                    routes, channels, after_record_id=min(floors.values(), default=0)
+                )
+                pending = deque()
+                for offset in self.chunk_offsets(chunks, wanted):
+                    fh.seek(offset)
+                    pending.append(
+                        executor.submit(decode_chunk, fh.read(EVTX_CHUNK_SIZE), wanted)
+                    )
+                    if len(pending) >= self.workers * EVTX_CHUNKS_PER_WORKER:
+                        self.dispatch_chunk(
+                            pending.popleft().result(), routes, channels, floors
+                        )
+
+                while pending:
+                    self.dispatch_chunk(
+                        pending.popleft().result(), routes, channels, floors
+                    )
+        except Exception as e:
+            logger.exception(f"Unable to read event log {log_file}: {e}")
+
+    def floors(
+        self,
+        log_file: Path,
+        chunks: list[tuple[int, int, int]],
+        readers: list[EventLogArtifact],
+    ) -> dict[int, int]:
+        """Return the EventRecordID up to which each reader of a log file skips events.
+
+        The last EventRecordID of the log is also the new watermark of its readers. A
+        log below a watermark was cleared since then: it is read whole.
+        """
+        last_record_id = max((last for _, last, _ in chunks), default=0)
+        floors = {}
+        for reader in readers:
+            self._marks[id(reader)] = max(
+                self._marks.get(id(reader), 0), last_record_id
+            )
+            floors[id(reader)] = (
+                self.watermarks.get((reader.channel, reader.name), 0)
+                if self.incremental and reader.incremental
+                else 0
+            )
+
+        if last_record_id < max(floors.values(), default=0):
+            logger.warning(
+                f"Event log {log_file} ends before its last watermark, reading it whole"
+            )
+            return dict.fromkeys(floors, 0)
+        return floors
+
+    @staticmethod
+    def chunk_offsets(
+        chunks: list[tuple[int, int, int]], wanted: EventFilter
+    ) -> list[int]:
+        """Return the offsets of the chunks holding events after the watermark."""
+        return [
+            offset
+            for _, last_record_id, offset in chunks
+            if last_record_id > wanted.after_record_id
+        ]
+
+    def finish(self, consumers: list[EventLogArtifact]) -> None:
+        """Add the rows the consumers hold back until all events are read."""
+        for consumer in consumers:
+            try:
+                self._rows[id(consumer)].extend(consumer.finish())
+            except Exception as e:
+                consumer.log_error(e)
+            if self.export:
+                self.flush(consumer)
+
+    def flush(self, consumer: EventLogArtifact) -> None:
+        """Export the rows of `consumer` read so far."""
+        rows, self._rows[id(consumer)] = self._rows[id(consumer)], []
+        if not rows:
+            return
+        try:
+            self.export(consumer, rows)
+        except Exception as e:
+            consumer.log_export_error(e)
+
+    def watermark_rows(self, consumer: EventLogArtifact) -> list[ArtifactRow]:
+        """Return the watermark of the logs `consumer` read, once they were read.
+
+        Events outside of a time window were not read, so no watermark is kept then.
+        """
+        record_id = self._marks.pop(id(consumer), 0)
+        if not record_id or not consumer.incremental:
+            return []
+        if not self.host or self.time_window:
+            return []
+        return [
+            construct_row(
+                EvtxWatermarkRecord,
+                {
+                    "evidence_id": consumer.evidence_id,
+                    "host": self.host,
+                    "channel": consumer.channel,
+                    "artifact": consumer.name,
+                    "record_id": record_id,
+                },
+            )
+        ]
+
+    def dispatch_chunk(
+        self,
+        events: list[dict],
+        routes: dict[tuple[str, int], list[EventLogArtifact]],
+        channels: dict[str, list[EventLogArtifact]],
+        floors: Optional[dict[int, int]] = None,
+    ) -> None:
+        for event in events:
+            self.dispatch(event, routes=routes, channels=channels, floors=floors)
+
+    def dispatch(
+        self,
+        event: dict,
+        routes: dict[tuple[str, int], list[EventLogArtifact]],
+        channels: dict[str, list[EventLogArtifact]],
+        floors: Optional[dict[int, int]] = None,
+    ) -> None:
+        """Turn an event into rows of the consumers of its (channel, EventID).
+
+        Consumers skip events up to their EventRecordID in `floors`.
+        """
+        channel = event.get("Channel")
+        consumers = routes.get((channel, event.get("EventID")), [])
+        if channel in channels:
+            consumers = consumers + channels[channel]
+
+        for consumer in consumers:
+            if floors and (event.get("EventRecordID") or 0) <= floors.get(
+                id(consumer), 0
+            ):
+                continue
+            try:
+                rows = self._rows[id(consumer)]
+                rows.extend(consumer.read_event(event))
+            except Exception as e:
+                consumer.log_error(e)
+                continue
+            if self.export and len(rows) >= max(
+                self.batch_size, consumer.min_batch_size or 0
+            ):
+                self.flush(consumer)
+
+
+def get_evtx_engine(src: Source) -> EvtxEngine:
+    """Return the EVTX engine of an evidence."""
+    if "evtx_engine" not in src.shared:
+        src.shared["evtx_engine"] = EvtxEngine()
+    return src.shared["evtx_engine"]
@@ -0,0 +1,424 @@
+import io
+import struct
+import logging
+from dataclasses import dataclass, field
+from typing import BinaryIO, Generator, Optional
+
+from dissect.eventlog.bxml import (
+    Bxml,
+    BxmlSub,
+    BxmlTag,
+    BxmlToken,
+    BxmlType,
+    EvtxNameReader,
+    Template,
+    parse_bxml,
+)
+from dissect.eventlog.evtx import ElfChnk, c_evtx
+from dissect.eventlog.exceptions import MalformedElfChnkException
+
+from core.time_window import TimeWindow
+
+logger = logging.getLogger(__name__)
+
+EVTX_CHUNK_SIZE = 0x10000
+EVTX_CHUNK_MAGIC = b"ElfChnk\x00"
+EVTX_CHUNK_HEADER_SIZE = len(c_evtx.EVTX_CHUNK)
+EVTX_RECORD_SIGNATURE = 0x2A2A
+
+RECORD_HEADER = struct.Struct("<IIQQ")
+RECORD_SIZE_COPY = struct.Struct("<I")
+# fragment header (4 bytes), template instance token, then its reference
+TEMPLATE_INSTANCE_OFFSET = 4
+TEMPLATE_REFERENCE = struct.Struct("<BII")
+TEMPLATE_VALUES_OFFSET = TEMPLATE_INSTANCE_OFFSET + 1 + TEMPLATE_REFERENCE.size
+VALUE_COUNT = struct.Struct("<I")
+VALUE_DESCRIPTOR = struct.Struct("<HBB")
+
+# substitution values read without rendering, FILETIMEs are kept as integers
+VALUE_FORMATS = {
+    BxmlType.INT8: "<b",
+    BxmlType.UINT8: "<B",
+    BxmlType.INT16: "<h",
+    BxmlType.UINT16: "<H",
+    BxmlType.INT32: "<i",
+    BxmlType.UINT32: "<I",
+    BxmlType.INT64: "<q",
+    BxmlType.UINT64: "<Q",
+    BxmlType.FILETIME: "<Q",
+}
+# a substitution value of a type which isn't read without rendering
+UNDECIDED = object()
+
+
+@dataclass(frozen=True, kw_only=True)
+class EventFilter:
+    """The (channel, EventID) pairs wanted from the event logs, within `window`.
+
+    `channels` are wanted with any EventID, and every event with `all_channels`.
+    Records up to EventRecordID `after_record_id` are skipped.
+    """
+
+    routes: frozenset[tuple[str, int]] = frozenset()
+    channels: frozenset[str] = frozenset()
+    all_channels: bool = False
+    window: TimeWindow = TimeWindow()
+    after_record_id: int = 0
+    route_channels: frozenset[str] = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self, "route_channels", frozenset(channel for channel, _ in self.routes)
+        )
+
+    @property
+    def wants_everything(self) -> bool:
+        return self.all_channels and not self.window and not self.after_record_id
+
+    def wants_channel(self, channel: Optional[str]) -> bool:
+        return (
+            self.all_channels
+            or channel in self.channels
+            or channel in self.route_channels
+        )
+
+    def wants(self, channel: Optional[str], event_id: Optional[int]) -> bool:
+        return (
+            self.all_channels
+            or channel in self.channels
+            or (channel, event_id) in self.routes
+        )
+
+    def wants_record(self, record: dict) -> bool:
+        time_created = record.get("TimeCreated_SystemTime")
+        if isinstance(time_created, BxmlSub):
+            time_created = time_created.get()
+        return self.wants(
+            record.get("Channel"), record.get("EventID")
+        ) and self.window.contains(time_created)
+
+
+@dataclass(frozen=True)
+class TemplateSelector:
+    """Where the channel and the EventID of the events of a template come from:
+    a literal of the template or the index of one of its substitution values, and
+    the index of the TimeCreated value."""
+
+    channel: Optional[str] = None
+    channel_value: Optional[int] = None
+    event_id: Optional[int] = None
+    event_id_value: Optional[int] = None
+    time_value: Optional[int] = None
+
+    @classmethod
+    def from_template(cls, template: Template) -> Optional["TemplateSelector"]:
+        system = find_child(template.element, "System")
+        channel, channel_value = content(find_child(system, "Channel"))
+        event_id, event_id_value = content(find_child(system, "EventID"))
+        if (channel is None and channel_value is None) or (
+            event_id is None and event_id_value is None
+        ):
+            return None
+        if event_id is not None and not event_id.isdigit():
+            return None
+
+        time_created = find_child(system, "TimeCreated")
+        system_time = time_created and time_created.attributes.get("SystemTime")
+
+        return cls(
+            channel=channel,
+            channel_value=channel_value,
+            event_id=int(event_id) if event_id is not None else None,
+            event_id_value=event_id_value,
+            time_value=(
+                int(system_time.sub_id) if isinstance(system_time, BxmlSub) else None
+            ),
+        )
+
+
+def find_child(tag: Optional[BxmlTag], name: str) -> Optional[BxmlTag]:
+    if isinstance(tag, BxmlTag):
+        for child in tag.children:
+            if isinstance(child, BxmlTag) and child.name == name:
+                return child
+    return None
+
+
+def content(tag: Optional[BxmlTag]) -> tuple[Optional[str], Optional[int]]:
+    """Return the literal text of an element or the index of its substitution."""
+    if tag is not None and len(tag.children) == 1:
+        child = tag.children[0]
+        if isinstance(child, BxmlSub):
+            return None, int(child.sub_id)
+        if isinstance(child, str):
+            return str(child), None
+    return None, None
+
+
+class FilteredChunk(ElfChnk):
+    """ElfChnk which skips the records an EventFilter doesn't want before rendering.
+
+    Once a template has been rendered, the channel, EventID and TimeCreated of the
+    records which instantiate it are read straight from their substitution values. Templates with
+    a literal channel nobody wants are skipped without reading the record at all.
+    Records which can't be decided that way are rendered and filtered afterwards.
+    """
+
+    def __init__(self, data: bytes, wanted: EventFilter, path=None):
+        super().__init__(data, path)
+        self.data = data
+        self.wanted = wanted
+        self.selectors: dict[int, Optional[TemplateSelector]] = {}
+
+    def read(self, records=True):
+        try:
+            offset = EVTX_CHUNK_HEADER_SIZE
+            while offset + RECORD_HEADER.size <= len(self.data):
+                signature, size, record_id, _ = RECORD_HEADER.unpack_from(
+                    self.data, offset
+                )
+                if signature != EVTX_RECORD_SIGNATURE or size < RECORD_HEADER.size + 4:
+                    break
+                end = offset + size
+                if end > len(self.data):
+                    break
+                record_offset, offset = offset, end
+
+                # Truncated or partially written record
+                if RECORD_SIZE_COPY.unpack_from(self.data, end - 4)[0] != size:
+                    continue
+
+                data_offset = record_offset + RECORD_HEADER.size
+                bxml_data = self.data[data_offset : end - 4]
+                if record_id <= self.wanted.after_record_id:
+                    self.read_template(bxml_data)
+                    continue
+                if not self.wanted.wants_everything and self.skip(bxml_data) is True:
+                    continue
+
+                record = self.render(bxml_data, data_offset)
+                if record is not None and self.wanted.wants_record(record):
+                    yield record
+        except Exception as e:
+            if not self.empty:
+                logger.debug(f"Exception when processing chunk: {e!r}")
+                raise MalformedElfChnkException()
+
+    def render(self, bxml_data: bytes, data_offset: int):
+        self.data_offset = data_offset
+        return render_record(self.stream, self.templates, bxml_data, data_offset)
+
+    def read_template(self, bxml_data: bytes) -> None:
+        """Read the template a skipped record instantiates, later records may use it."""
+        if (
+            len(bxml_data) < TEMPLATE_VALUES_OFFSET
+            or bxml_data[TEMPLATE_INSTANCE_OFFSET] & 0x1F
+            != BxmlToken.BXML_TEMPLATE_INSTANCE
+        ):
+            return
+
+        _, _, template_offset = TEMPLATE_REFERENCE.unpack_from(
+            bxml_data, TEMPLATE_INSTANCE_OFFSET + 1
+        )
+        if template_offset not in self.templates:
+            load_template(self.stream, self.templates, template_offset)
+
+    def skip(self, bxml_data: bytes) -> Optional[bool]:
+        """Tell whether a record can be skipped, None when it has to be rendered."""
+        if (
+            len(bxml_data) < TEMPLATE_VALUES_OFFSET
+            or bxml_data[TEMPLATE_INSTANCE_OFFSET] & 0x1F
+            != BxmlToken.BXML_TEMPLATE_INSTANCE
+        ):
+            return None
+
+        _, _, template_offset = TEMPLATE_REFERENCE.unpack_from(
+            bxml_data, TEMPLATE_INSTANCE_OFFSET + 1
+        )
+        if template_offset not in self.selectors:
+            if template_offset not in self.templates:
+                # the template is defined by this record
+                return None
+            self.selectors[template_offset] = TemplateSelector.from_template(
+                self.templates[template_offset]
+            )
+
+        selector = self.selectors[template_offset]
+        if selector is None:
+            return None
+
+        if selector.channel is not None and not self.wanted.wants_channel(
+            selector.channel
+        ):
+            return True
+
+        values = template_values(
+            bxml_data,
+            (selector.channel_value, selector.event_id_value, selector.time_value),
+        )
+        if values is None:
+            return None
+
+        channel, event_id, time_created = values
+        if selector.channel is not None:
+            channel = selector.channel
+        if selector.event_id is not None:
+            event_id = selector.event_id
+        if channel is UNDECIDED or event_id is UNDECIDED:
+            return None
+        if not self.wanted.wants(channel, event_id):
+            return True
+        return isinstance(
+            time_created, int
+        ) and not self.wanted.window.contains_filetime(time_created)
+
+
+def new_bxml(
+    stream: BinaryIO, templates: dict, bxml_data: bytes, data_offset: int
+) -> Bxml:
+    """Return a Bxml reader of `bxml_data`, found at `data_offset` of a chunk."""
+    bxml = Bxml(bxml_stream=io.BytesIO(bxml_data), elf_chunk_stream=stream)
+    bxml.data_offset = data_offset
+    bxml.templates = templates
+    bxml.template = None
+    bxml.set_name_reader(EvtxNameReader(bxml))
+    return bxml
+
+
+def render_record(
+    stream: BinaryIO, templates: dict, bxml_data: bytes, data_offset: int
+) -> Optional[dict]:
+    """Render the BinXML of a record, None for a record without TimeCreated."""
+    record = parse_bxml(new_bxml(stream, templates, bxml_data, data_offset))
+
+    # Validate record, like ElfChnk
+    timestamp = record.get("TimeCreated_SystemTime")
+    if timestamp is None or (
+        isinstance(timestamp, BxmlSub) and timestamp.get() is None
+    ):
+        return None
+    return record
+
+
+def load_template(stream: BinaryIO, templates: dict, offset: int) -> None:
+    """Read the template defined at `offset` of a chunk into `templates`.
+
+    Templates are read by the first record which uses them: this is for records
+    read on their own, without the records before them.
+    """
+    stream.seek(offset)
+    bxml = new_bxml(stream, templates, stream.read(), offset)
+    templates[offset] = bxml._create_and_fill_template()
+
+
+def template_values(
+    bxml_data: bytes, indices: tuple[Optional[int], ...]
+) -> Optional[tuple]:
+    """Read substitution values of a template instance, by index.
+
+    Values of a type which isn't read without rendering are UNDECIDED, missing
+    values are None. Returns None if the value table is truncated.
+    """
+    (count,) = VALUE_COUNT.unpack_from(bxml_data, TEMPLATE_VALUES_OFFSET)
+    descriptors = TEMPLATE_VALUES_OFFSET + VALUE_COUNT.size
+    position = descriptors + count * VALUE_DESCRIPTOR.size
+
+    values = {}
+    for index in range(count):
+        size, value_type, _ = VALUE_DESCRIPTOR.unpack_from(
+            bxml_data, descriptors + index * VALUE_DESCRIPTOR.size
+        )
+        if index in indices:
+            if position + size > len(bxml_data):
+                return None
+            values[index] = read_value(
+                bxml_data[position : position + size], value_type
+            )
+        position += size
+
+    if position > len(bxml_data):
+        return None
+    return tuple(values.get(index) for index in indices)
+
+
+def read_value(data: bytes, value_type: int):
+    if value_type == BxmlType.NULL:
+        return None
+    if value_type == BxmlType.STRING:
+        return data.decode("utf-16-le").rstrip("\x00")
+    if value_type in VALUE_FORMATS and len(data) == struct.calcsize(
+        VALUE_FORMATS[value_type]
+    ):
+        return struct.unpack(VALUE_FORMATS[value_type], data)[0]
+    return UNDECIDED
+
+
+def evtx_chunk_headers(fh: BinaryIO) -> list[tuple[int, int, int]]:
+    """Return the (first EventRecordID, last EventRecordID, offset) of the chunks of
+    an EVTX file, by first EventRecordID.
+
+    The log is a circular buffer, once it wrapped the oldest chunk is no longer the
+    first one of the file. Only the chunk headers are read.
+    """
+    header = c_evtx.EVTX_HEADER(fh)
+    size = fh.seek(0, io.SEEK_END)
+
+    chunks = []
+    for offset in range(
+        header.header_block_size, size - EVTX_CHUNK_SIZE + 1, EVTX_CHUNK_SIZE
+    ):
+        fh.seek(offset)
+        chunk = c_evtx.EVTX_CHUNK(fh)
+        if chunk.magic == EVTX_CHUNK_MAGIC:
+            chunks.append((chunk.first_record_id, chunk.last_record_id, offset))
+    return sorted(chunks)
+
+
+def evtx_chunk_offsets(fh: BinaryIO) -> list[int]:
+    """Return the offsets of the chunks of an EVTX file, by first EventRecordID."""
+    return [offset for _, _, offset in evtx_chunk_headers(fh)]
+
+
+def read_chunk(data: bytes, wanted: EventFilter) -> Generator[dict, None, None]:
+    """Yield the events of a chunk which `wanted` wants."""
+    try:
+        yield from FilteredChunk(data, wanted).read()
+    except MalformedElfChnkException:
+        # like Evtx, keep the events read before the chunk turned out to be corrupt
+        pass
+
+
+def read_events(fh: BinaryIO, wanted: EventFilter) -> Generator[dict, None, None]:
+    """Yield the events of an EVTX file which `wanted` wants, chunk by chunk."""
+    for offset in evtx_chunk_offsets(fh):
+        fh.seek(offset)
+        yield from read_chunk(fh.read(EVTX_CHUNK_SIZE), wanted)
+
+
+def decode_chunk(data: bytes, wanted: EventFilter) -> list[dict]:
+    """Decode the events of a chunk which `wanted` wants (in a worker process).
+
+    dissect shares the substitutions of a template between the records which use it
+    and reads integers as cstruct types, which can't be pickled: values are copied
+    to plain Python objects.
+    """
+    events = [plain_event(event) for event in read_chunk(data, wanted)]
+    return sorted(events, key=lambda event: event.get("EventRecordID") or 0)
+
+
+def plain_event(event: dict) -> dict:
+    return {str(key): plain_value(value) for key, value in event.items()}
+
+
+def plain_value(value):
+    if isinstance(value, BxmlSub):
+        substitution = BxmlSub(int(value.sub_id))
+        substitution.set(plain_value(value.get()))
+        return substitution
+    if isinstance(value, list):
+        return [plain_value(item) for item in value]
+    if isinstance(value, int) and not isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str):
+        return str(value)
+    return value
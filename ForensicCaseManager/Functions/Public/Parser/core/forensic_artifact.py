@@ -1,16 +1,22 @@
 import logging
 from pathlib import Path
+from operator import attrgetter
 from datetime import timedelta, timezone
-from typing import Generator
+from functools import lru_cache
+from collections import namedtuple
+from typing import Callable, ClassVar, Generator, Iterable, Optional
 from dataclasses import dataclass, field
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
 from dissect.target import Target
 from dissect.target.filesystem import Filesystem
 
 from util.timestamp import Timestamp
 from util.file_extractor import FileExtractor
+from core.parse_cache import ParseCache, file_digest, parser_version
+from core.time_window import TimeWindow
 from settings.artifact_schema import ArtifactSchema
+from settings.config import DEFAULT_VALIDATION, VALIDATION_SAMPLE_RATE
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +25,67 @@ class ArtifactRecord(BaseModel):
     evidence_id: str
 
 
+class ArtifactRow(tuple):
+    """Compact record of an ArtifactRecord model: its field values in column order.
+
+    Rows are what parsers hand over to the database, they take a fraction of the
+    memory of a model instance and go to `executemany` as they are.
+    """
+
+    __slots__ = ()
+    model: ClassVar[type[ArtifactRecord]]
+
+    def __reduce__(self):
+        # row types are created at runtime, pickle them through their model
+        return make_row, (self.model, tuple(self))
+
+
+@lru_cache(maxsize=None)
+def get_row_type(model: type[ArtifactRecord]) -> type[ArtifactRow]:
+    """Return the row type of `model`, a named tuple of its fields."""
+    fields = namedtuple(f"{model.__name__}Row", model.model_fields)
+    return type(
+        fields.__name__, (fields, ArtifactRow), {"__slots__": (), "model": model}
+    )
+
+
+def make_row(model: type[ArtifactRecord], values: Iterable) -> ArtifactRow:
+    return tuple.__new__(get_row_type(model), values)
+
+
+def construct_row(model: type[ArtifactRecord], data: dict) -> ArtifactRow:
+    """Create a row of `model` from trusted data, without validation.
+
+    Missing fields are None.
+    """
+    row_type = get_row_type(model)
+    return tuple.__new__(row_type, map(data.get, row_type._fields))
+
+
+def validate_row(model: type[ArtifactRecord], data: dict) -> ArtifactRow:
+    """Create a row of `model` from data validated by the model.
+
+    Raises `ValidationError` for invalid data.
+    """
+    return tuple.__new__(get_row_type(model), model(**data).__dict__.values())
+
+
+@lru_cache(maxsize=1)
+def open_target(evidence: str) -> Target:
+    """Open the evidence once per process, for all the sources of its tasks."""
+    return Target.open(evidence)
+
+
 @dataclass
 class Source:
     _evidence: str = None
     source: Target = field(init=False)
     source_path: str = field(init=False)
+    # state shared by the artifacts of the evidence, e.g. the EVTX engine
+    shared: dict = field(init=False, default_factory=dict)
 
     def __post_init__(self):
-        self.source = Target.open(self._evidence)
+        self.source = open_target(self._evidence)
         self.source_path = self._evidence
 
 
@@ -39,8 +98,24 @@ class ForensicArtifact:
     root: str = field(init=False)
     owner: str = field(init=False)
     entries: dict = field(init=False)
-    records: list[ArtifactRecord] = field(default_factory=list)
+    records: list[Iterable[ArtifactRow]] = field(default_factory=list)
+    streaming: bool = field(init=False, default=False)
+    sort_records: bool = field(init=False, default=True)
+    parse_cache: Optional[ParseCache] = field(init=False, default=None)
+    validation: str = field(init=False, default=DEFAULT_VALIDATION)
+    sample_rate: int = field(init=False, default=VALIDATION_SAMPLE_RATE)
+    time_window: TimeWindow = field(init=False, default_factory=TimeWindow)
+    validation_errors: int = field(init=False, default=0)
+    # record streams cut short by an error, the artifact is then left unfinished
+    export_errors: int = field(init=False, default=0)
+    _built_records: int = field(init=False, default=0)
     _evidence_id: str = field(init=False)
+    # artifacts of the same group share a parsing pass (see `prepare`)
+    group: ClassVar[Optional[str]] = None
+    # optional artifacts are only parsed when asked for by name, not by category
+    optional: ClassVar[bool] = False
+    # rows exported at once, at least, whatever the batch size of the case
+    min_batch_size: ClassVar[Optional[int]] = None
 
     def __post_init__(self):
         self.name = self.schema.name
@@ -111,6 +186,9 @@ class ForensicArtifact:
                         continue
                     yield node
 
+    def prepare(self) -> None:
+        """Called for all artifacts of an evidence before any of them is parsed."""
+
     def parse(self, descending: bool = False) -> Generator[ArtifactRecord, None, None]:
         """parse artifact.
 
@@ -120,6 +198,92 @@ class ForensicArtifact:
         """
         raise NotImplementedError
 
+    def collect(
+        self,
+        records: Iterable[ArtifactRecord],
+        key: Optional[str] = None,
+        descending: bool = False,
+    ) -> None:
+        """collect parsed records of a single table into `self.records`.
+
+        Args:
+            records (Iterable[ArtifactRecord])
+                - parsed records of a single table.
+            key (str, optional)
+                - record field to sort parsed results by. Defaults to None (unsorted).
+            descending (bool, optional)
+                - sort parsed results by descending/ascending order. Defaults to False.
+
+        In streaming mode the records are kept as a lazy generator, so they are
+        parsed batch by batch while being exported instead of being sorted in memory.
+        Without `sort_records` they are kept in parsing order, the database orders
+        them on read through the sort key index and the views of the table.
+        With a time window, records whose `key` timestamp is outside of it are
+        dropped. Parsers of ordered sources skip them before decoding instead.
+        """
+        if key and self.time_window:
+            get_key = attrgetter(key)
+            records = (
+                record
+                for record in records
+                if self.time_window.contains(get_key(record))
+            )
+
+        validated = (
+            self.validate_record(index=index, record=record)
+            for index, record in enumerate(records)
+        )
+        if self.streaming:
+            self.records.append(validated)
+        elif key and self.sort_records:
+            self.records.append(
+                sorted(validated, key=attrgetter(key), reverse=descending)
+            )
+        else:
+            self.records.append(list(validated))
+
+    def read_cached(
+        self, entry: Path, read: Callable[[Path], Iterable[ArtifactRow]]
+    ) -> Generator[ArtifactRow, None, None]:
+        """Yield the rows `read` parses from the source file `entry`.
+
+        With a parse cache, rows of a source file already parsed by the same version
+        of `read` are replayed from the cache instead.
+        """
+        if self.parse_cache is None:
+            yield from read(entry)
+            return
+
+        try:
+            key = self.parse_cache.key(
+                self.name,
+                read.__qualname__,
+                parser_version(read),
+                str(entry),
+                str(self.ts.tzinfo),
+                self.validation,
+                str(self.sample_rate),
+                file_digest(entry),
+            )
+        except Exception as e:
+            self.log_error(e)
+            yield from read(entry)
+            return
+
+        if (rows := self.parse_cache.load(key)) is not None:
+            logger.debug(f"{self.evidence_id}:{self.name} - replaying {entry}")
+            for row in rows:
+                if isinstance(row, ArtifactRow) and row.evidence_id != self.evidence_id:
+                    row = row._replace(evidence_id=self.evidence_id)
+                yield row
+            return
+
+        rows = []
+        for row in read(entry):
+            rows.append(row)
+            yield row
+        self.parse_cache.store(key, rows)
+
     def check_empty_entry(self, entry: Generator) -> Generator:
         try:
             first = next(entry)
@@ -129,8 +293,8 @@ class ForensicArtifact:
             yield first
             yield from entry
 
-    def validate_record(self, index: int, record: ArtifactRecord) -> dict:
-        if isinstance(record, ArtifactRecord):
+    def validate_record(self, index: int, record: ArtifactRow) -> dict:
+        if isinstance(record, (ArtifactRow, ArtifactRecord)):
             print(f"{self.name}-{index}: Succeed to parse")
         else:
             print(f"{self.name}-{index}: Failed to parse")
@@ -139,5 +303,34 @@ class ForensicArtifact:
             )
         return record
 
+    def build_record(self, model: type[ArtifactRecord], data: dict) -> ArtifactRow:
+        """Create a row of `model` from parsed data, according to `self.validation`.
+
+        "strict" validates every record, "sampled" validates 1 in `self.sample_rate`
+        records and "trusted" validates none of them. Records that are not validated
+        are stored as parsed.
+        Raises `ValidationError` for records failing validation.
+        """
+        validate = self.validation == "strict" or (
+            self.validation == "sampled" and self._built_records % self.sample_rate == 0
+        )
+        self._built_records += 1
+        if validate:
+            return validate_row(model, data)
+        return construct_row(model, data)
+
     def log_error(self, error: Exception) -> None:
+        if isinstance(error, ValidationError):
+            self.validation_errors += 1
         logger.error(f"{self.evidence_id}:{self.name} - {error}")
+
+    def log_export_error(self, error: Exception) -> None:
+        """Log an error raised while exporting the records of the artifact."""
+        self.export_errors += 1
+        self.log_error(error)
+
+    def log_validation_summary(self) -> None:
+        if self.validation_errors:
+            logger.warning(
+                f"{self.evidence_id}:{self.name} - {self.validation_errors} records failed validation ({self.validation})"
+            )
@@ -1,9 +1,15 @@
 import logging
+import multiprocessing
+from queue import Empty
 from pathlib import Path
+from typing import Optional
 from dataclasses import dataclass
+from concurrent.futures import Future, ProcessPoolExecutor
 
 from core.forensic_evidence import ForensicEvidence
 from core.case_config import CaseConfig
+from core.database_writer import DatabaseWriter
+from core.artifact_worker import init_worker, parse_artifact
 
 logger = logging.getLogger(__name__)
 
@@ -12,10 +18,16 @@ logger = logging.getLogger(__name__)
 class ForensicCase(CaseConfig):
     case_directory: Path
     forensic_evidences: list[ForensicEvidence]
+    vacuum: bool = False
+    resume: bool = False
 
     def __post_init__(self):
         super().__post_init__()
 
+        # share a single database manager (and its connections) across the case
+        for forensic_evidence in self.forensic_evidences:
+            forensic_evidence.db_manager = self.db_manager
+
     def investigate_case(self):
         # # create case directory
         # self._create_case_directory()
@@ -23,11 +35,33 @@ class ForensicCase(CaseConfig):
         # initialize database
         self._init_database()
 
-        # parse artifacts in all forensic evidences
-        self._parse_evidences_all()
+        # skip the artifacts finished by a previous run of the session
+        if self.resume:
+            self._resume_case()
+
+        # skip the events ingested by previous sessions
+        if self.incremental_evtx:
+            for forensic_evidence in self.forensic_evidences:
+                forensic_evidence.load_evtx_watermarks()
+
+        # all artifact records are written by a single writer thread
+        with DatabaseWriter(db_manager=self.db_manager) as db_writer:
+            self._set_db_writer(db_writer)
+
+            if self.streaming or self.workers > 1:
+                # parse and export artifacts in all forensic evidences, batch by batch
+                self._process_evidences_all()
+            else:
+                # parse artifacts in all forensic evidences
+                self._parse_evidences_all()
 
-        # export artifacts in all forensic evidences
-        self._export_evidences_all()
+                # export artifacts in all forensic evidences
+                self._export_evidences_all()
+
+        self._set_db_writer(None)
+
+        # analyze (and vacuum) the database once all artifacts are written
+        self.db_manager.finalize(vacuum=self.vacuum)
 
     # def _create_case_directory(self):
     #     try:
@@ -42,10 +76,29 @@ class ForensicCase(CaseConfig):
         # set evidences table
         self._init_table_evidences()
 
+        # set processing_state table
+        self._init_table_processing_state()
+
         # TODO: Make a connection to the Artifacts
         # set artifact category table
         # self._init_table_artifact_category()
 
+    def _init_table_processing_state(self):
+        self.db_manager.create_processing_state_table()
+
+    def _resume_case(self):
+        finished = self.db_manager.prepare_resume()
+        for forensic_evidence in self.forensic_evidences:
+            remaining = []
+            for forensic_artifact in forensic_evidence.forensic_artifacts:
+                if (forensic_evidence.evidence_id, forensic_artifact.name) in finished:
+                    logger.info(
+                        f"Skipping {forensic_artifact.name} of {forensic_evidence.evidence_id}, already processed"
+                    )
+                else:
+                    remaining.append(forensic_artifact)
+            forensic_evidence.forensic_artifacts = remaining
+
     def _init_table_forensic_case(self):
         # create forensic_case table
         self.db_manager.create_forensic_case_table()
@@ -77,6 +130,11 @@ class ForensicCase(CaseConfig):
                     f"Inserted {forensic_evidence.evidence_id} into evidences table in {self.case_name} case"
                 )
 
+    def _set_db_writer(self, db_writer: Optional[DatabaseWriter]):
+        self.db_writer = db_writer
+        for forensic_evidence in self.forensic_evidences:
+            forensic_evidence.db_writer = db_writer
+
     def _init_table_artifact_category(self):
         self.db_manager.create_artifact_category_table()
 
@@ -87,3 +145,76 @@ class ForensicCase(CaseConfig):
     def _export_evidences_all(self):
         for forensic_evidence in self.forensic_evidences:
             forensic_evidence.export_evidence()
+
+    def _process_evidences_all(self):
+        if self.workers > 1:
+            self._process_evidences_parallel(descending=False)
+            return
+
+        for forensic_evidence in self.forensic_evidences:
+            forensic_evidence.process_evidence(descending=False)
+
+    def _process_evidences_parallel(self, descending: bool = False):
+        """Parse artifacts of all forensic evidences in one process pool.
+
+        Tasks are scheduled largest image first (longest processing time first),
+        so that small evidences fill up the workers while big ones are running.
+        Workers put batches of records on a shared queue, this process is the
+        only writer of the case database.
+        """
+        forensic_evidences = sorted(
+            self.forensic_evidences,
+            key=lambda forensic_evidence: forensic_evidence.evidence_size,
+            reverse=True,
+        )
+        tasks = [
+            task
+            for forensic_evidence in forensic_evidences
+            for task in forensic_evidence.artifact_tasks(descending=descending)
+        ]
+        if not tasks:
+            return
+
+        with multiprocessing.Manager() as manager:
+            queue = manager.Queue(maxsize=self.workers * 2)
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(tasks)),
+                initializer=init_worker,
+                initargs=(self.log_file,),
+            ) as executor:
+                futures = [
+                    executor.submit(parse_artifact, task, queue) for task in tasks
+                ]
+                self._drain_queue(queue=queue, futures=futures)
+
+        for task, future in zip(tasks, futures):
+            if error := future.exception():
+                logger.error(f"{task.evidence_id}:{task.name} - {error}")
+
+    def _drain_queue(self, queue, futures: list[Future]) -> None:
+        """Export record batches from `queue` until every worker has finished."""
+        forensic_evidences = {
+            forensic_evidence.evidence_id: forensic_evidence
+            for forensic_evidence in self.forensic_evidences
+        }
+        remaining = len(futures)
+        while remaining:
+            try:
+                message = queue.get(timeout=1)
+            except Empty:
+                # a worker which died abruptly never puts its sentinel
+                if all(future.done() for future in futures):
+                    break
+                continue
+
+            if message is None:
+                remaining -= 1
+                continue
+
+            evidence_id, artifact, record = message
+            if record is None:
+                forensic_evidences[evidence_id]._complete_artifact(artifact)
+            else:
+                forensic_evidences[evidence_id]._create_and_insert_table(
+                    record, artifact=artifact
+                )
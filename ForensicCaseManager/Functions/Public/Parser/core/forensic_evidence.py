@@ -3,10 +3,14 @@ from pathlib import Path
 from typing import Generator, Optional
 from dataclasses import dataclass, field
 
+from util.batch import batched
 from util.converter import convertfrom_extended_ascii
 from pathlib import Path
 from core.forensic_artifact import Source, ForensicArtifact
+from core.parse_cache import ParseCache
 from core.case_config import CaseConfig
+from core.artifact_worker import ArtifactTask
+from core.evtx_engine import get_evtx_engine
 from settings.artifacts import Artifacts
 from settings.artifact_schema import ArtifactSchema
 
@@ -28,6 +32,17 @@ class ForensicEvidence(CaseConfig):
 
         # set src
         self.src = Source(_evidence=self._evidence)
+        get_evtx_engine(self.src).workers = self.evtx_workers
+        get_evtx_engine(self.src).time_window = self.time_window
+        get_evtx_engine(self.src).incremental = self.incremental_evtx
+        if self.streaming:
+            get_evtx_engine(self.src).export = self._export_rows
+            get_evtx_engine(self.src).batch_size = self.batch_size
+        self.src.shared["usn_workers"] = self.usn_workers
+        try:
+            get_evtx_engine(self.src).host = self.computer_name
+        except Exception as e:
+            logger.warning(f"Unable to read the computer name of {self._evidence}: {e}")
 
         # set evidence_id
         self.evidence_id = "-".join([str(self.session_id), str(self._evidence_number)])
@@ -50,7 +65,10 @@ class ForensicEvidence(CaseConfig):
                         )
             if self._categories:
                 for category_number in self._categories:
-                    if category == int(category_number):
+                    if (
+                        category == int(category_number)
+                        and not ForensicArtifact.optional
+                    ):
                         self.forensic_artifacts.append(
                             ForensicArtifact(
                                 src=self.src,
@@ -64,11 +82,31 @@ class ForensicEvidence(CaseConfig):
         # set forensic_artifacts properties
         for forensic_artifact in self.forensic_artifacts:
             forensic_artifact.evidence_id = self.evidence_id
+            forensic_artifact.streaming = self.streaming
+            forensic_artifact.sort_records = self.sort_records
+            if self.parse_cache_directory:
+                forensic_artifact.parse_cache = ParseCache(
+                    directory=self.parse_cache_directory
+                )
+            forensic_artifact.validation = self.validation
+            forensic_artifact.sample_rate = self.sample_rate
+            forensic_artifact.time_window = self.time_window
 
     @property
     def evidence_label(self):
         return Path(self.src.source_path).stem
 
+    @property
+    def evidence_size(self) -> int:
+        """Return the total size of the evidence image, including all its segments."""
+        path = Path(self.src.source_path)
+        segments = [
+            segment
+            for segment in path.parent.glob(f"{path.stem}.*")
+            if segment.suffix[:2].lower() == path.suffix[:2].lower()
+        ]
+        return sum(segment.stat().st_size for segment in segments or [path])
+
     @property
     def computer_name(self):
         computer_name = self.src.source.name
@@ -102,8 +140,18 @@ class ForensicEvidence(CaseConfig):
                 encoding="UTF-16-LE",
             )
 
+    def load_evtx_watermarks(self) -> None:
+        """Read the event log watermarks of the host from previous ingests."""
+        engine = get_evtx_engine(self.src)
+        engine.watermarks = self.db_manager.evtx_watermarks(host=engine.host)
+
+    def prepare_evidence(self) -> None:
+        for forensic_artifact in self.forensic_artifacts:
+            forensic_artifact.prepare()
+
     def parse_evidence(self, descending: bool = False) -> None:
         """Return the content of all forensic artifacts."""
+        self.prepare_evidence()
         for forensic_artifact in self.forensic_artifacts:
             forensic_artifact.parse(descending=descending)
 
@@ -111,14 +159,80 @@ class ForensicEvidence(CaseConfig):
         for forensic_artifact in self.forensic_artifacts:
             self._export_artifact(forensic_artifact)
 
+    def process_evidence(self, descending: bool = False) -> None:
+        """Parse and export forensic artifacts one by one (streaming mode)."""
+        self.prepare_evidence()
+        for forensic_artifact in self.forensic_artifacts:
+            forensic_artifact.parse(descending=descending)
+            self._export_artifact(forensic_artifact)
+
+    def artifact_tasks(self, descending: bool = False) -> list[ArtifactTask]:
+        """Return the forensic artifacts as tasks for worker processes.
+
+        Artifacts of the same group share a parsing pass, so they make a single task.
+        """
+        groups: dict[str, list[tuple[str, int]]] = {}
+        for forensic_artifact in self.forensic_artifacts:
+            group = forensic_artifact.group or f"artifact:{forensic_artifact.name}"
+            groups.setdefault(group, []).append(
+                (forensic_artifact.name, forensic_artifact.category)
+            )
+
+        return [
+            ArtifactTask(
+                evidence=self.src.source_path,
+                evidence_id=self.evidence_id,
+                artifacts=artifacts,
+                streaming=self.streaming,
+                batch_size=self.batch_size,
+                evtx_workers=self.evtx_workers,
+                host=get_evtx_engine(self.src).host,
+                incremental_evtx=self.incremental_evtx,
+                evtx_watermarks=get_evtx_engine(self.src).watermarks,
+                usn_workers=self.usn_workers,
+                sort_records=self.sort_records,
+                parse_cache_directory=self.parse_cache_directory,
+                validation=self.validation,
+                sample_rate=self.sample_rate,
+                time_window=self.time_window,
+                descending=descending,
+            )
+            for artifacts in groups.values()
+        ]
+
     def _export_artifact(self, artifact: ForensicArtifact) -> None:
         """Export a single forensic artifact."""
-        for record in artifact.records:
-            if record:
-                self._create_and_insert_table(record)
-
-    def _create_and_insert_table(self, record: Generator) -> None:
+        batch_size = max(self.batch_size, artifact.min_batch_size or 0)
+        for records in artifact.records:
+            try:
+                for record in batched(records, batch_size):
+                    self._create_and_insert_table(record, artifact=artifact.name)
+            except Exception as e:
+                # in streaming mode, parsing errors are raised while exporting
+                artifact.log_export_error(e)
+        artifact.log_validation_summary()
+        # an artifact cut short stays unfinished, so that --resume runs it again
+        if not artifact.export_errors:
+            self._complete_artifact(artifact.name)
+
+        # release exported records
+        artifact.records.clear()
+
+    def _export_rows(self, artifact: ForensicArtifact, rows: list) -> None:
+        """Export a batch of rows of an artifact while it is being parsed."""
+        self._create_and_insert_table(rows, artifact=artifact.name)
+
+    def _create_and_insert_table(
+        self, record: Generator, artifact: Optional[str] = None
+    ) -> None:
         """Create a table for the artifact and insert data."""
+        if self.db_writer:
+            # the writer thread creates the table and inserts the data
+            self.db_writer.write(
+                record=record, evidence_id=self.evidence_id, artifact=artifact
+            )
+            return
+
         # Create artifact table
         self.db_manager.create_artifact_table(
             record=record, evidence_id=self.evidence_id
@@ -126,5 +240,16 @@ class ForensicEvidence(CaseConfig):
 
         # Insert artifact data
         self.db_manager.insert_artifact_data(
-            record=record, evidence_id=self.evidence_id
+            record=record, evidence_id=self.evidence_id, artifact=artifact
         )
+
+    def _complete_artifact(self, artifact: str) -> None:
+        """Record in the processing state that the artifact is completely exported."""
+        if self.db_writer:
+            self.db_writer.complete(evidence_id=self.evidence_id, artifact=artifact)
+            return
+
+        with self.db_manager.open_db() as cursor:
+            self.db_manager.complete_unit(
+                cursor, evidence_id=self.evidence_id, artifact=artifact
+            )
@@ -0,0 +1,96 @@
+import os
+import pickle
+import inspect
+import hashlib
+import logging
+from pathlib import Path
+from typing import Callable, Optional
+from functools import lru_cache
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# bumped whenever the layout of the cached rows changes
+CACHE_FORMAT = "1"
+CHUNK_SIZE = 1024 * 1024
+# packages the artifact parsers share, a change to any of them invalidates all rows
+SHARED_PACKAGES = ("core", "lib", "util", "settings")
+PARSER_ROOT = Path(__file__).resolve().parent.parent
+
+
+def file_digest(path: Path) -> str:
+    """Return the BLAKE2b digest of the content of a (target) file."""
+    digest = hashlib.blake2b(digest_size=20)
+    with path.open("rb") as fh:
+        while chunk := fh.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def source_digest(source_file: str) -> str:
+    """Return the digest of a parser module, any change to it invalidates its rows."""
+    return hashlib.blake2b(Path(source_file).read_bytes(), digest_size=20).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def shared_digest() -> str:
+    """Return the digest of the sources of the packages shared by the parsers."""
+    digest = hashlib.blake2b(digest_size=20)
+    for package in SHARED_PACKAGES:
+        for source_file in sorted((PARSER_ROOT / package).rglob("*.py")):
+            digest.update(source_file.relative_to(PARSER_ROOT).as_posix().encode())
+            digest.update(b"\x00" + source_digest(str(source_file)).encode())
+    return digest.hexdigest()
+
+
+def parser_version(read: Callable) -> str:
+    return f"{source_digest(inspect.getsourcefile(read))}:{shared_digest()}"
+
+
+@dataclass(kw_only=True)
+class ParseCache:
+    """On-disk cache of the rows parsed from artifact source files.
+
+    Entries are keyed by the content of the source file, the version of its parser
+    (its module and the shared packages) and the validation settings, so that
+    re-runs over unchanged sources replay the stored rows instead of parsing the
+    files again. Every entry is a separate file, written atomically, so that worker
+    processes can share the cache.
+
+    Upgrades of third-party parsing libraries (dissect) are not part of the key,
+    remove the cache directory after such an upgrade to parse everything again.
+    """
+
+    directory: Path
+
+    def key(self, *parts: str) -> str:
+        digest = hashlib.blake2b(CACHE_FORMAT.encode(), digest_size=20)
+        for part in parts:
+            digest.update(b"\x00" + part.encode("utf-8", errors="surrogatepass"))
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Optional[list]:
+        try:
+            with self._path(key).open("rb") as fh:
+                return pickle.load(fh)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parse cache entry {key}: {e}")
+            return None
+
+    def store(self, key: str, rows: list) -> None:
+        path = self._path(key)
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with temporary.open("wb") as fh:
+                pickle.dump(rows, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+        except Exception as e:
+            logger.warning(f"Unable to store parse cache entry {key}: {e}")
+            temporary.unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pickle"
@@ -0,0 +1,281 @@
+import json
+import types
+from operator import attrgetter
+from functools import cached_property, lru_cache
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Union, get_args, get_origin
+
+from core.forensic_artifact import ArtifactRecord, ArtifactRow
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# SQLite column types of the record field types, anything else is stored as TEXT
+COLUMN_TYPES = {
+    bool: "INTEGER",
+    int: "INTEGER",
+    float: "REAL",
+    bytes: "BLOB",
+    datetime: "INTEGER",  # microseconds since the Unix epoch (UTC)
+}
+
+
+def to_epoch_us(value: datetime) -> int:
+    """Return an aware (or UTC naive) datetime as microseconds since the Unix epoch."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def convert_datetime(value: Any) -> Any:
+    return to_epoch_us(value) if isinstance(value, datetime) else value
+
+
+def convert_list(value: Any) -> Any:
+    if not isinstance(value, list):
+        return value
+    return json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in value])
+
+
+def render_epoch_us(column: str) -> str:
+    """Return an SQL expression rendering an epoch microseconds column as ISO 8601."""
+    microseconds = f"((({column} % 1000000) + 1000000) % 1000000)"
+    seconds = f"(({column} - {microseconds}) / 1000000)"
+    return (
+        f"strftime('%Y-%m-%d %H:%M:%S', {seconds}, 'unixepoch')"
+        f" || printf('.%06d', {microseconds}) || '+00:00'"
+    )
+
+
+def render_flags(column: str, lookup_table: str) -> str:
+    """Return an SQL expression rendering a bitmask column as "NAME|NAME" through a
+    lookup table of its flags, like str() of a cstruct flag without its type name
+    ("None" without any known flag).
+    """
+    return (
+        f"COALESCE((SELECT group_concat(name, '|') FROM {lookup_table}"
+        f" WHERE ({column} = 0 AND value = 0)"
+        f" OR (value != 0 AND ({column} & value) = value)), 'None')"
+    )
+
+
+def lookup_table_statements(table_name: str, names: dict[int, str]) -> list[str]:
+    """Return the statements creating and filling a lookup table of names by value."""
+    values = ", ".join(
+        f"({value}, '{name.replace(chr(39), chr(39) * 2)}')"
+        for value, name in sorted(names.items())
+    )
+    return [
+        f"CREATE TABLE IF NOT EXISTS {table_name} (value INTEGER PRIMARY KEY, name TEXT NOT NULL)",
+        f"INSERT OR IGNORE INTO {table_name} (value, name) VALUES {values}",
+    ]
+
+
+def unwrap_optional(annotation: Any) -> Any:
+    """Return `X` for `Optional[X]`, the annotation itself otherwise."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+@dataclass
+class Column:
+    name: str
+    annotation: Any
+    column_type: str = field(init=False)
+    converter: Optional[Callable[[Any], Any]] = field(init=False, default=None)
+    is_datetime: bool = field(init=False, default=False)
+
+    def __post_init__(self):
+        annotation = unwrap_optional(self.annotation)
+        origin = get_origin(annotation) or annotation
+
+        self.column_type = COLUMN_TYPES.get(origin, "TEXT")
+        if origin is datetime:
+            self.converter = convert_datetime
+            self.is_datetime = True
+        elif origin is list:
+            self.converter = convert_list
+
+
+@dataclass
+class TableSchema:
+    """Table layout of an ArtifactRecord model, computed once per model.
+
+    Models may declare in their Config, besides `table_name` and `sort_key`:
+    `view_columns`, the columns of the views as SQL expressions by name (over the
+    table and the `view_joins` clauses), and `lookup_tables`, names by value of
+    lookup tables created along with the table, e.g. for `render_flags()`.
+    """
+
+    table_name: str
+    columns: list[Column]
+    sort_key: Optional[str] = None
+    view_columns: dict[str, str] = field(default_factory=dict)
+    view_joins: list[str] = field(default_factory=list)
+    lookup_tables: dict[str, dict[int, str]] = field(default_factory=dict)
+    view_name: str = field(init=False)
+    _getter: Callable = field(init=False, repr=False)
+    _converters: list[tuple[int, Callable]] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.view_name = f"{self.table_name}_view"
+        self._getter = attrgetter(*self.column_names)
+        self._converters = [
+            (index, column.converter)
+            for index, column in enumerate(self.columns)
+            if column.converter
+        ]
+
+    @cached_property
+    def column_names(self) -> list[str]:
+        return [column.name for column in self.columns]
+
+    @cached_property
+    def create_statements(self) -> list[str]:
+        statements = [
+            statement
+            for table_name, names in self.lookup_tables.items()
+            for statement in lookup_table_statements(table_name, names)
+        ]
+        statements += [self.create_table_statement, self.create_view_statement]
+        if self.sort_key:
+            statements.append(self.create_view_statement_descending)
+        return statements
+
+    @cached_property
+    def index_statements(self) -> list[str]:
+        """Index on the sort key, created once the table is written."""
+        if not self.sort_key:
+            return []
+        return [
+            f"CREATE INDEX IF NOT EXISTS idx_{self.table_name}_{self.sort_key} "
+            f"ON {self.table_name} ({self.sort_key})"
+        ]
+
+    @cached_property
+    def create_table_statement(self) -> str:
+        column_definitions = ", ".join(
+            f"{column.name} {column.column_type}" for column in self.columns
+        )
+        return f"CREATE TABLE IF NOT EXISTS {self.table_name} ({column_definitions})"
+
+    @cached_property
+    def create_view_statement(self) -> str:
+        """Human-readable view of the table, rendering timestamps as ISO 8601 (UTC).
+
+        Rows are ordered by the sort key of the model, if any.
+        """
+        return self._view_statement(self.view_name, descending=False)
+
+    @cached_property
+    def create_view_statement_descending(self) -> str:
+        return self._view_statement(f"{self.view_name}_desc", descending=True)
+
+    def _view_statement(self, view_name: str, descending: bool) -> str:
+        if self.view_columns:
+            columns = ", ".join(
+                f"{expression} AS {name}"
+                for name, expression in self.view_columns.items()
+            )
+        else:
+            columns = ", ".join(
+                (
+                    f"{render_epoch_us(column.name)} AS {column.name}"
+                    if column.is_datetime
+                    else column.name
+                )
+                for column in self.columns
+            )
+        statement = " ".join(
+            [
+                f"CREATE VIEW IF NOT EXISTS {view_name} AS SELECT {columns} FROM {self.table_name}",
+                *self.view_joins,
+            ]
+        )
+        if self.sort_key:
+            # qualified, so that the stored value is sorted and the index is used
+            order = "DESC" if descending else "ASC"
+            statement += f" ORDER BY {self.table_name}.{self.sort_key} {order}"
+        return statement
+
+    @cached_property
+    def insert_statement(self) -> str:
+        placeholders = ", ".join(["?"] * len(self.columns))
+        return f"INSERT INTO {self.table_name} ({', '.join(self.column_names)}) VALUES ({placeholders})"
+
+    def row(self, record: ArtifactRow | ArtifactRecord) -> tuple:
+        """Return the column values of a record, converted to SQLite types."""
+        if isinstance(record, ArtifactRow):
+            values = record
+        else:
+            values = self._getter(record)
+            if len(self.columns) == 1:
+                values = (values,)
+        if not self._converters:
+            return values
+
+        values = list(values)
+        for index, converter in self._converters:
+            if values[index] is not None:
+                values[index] = converter(values[index])
+        return tuple(values)
+
+    def rows(self, records: list[ArtifactRow | ArtifactRecord]) -> list[tuple]:
+        """Return the column values of a batch of records of the model, see `row()`.
+
+        Rows of a batch are converted in a single loop, this is the per-row cost of
+        every insert.
+        """
+        if not isinstance(records[0], ArtifactRow):
+            return [self.row(record) for record in records]
+        if not self._converters:
+            return list(records)
+
+        converters = self._converters
+        rows = []
+        append = rows.append
+        for record in records:
+            values = list(record)
+            for index, converter in converters:
+                if (value := values[index]) is not None:
+                    values[index] = converter(value)
+            append(tuple(values))
+        return rows
+
+
+@lru_cache(maxsize=None)
+def get_table_schema(model: type[ArtifactRecord]) -> TableSchema:
+    return TableSchema(
+        table_name=model.Config.table_name,
+        sort_key=getattr(model.Config, "sort_key", None),
+        view_columns=getattr(model.Config, "view_columns", {}),
+        view_joins=getattr(model.Config, "view_joins", []),
+        lookup_tables=getattr(model.Config, "lookup_tables", {}),
+        columns=[
+            Column(name=name, annotation=field_info.annotation)
+            for name, field_info in model.model_fields.items()
+        ],
+    )
+
+
+def record_schemas() -> dict[str, TableSchema]:
+    """Return the table schemas of all the record models defined, by table name."""
+    schemas = {}
+    models = ArtifactRecord.__subclasses__()
+    while models:
+        model = models.pop()
+        models.extend(model.__subclasses__())
+        if getattr(getattr(model, "Config", None), "table_name", None):
+            schemas.setdefault(model.Config.table_name, get_table_schema(model))
+    return schemas
+
+
+def get_record_schema(record: ArtifactRow | ArtifactRecord) -> TableSchema:
+    """Return the table schema of a row or a model instance."""
+    if isinstance(record, ArtifactRow):
+        return get_table_schema(record.model)
+    return get_table_schema(type(record))
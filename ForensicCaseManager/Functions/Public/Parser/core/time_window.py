@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, field
+from typing import Optional
+
+FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+
+def to_filetime(dt: datetime) -> int:
+    """Return the FILETIME (100ns intervals since 1601) of an aware datetime."""
+    return (dt - FILETIME_EPOCH) // timedelta(microseconds=1) * 10
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 date or datetime, in UTC unless it has an offset."""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+@dataclass(frozen=True, kw_only=True)
+class TimeWindow:
+    """Time window of the records to parse, both bounds are inclusive and optional.
+
+    Naive timestamps are taken as UTC. Records without a timestamp are kept, as
+    there is no telling whether they belong to the window.
+    """
+
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    since_filetime: Optional[int] = field(init=False, default=None)
+    until_filetime: Optional[int] = field(init=False, default=None)
+
+    def __post_init__(self):
+        if self.since is not None:
+            object.__setattr__(self, "since_filetime", to_filetime(self.since))
+        if self.until is not None:
+            object.__setattr__(self, "until_filetime", to_filetime(self.until))
+
+    def __bool__(self) -> bool:
+        return self.since is not None or self.until is not None
+
+    def before(self, ts) -> bool:
+        """Tell whether `ts` is before the window."""
+        return (
+            self.since is not None
+            and isinstance(ts, datetime)
+            and aware(ts) < self.since
+        )
+
+    def after(self, ts) -> bool:
+        """Tell whether `ts` is after the window."""
+        return (
+            self.until is not None
+            and isinstance(ts, datetime)
+            and aware(ts) > self.until
+        )
+
+    def contains(self, ts) -> bool:
+        return not (self.before(ts) or self.after(ts))
+
+    def filetime_before(self, value: int) -> bool:
+        return self.since_filetime is not None and value < self.since_filetime
+
+    def filetime_after(self, value: int) -> bool:
+        return self.until_filetime is not None and value > self.until_filetime
+
+    def contains_filetime(self, value: int) -> bool:
+        return not (self.filetime_before(value) or self.filetime_after(value))
+
+
+def aware(ts: datetime) -> datetime:
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)
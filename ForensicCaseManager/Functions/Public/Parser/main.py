@@ -3,10 +3,23 @@ import argparse
 import logging
 import uuid
 from pathlib import Path
+from datetime import datetime
+from typing import Optional
 
 from core.forensic_case import ForensicCase
 from core.forensic_evidence import ForensicEvidence
-from settings.config import LOGFILE_NAME
+from core.database_manager import DatabaseManager
+from core.time_window import parse_timestamp
+from settings.config import (
+    DATABASE_NAME,
+    LOGFILE_NAME,
+    PARSE_CACHE_DIRECTORY,
+    LOG_FORMAT,
+    DEFAULT_BATCH_SIZE,
+    VALIDATION_LEVELS,
+    DEFAULT_VALIDATION,
+    VALIDATION_SAMPLE_RATE,
+)
 
 
 def handle_case(
@@ -14,12 +27,26 @@ def handle_case(
     evidences: list[str],
     artifacts: list[str],
     categories: list[int],
+    streaming: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+    evtx_workers: int = 1,
+    incremental_evtx: bool = False,
+    usn_workers: int = 1,
+    sort_records: bool = True,
+    parse_cache: bool = False,
+    vacuum: bool = False,
+    resume: bool = False,
+    validation: str = DEFAULT_VALIDATION,
+    sample_rate: int = VALIDATION_SAMPLE_RATE,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
 ):
     log_file = Path(case_directory) / LOGFILE_NAME
 
     logging.basicConfig(
         level=logging.INFO,
-        format="%(asctime)s|%(name)s|%(levelname)s|%(message)s",
+        format=LOG_FORMAT,
         filename=log_file,
         encoding="utf-8",
     )
@@ -27,7 +54,13 @@ def handle_case(
     logger = logging.getLogger(__name__)
     logger.info("Starting Forensic Case Manager...")
 
-    session_id = str(uuid.uuid4())
+    # a resumed case keeps its session, so that evidence ids stay the same
+    session_id = None
+    if resume:
+        db_manager = DatabaseManager(database=Path(case_directory) / DATABASE_NAME)
+        session_id = db_manager.latest_session_id()
+        db_manager.close()
+    session_id = session_id or str(uuid.uuid4())
 
     # Set ForensicEvidence list
     forensic_evidences = [
@@ -38,6 +71,18 @@ def handle_case(
             _evidence=evidence,
             _artifacts=artifacts,
             _categories=categories,
+            streaming=streaming,
+            batch_size=batch_size,
+            workers=workers,
+            evtx_workers=evtx_workers,
+            incremental_evtx=incremental_evtx,
+            usn_workers=usn_workers,
+            sort_records=sort_records,
+            parse_cache=parse_cache,
+            validation=validation,
+            sample_rate=sample_rate,
+            since=since,
+            until=until,
         )
         for index, evidence in enumerate(evidences)
     ]
@@ -47,6 +92,20 @@ def handle_case(
         session_id=session_id,
         case_directory=case_directory,
         forensic_evidences=forensic_evidences,
+        streaming=streaming,
+        batch_size=batch_size,
+        workers=workers,
+        evtx_workers=evtx_workers,
+        incremental_evtx=incremental_evtx,
+        usn_workers=usn_workers,
+        sort_records=sort_records,
+        parse_cache=parse_cache,
+        validation=validation,
+        sample_rate=sample_rate,
+        since=since,
+        until=until,
+        vacuum=vacuum,
+        resume=resume,
     )
 
     # Investigate case
@@ -60,12 +119,22 @@ def is_directory(string):
         raise argparse.ArgumentTypeError(f"{string} is not a valid directory")
 
 
+def positive_int(string):
+    try:
+        value = int(string)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{string} is not a valid integer")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{string} is not a positive integer")
+    return value
+
+
 def get_evidence_files(case_directory: Path) -> list[str]:
     evidence_files = []
     path = case_directory / "evidences"  # Look in 'evidences' subdirectory
     if path.is_dir():
         evidence_files.extend(
-            [str(file) for file in path.glob("*.E01")]
+            [str(file) for file in sorted(path.glob("*.E01"))]
         )  # Assuming .E01 as evidence file extension
     else:
         print(f"Warning: Path {path} is not a valid directory")
@@ -104,6 +173,111 @@ if __name__ == "__main__":
         dest="category",
     )
 
+    # streaming mode: export parsed records to the database batch by batch
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="stream parsed records to the database instead of keeping them in memory",
+        dest="streaming",
+    )
+    parser.add_argument(
+        "--batch-size",
+        default=DEFAULT_BATCH_SIZE,
+        help="number of records inserted into the database at once",
+        dest="batch_size",
+        type=positive_int,
+    )
+    # parse artifacts of all evidences in a process pool
+    parser.add_argument(
+        "--workers",
+        default=1,
+        help="number of worker processes parsing artifacts in parallel",
+        dest="workers",
+        type=int,
+    )
+    # decode the chunks of event log files in a process pool
+    parser.add_argument(
+        "--evtx-workers",
+        default=1,
+        help="number of worker processes decoding the chunks of an event log file",
+        dest="evtx_workers",
+        type=int,
+    )
+    # decode segments of $UsnJrnl:$J in a process pool
+    parser.add_argument(
+        "--usn-workers",
+        default=1,
+        help="number of worker processes decoding segments of a $UsnJrnl:$J stream",
+        dest="usn_workers",
+        type=int,
+    )
+    # skip the events below the EventRecordID watermarks of previous sessions
+    parser.add_argument(
+        "--incremental-evtx",
+        action="store_true",
+        help="only ingest the event log records added since the last ingest of the same host",
+        dest="incremental_evtx",
+    )
+    # keep records in parsing order, the database orders them on read
+    parser.add_argument(
+        "--no-sort",
+        action="store_false",
+        help="don't sort parsed records in memory, read them ordered from the <table>_view views",
+        dest="sort_records",
+    )
+    # replay rows of unchanged artifact source files from previous runs
+    parser.add_argument(
+        "--parse-cache",
+        action="store_true",
+        help=f"cache parsed rows of artifact source files in <case_directory>/{PARSE_CACHE_DIRECTORY}"
+        " (remove the directory to clear the cache)",
+        dest="parse_cache",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="resume the last session of the case, skipping the artifacts already processed",
+        dest="resume",
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="rebuild the case database file once all artifacts are written",
+        dest="vacuum",
+    )
+
+    # record validation: every record, 1 in N records or none of them
+    parser.add_argument(
+        "--validation",
+        default=DEFAULT_VALIDATION,
+        choices=VALIDATION_LEVELS,
+        help="pydantic validation of parsed records",
+        dest="validation",
+    )
+    parser.add_argument(
+        "--validation-sample-rate",
+        default=VALIDATION_SAMPLE_RATE,
+        help="validate 1 in N records with '--validation sampled'",
+        dest="sample_rate",
+        type=positive_int,
+    )
+
+    # time window of the parsed records
+    parser.add_argument(
+        "--since",
+        default=None,
+        help="only parse records at or after this ISO 8601 date/time (UTC unless an offset is given)",
+        dest="since",
+        type=parse_timestamp,
+    )
+    parser.add_argument(
+        "--until",
+        default=None,
+        help="only parse records at or before this ISO 8601 date/time (UTC unless an offset is given)",
+        dest="until",
+        type=parse_timestamp,
+    )
+
     args = parser.parse_args()
 
     # Assigning values to case_name
@@ -118,4 +292,23 @@ if __name__ == "__main__":
     # Listing values to category
     categories = args.category.split(",") if args.category else None
 
-    handle_case(case_directory, evidences, artifacts, categories)
+    handle_case(
+        case_directory,
+        evidences,
+        artifacts,
+        categories,
+        streaming=args.streaming,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        evtx_workers=args.evtx_workers,
+        incremental_evtx=args.incremental_evtx,
+        usn_workers=args.usn_workers,
+        sort_records=args.sort_records,
+        parse_cache=args.parse_cache,
+        vacuum=args.vacuum,
+        resume=args.resume,
+        validation=args.validation,
+        sample_rate=args.sample_rate,
+        since=args.since,
+        until=args.until,
+    )
@@ -72,6 +72,11 @@ class Artifacts(Enum):
         category=Categories.DELETED_ITEMS_FILE_EXISTENCE.value,
         ForensicArtifact=usnjrnl.UsnJrnl,
     )
+    USNJRNL_COMPACT = Artifact(
+        name="usnjrnl_compact",
+        category=Categories.DELETED_ITEMS_FILE_EXISTENCE.value,
+        ForensicArtifact=usnjrnl.UsnJrnlCompact,
+    )
 
     ## Windows
     RECYCLEBIN = Artifact(
@@ -121,6 +126,11 @@ class Artifacts(Enum):
         category=Categories.ACCOUNT_USAGE.value,
         ForensicArtifact=eventlog.LogonEvent,
     )
+    LOGON_SESSIONS = Artifact(
+        name="logon_sessions",
+        category=Categories.ACCOUNT_USAGE.value,
+        ForensicArtifact=eventlog.LogonSessions,
+    )
     EVENT_USB = Artifact(
         name="usb_event",
         category=Categories.EXTERNAL_DEVICE_USB_USAGE.value,
@@ -131,6 +141,16 @@ class Artifacts(Enum):
         category=Categories.NETWORK_ACTIVITY_PHYSICAL_LOCATION.value,
         ForensicArtifact=eventlog.WlanEvent,
     )
+    EVENT_ALL = Artifact(
+        name="event_all",
+        category=Categories.SYSTEM_INFORMATION.value,
+        ForensicArtifact=eventlog.EventAll,
+    )
+    EVTX_CARVING = Artifact(
+        name="evtx_carving",
+        category=Categories.DELETED_ITEMS_FILE_EXISTENCE.value,
+        ForensicArtifact=eventlog.EvtxCarving,
+    )
 
     ## Registry
     AMCACHE = Artifact(
@@ -1,11 +1,76 @@
 # Database Name
 DATABASE_NAME = "case.db"
 LOGFILE_NAME = "test.log"
+PARSE_CACHE_DIRECTORY = "parse_cache"
+LOG_FORMAT = "%(asctime)s|%(name)s|%(levelname)s|%(message)s"
+
+# Number of records inserted into the database at once
+DEFAULT_BATCH_SIZE = 10000
+
+# SQLite PRAGMA profiles: while artifacts are being written / once the case is done
+# page_size only applies to a new database, so it must come before journal_mode
+PRAGMAS_BULK_INGEST = {
+    "page_size": 32768,
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -262144,  # KiB, 256 MiB
+    "temp_store": "MEMORY",
+}
+PRAGMAS_FINALIZE = {
+    "journal_mode": "DELETE",
+}
+
+# Database writer thread: pending batches and rows per transaction
+WRITER_QUEUE_SIZE = 16
+WRITER_TRANSACTION_SIZE = 200000
+
+# Chunk-parallel EVTX decoding: 64 KiB chunks in flight per worker process
+EVTX_CHUNKS_PER_WORKER = 8
+
+# Full event log ingest (event_all): 64 KiB chunks decoded by a single task, tasks
+# in flight per worker process and minimum number of rows inserted into the
+# database at once
+EVTX_INGEST_CHUNKS_PER_TASK = 16
+EVTX_INGEST_TASKS_PER_WORKER = 2
+EVTX_INGEST_BATCH_SIZE = 100000
+
+# Event log carving: bytes of volume offsets carved by a single task, tasks in
+# flight per worker process
+CARVE_RANGE_SIZE = 64 * 1024 * 1024
+CARVE_RANGES_PER_WORKER = 2
+
+# Logon sessions: open sessions kept while joining logons to their logoffs
+LOGON_SESSIONS_MAX_OPEN = 100000
+
+# MFT: minimum number of rows inserted into the database at once
+MFT_INGEST_BATCH_SIZE = 100000
+
+# MFT: bytes of the $MFT stream read at once while looking for directory records
+MFT_READ_SIZE = 1024 * 1024
+
+# UsnJrnl: bytes of the allocated runs of $J read at once, a multiple of the
+# 4 KiB USN page size
+USNJRNL_READ_SIZE = 1024 * 1024
+
+# UsnJrnl: resolved parent directory paths kept per volume
+USNJRNL_PATH_CACHE_SIZE = 65536
+
+# Segment-parallel UsnJrnl decoding: bytes of $J decoded by a single task (a
+# multiple of the page size), tasks in flight per worker process
+USNJRNL_SEGMENT_SIZE = 32 * 1024 * 1024
+USNJRNL_SEGMENTS_PER_WORKER = 2
+
+# Record validation: "strict" validates every record, "sampled" 1 in
+# VALIDATION_SAMPLE_RATE records and "trusted" none of them (model_construct)
+VALIDATION_LEVELS = ("strict", "sampled", "trusted")
+DEFAULT_VALIDATION = "strict"
+VALIDATION_SAMPLE_RATE = 100
 
 # Database Table Name
 TABLE_NAME_FORENSIC_CASE = "forensic_case"
 TABLE_NAME_EVIDENCES = "evidences"
 TABLE_NAME_ARTIFACT_CATEGORY = "artifact_category"
+TABLE_NAME_PROCESSING_STATE = "processing_state"
 
 # Categories
 CAT_APPLICATION_EXECUTION = "APPLICATION_EXECUTION"
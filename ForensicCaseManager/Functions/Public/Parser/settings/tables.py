@@ -13,7 +13,10 @@ class Tables(Enum):
     APP_IEXPLORE_DOWNLOADS = "app_iexplore_downloads"
 
     ## Filesystem
+    FS_MFT = "fs_mft"
     FS_USNJRNL = "fs_usnjrnl"
+    FS_USNJRNL_COMPACT = "fs_usnjrnl_compact"
+    FS_USNJRNL_PATHS = "fs_usnjrnl_paths"
 
     ## Windows
     WIN_RECYCLEBIN = "win_recyclebin"
@@ -29,6 +32,9 @@ class Tables(Enum):
     EVENT_LOGON = "event_logon"
     EVENT_USB = "event_usb"
     EVENT_WLAN = "event_wlan"
+    EVENT_ALL = "event_all"
+    LOGON_SESSIONS = "logon_sessions"
+    EVTX_WATERMARKS = "evtx_watermarks"
 
     ## Registry
     REG_AMCACHE_APPLICATION = "reg_amcache_application"
@@ -0,0 +1,11 @@
+from itertools import islice
+from typing import Generator, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+def batched(iterable: Iterable[T], size: int) -> Generator[list[T], None, None]:
+    """Yield lists of at most `size` items from `iterable`."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch